@@ -0,0 +1,77 @@
+"""Player source mapping uniqueness
+
+Adds the player value and source mapping tables (until now only created by
+Base.metadata.create_all) and a unique (source, source_player_id) constraint,
+which the bulk roster sync uses as its ON CONFLICT target.
+
+Revision ID: 3f2b9d1c7a10
+Revises: c1a7c5b6e4d5
+Create Date: 2026-10-18 09:12:31.408215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f2b9d1c7a10'
+down_revision: Union[str, None] = 'c1a7c5b6e4d5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    existing_tables = inspector.get_table_names()
+
+    if 'player_values' not in existing_tables:
+        op.create_table('player_values',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('player_id', sa.Integer(), nullable=False),
+        sa.Column('value', sa.Integer(), nullable=False),
+        sa.Column('format', sa.String(), nullable=False),
+        sa.Column('source', sa.String(), nullable=False),
+        sa.Column('date_updated', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['player_id'], ['players.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_player_values_id'), 'player_values', ['id'], unique=False)
+        op.create_index(op.f('ix_player_values_player_id'), 'player_values', ['player_id'], unique=False)
+
+    if 'player_source_mappings' not in existing_tables:
+        op.create_table('player_source_mappings',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('player_id', sa.Integer(), nullable=False),
+        sa.Column('source_player_id', sa.String(), nullable=False),
+        sa.Column('source_player_name', sa.String(), nullable=False),
+        sa.Column('source', sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(['player_id'], ['players.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_player_source_mappings_id'), 'player_source_mappings', ['id'], unique=False)
+        op.create_index(op.f('ix_player_source_mappings_player_id'), 'player_source_mappings', ['player_id'], unique=False)
+        op.create_index(op.f('ix_player_source_mappings_source_player_id'), 'player_source_mappings', ['source_player_id'], unique=False)
+    else:
+        # Tables created by create_all may already hold duplicates; keep the oldest mapping.
+        op.execute("""
+            DELETE FROM player_source_mappings a
+            USING player_source_mappings b
+            WHERE a.source = b.source
+              AND a.source_player_id = b.source_player_id
+              AND a.id > b.id
+        """)
+
+    existing_constraints = (
+        {c['name'] for c in inspector.get_unique_constraints('player_source_mappings')}
+        if 'player_source_mappings' in existing_tables else set()
+    )
+    if 'uq_player_source_mappings_source_id' not in existing_constraints:
+        op.create_unique_constraint(
+            'uq_player_source_mappings_source_id', 'player_source_mappings', ['source', 'source_player_id']
+        )
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_player_source_mappings_source_id', 'player_source_mappings', type_='unique')
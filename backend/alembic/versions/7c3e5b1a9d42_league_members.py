@@ -0,0 +1,43 @@
+"""League members
+
+Adds league_members, one row per user in a league. Leagues are shared: the
+second manager to sync a league reuses the row the first one created, so
+leagues.owner_id (the first to sync it) cannot say who may see it. Existing
+owners are carried over as members.
+
+Revision ID: 7c3e5b1a9d42
+Revises: a9f3d61c5e28
+Create Date: 2026-10-19 10:26:48.517203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c3e5b1a9d42'
+down_revision: Union[str, None] = 'a9f3d61c5e28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('league_members',
+    sa.Column('league_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['league_id'], ['leagues.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('league_id', 'user_id')
+    )
+    op.create_index(op.f('ix_league_members_user_id'), 'league_members', ['user_id'], unique=False)
+    op.execute(
+        "INSERT INTO league_members (league_id, user_id) "
+        "SELECT id, owner_id FROM leagues WHERE owner_id IS NOT NULL"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_league_members_user_id'), table_name='league_members')
+    op.drop_table('league_members')
@@ -0,0 +1,53 @@
+"""Player values latest
+
+Adds a covering (player_id, format, date_updated DESC) INCLUDE (value) index
+on player_values, and the player_values_latest table holding the newest value
+per (player, format), backfilled from the existing history.
+
+Revision ID: 8d4e2a6b1f37
+Revises: 3f2b9d1c7a10
+Create Date: 2026-10-18 14:03:52.118904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d4e2a6b1f37'
+down_revision: Union[str, None] = '3f2b9d1c7a10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_player_values_player_format_date',
+        'player_values',
+        ['player_id', 'format', sa.text('date_updated DESC')],
+        unique=False,
+        postgresql_include=['value'],
+    )
+
+    op.create_table('player_values_latest',
+    sa.Column('player_id', sa.Integer(), nullable=False),
+    sa.Column('format', sa.String(), nullable=False),
+    sa.Column('value', sa.Integer(), nullable=False),
+    sa.Column('source', sa.String(), nullable=False),
+    sa.Column('date_updated', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['player_id'], ['players.id'], ),
+    sa.PrimaryKeyConstraint('player_id', 'format')
+    )
+    op.execute("""
+        INSERT INTO player_values_latest (player_id, format, value, source, date_updated)
+        SELECT DISTINCT ON (player_id, format) player_id, format, value, source, COALESCE(date_updated, now())
+        FROM player_values
+        ORDER BY player_id, format, date_updated DESC NULLS LAST, id DESC
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('player_values_latest')
+    op.drop_index('ix_player_values_player_format_date', table_name='player_values')
@@ -0,0 +1,59 @@
+"""Schema drift from create_all
+
+The app used to run Base.metadata.create_all on startup, which created
+yahoo_tokens (and, on databases created that way, users.full_name and
+users.is_active) without a migration. Startup no longer touches the schema,
+so this brings them under Alembic. Each step is skipped when the object is
+already there, since whether it exists depends on how the database was made.
+
+Revision ID: a9f3d61c5e28
+Revises: e4c2a9d7b316
+Create Date: 2026-10-18 21:04:17.902115
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9f3d61c5e28'
+down_revision: Union[str, None] = 'e4c2a9d7b316'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    user_columns = {column['name'] for column in inspector.get_columns('users')}
+    user_indexes = {index['name'] for index in inspector.get_indexes('users')}
+
+    if 'full_name' not in user_columns:
+        op.add_column('users', sa.Column('full_name', sa.String(), nullable=True))
+    if 'ix_users_full_name' not in user_indexes:
+        op.create_index(op.f('ix_users_full_name'), 'users', ['full_name'], unique=False)
+    if 'is_active' not in user_columns:
+        op.add_column('users', sa.Column('is_active', sa.Boolean(), server_default=sa.true(), nullable=True))
+
+    if not inspector.has_table('yahoo_tokens'):
+        op.create_table('yahoo_tokens',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('access_token', sa.String(), nullable=False),
+        sa.Column('refresh_token', sa.String(), nullable=False),
+        sa.Column('token_type', sa.String(), nullable=False),
+        sa.Column('expires_at', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id')
+        )
+        op.create_index(op.f('ix_yahoo_tokens_id'), 'yahoo_tokens', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_yahoo_tokens_id'), table_name='yahoo_tokens')
+    op.drop_table('yahoo_tokens')
+    op.drop_column('users', 'is_active')
+    op.drop_index(op.f('ix_users_full_name'), table_name='users')
+    op.drop_column('users', 'full_name')
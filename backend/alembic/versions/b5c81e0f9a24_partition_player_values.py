@@ -0,0 +1,142 @@
+"""Partition player values
+
+Rebuilds player_values as a table range-partitioned by month on date_updated
+(the primary key becomes (id, date_updated), as PostgreSQL requires), with a
+partition per month from the oldest row through two months ahead. Also adds
+player_value_partitions, which tracks partitions and retention downsampling,
+and the player_value_weekly rollup backing the value history API.
+
+Revision ID: b5c81e0f9a24
+Revises: 8d4e2a6b1f37
+Create Date: 2026-10-18 15:26:40.572113
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5c81e0f9a24'
+down_revision: Union[str, None] = '8d4e2a6b1f37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 2
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    op.create_table('player_value_partitions',
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('range_start', sa.Date(), nullable=False),
+    sa.Column('range_end', sa.Date(), nullable=False),
+    sa.Column('downsampled_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.create_table('player_value_weekly',
+    sa.Column('player_id', sa.Integer(), nullable=False),
+    sa.Column('format', sa.String(), nullable=False),
+    sa.Column('week_start', sa.Date(), nullable=False),
+    sa.Column('value', sa.Integer(), nullable=False),
+    sa.Column('low', sa.Integer(), nullable=False),
+    sa.Column('high', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['player_id'], ['players.id'], ),
+    sa.PrimaryKeyConstraint('player_id', 'format', 'week_start')
+    )
+
+    # Move the existing table aside, freeing up the index and constraint names.
+    op.execute("ALTER TABLE player_values RENAME TO player_values_unpartitioned")
+    op.execute("ALTER TABLE player_values_unpartitioned RENAME CONSTRAINT player_values_pkey TO player_values_unpartitioned_pkey")
+    op.drop_index('ix_player_values_id', table_name='player_values_unpartitioned')
+    op.drop_index('ix_player_values_player_id', table_name='player_values_unpartitioned')
+    op.drop_index('ix_player_values_player_format_date', table_name='player_values_unpartitioned')
+
+    op.execute("""
+        CREATE TABLE player_values (
+            id INTEGER NOT NULL DEFAULT nextval('player_values_id_seq'),
+            player_id INTEGER NOT NULL CONSTRAINT player_values_player_id_fkey REFERENCES players (id),
+            value INTEGER NOT NULL,
+            format VARCHAR NOT NULL,
+            source VARCHAR NOT NULL,
+            date_updated TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            CONSTRAINT player_values_pkey PRIMARY KEY (id, date_updated)
+        ) PARTITION BY RANGE (date_updated)
+    """)
+    op.execute("ALTER SEQUENCE player_values_id_seq OWNED BY player_values.id")
+    op.create_index('ix_player_values_id', 'player_values', ['id'], unique=False)
+    op.create_index('ix_player_values_player_id', 'player_values', ['player_id'], unique=False)
+    op.create_index(
+        'ix_player_values_player_format_date',
+        'player_values',
+        ['player_id', 'format', sa.text('date_updated DESC')],
+        unique=False,
+        postgresql_include=['value'],
+    )
+
+    bind = op.get_bind()
+    oldest = bind.execute(sa.text("SELECT min(date_updated)::date FROM player_values_unpartitioned")).scalar()
+    today = date.today()
+    month = (oldest or today).replace(day=1)
+    last = _add_months(today.replace(day=1), MONTHS_AHEAD)
+    while month <= last:
+        name = f"player_values_y{month.year}m{month.month:02d}"
+        end = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE {name} PARTITION OF player_values FOR VALUES FROM ('{month}') TO ('{end}')"
+        )
+        op.execute(
+            f"INSERT INTO player_value_partitions (name, range_start, range_end) VALUES ('{name}', '{month}', '{end}')"
+        )
+        month = end
+
+    op.execute("""
+        INSERT INTO player_values (id, player_id, value, format, source, date_updated)
+        SELECT id, player_id, value, format, source, COALESCE(date_updated, now())
+        FROM player_values_unpartitioned
+    """)
+    op.drop_table('player_values_unpartitioned')
+
+    op.execute("""
+        INSERT INTO player_value_weekly (player_id, format, week_start, value, low, high)
+        SELECT player_id, format, date_trunc('week', date_updated)::date,
+               (array_agg(value ORDER BY date_updated DESC, id DESC))[1], min(value), max(value)
+        FROM player_values
+        GROUP BY player_id, format, date_trunc('week', date_updated)::date
+    """)
+
+
+def downgrade() -> None:
+    op.execute("""
+        CREATE TABLE player_values_unpartitioned (
+            id INTEGER NOT NULL DEFAULT nextval('player_values_id_seq'),
+            player_id INTEGER NOT NULL CONSTRAINT player_values_player_id_fkey REFERENCES players (id),
+            value INTEGER NOT NULL,
+            format VARCHAR NOT NULL,
+            source VARCHAR NOT NULL,
+            date_updated TIMESTAMP WITH TIME ZONE DEFAULT now(),
+            CONSTRAINT player_values_unpartitioned_pkey PRIMARY KEY (id)
+        )
+    """)
+    op.execute("INSERT INTO player_values_unpartitioned SELECT * FROM player_values")
+    op.execute("ALTER SEQUENCE player_values_id_seq OWNED BY player_values_unpartitioned.id")
+    op.drop_table('player_values')  # drops the partitions and their indexes too
+    op.execute("ALTER TABLE player_values_unpartitioned RENAME TO player_values")
+    op.execute("ALTER TABLE player_values RENAME CONSTRAINT player_values_unpartitioned_pkey TO player_values_pkey")
+    op.create_index('ix_player_values_id', 'player_values', ['id'], unique=False)
+    op.create_index('ix_player_values_player_id', 'player_values', ['player_id'], unique=False)
+    op.create_index(
+        'ix_player_values_player_format_date',
+        'player_values',
+        ['player_id', 'format', sa.text('date_updated DESC')],
+        unique=False,
+        postgresql_include=['value'],
+    )
+    op.drop_table('player_value_weekly')
+    op.drop_table('player_value_partitions')
@@ -24,7 +24,7 @@ def upgrade() -> None:
     sa.Column('id', sa.Integer(), nullable=False),
     sa.Column('yahoo_player_id', sa.String(), nullable=True),
     sa.Column('name', sa.String(), nullable=False),
-    sa.Column('position', sa.Enum('QB', 'RB', 'WR', 'TE', 'K', 'DEF', name='position'), nullable=False),
+    sa.Column('position', sa.Enum('QB', 'RB', 'WR', 'TE', 'K', 'DEF', name='position', quote=True), nullable=False),
     sa.Column('nfl_team_abbr', sa.String(), nullable=True),
     sa.Column('bye_week', sa.Integer(), nullable=True),
     sa.Column('adp', sa.Float(), nullable=True),
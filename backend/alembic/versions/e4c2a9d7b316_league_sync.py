@@ -0,0 +1,50 @@
+"""League sync
+
+Prepares the league tables for the Yahoo league sync: leagues.synced_at,
+teams.roster_hash (digest of the roster last written, so unchanged rosters are
+skipped), one team per Yahoo team id within a league, and a (team_id,
+player_id) primary key on roster_association, which also serves roster reads
+by team.
+
+Revision ID: e4c2a9d7b316
+Revises: b5c81e0f9a24
+Create Date: 2026-10-18 19:12:05.339721
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4c2a9d7b316'
+down_revision: Union[str, None] = 'b5c81e0f9a24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('leagues', sa.Column('synced_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('teams', sa.Column('roster_hash', sa.String(), nullable=True))
+    op.create_unique_constraint('uq_teams_league_yahoo_team', 'teams', ['league_id', 'yahoo_team_id'])
+
+    # Nothing wrote rosters before the sync, but drop any incomplete or
+    # duplicate rows so the primary key can be added.
+    op.execute("DELETE FROM roster_association WHERE team_id IS NULL OR player_id IS NULL")
+    op.execute("""
+        DELETE FROM roster_association a USING roster_association b
+        WHERE a.team_id = b.team_id AND a.player_id = b.player_id AND a.ctid > b.ctid
+    """)
+    op.alter_column('roster_association', 'team_id', existing_type=sa.Integer(), nullable=False)
+    op.alter_column('roster_association', 'player_id', existing_type=sa.Integer(), nullable=False)
+    op.create_primary_key('roster_association_pkey', 'roster_association', ['team_id', 'player_id'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('roster_association_pkey', 'roster_association', type_='primary')
+    op.alter_column('roster_association', 'player_id', existing_type=sa.Integer(), nullable=True)
+    op.alter_column('roster_association', 'team_id', existing_type=sa.Integer(), nullable=True)
+    op.drop_constraint('uq_teams_league_yahoo_team', 'teams', type_='unique')
+    op.drop_column('teams', 'roster_hash')
+    op.drop_column('leagues', 'synced_at')
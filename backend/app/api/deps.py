@@ -1,14 +1,19 @@
-from fastapi import Depends, HTTPException, status, Request
+import secrets
+from typing import Optional
+
+from fastapi import Depends, Header, HTTPException, status, Request
 from jose import jwt, JWTError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app import crud, models
+from app import crud
 from app.core.config import settings
 from app.core.db import get_db
+from app.schemas.user import UserPrincipal
+from app.services import yahoo_service
 
-def get_current_user(
-    request: Request, db: Session = Depends(get_db)
-) -> models.User:
+async def get_current_user(
+    request: Request, db: AsyncSession = Depends(get_db)
+) -> UserPrincipal:
     token = request.cookies.get("access_token_cookie")
     if not token:
         raise HTTPException(
@@ -30,14 +35,43 @@ def get_current_user(
             detail="Could not validate credentials",
         )
         
-    user = crud.crud_user.get_user_by_email(db, email=email)
+    user = await crud.crud_user.get_principal_by_email(db, email=email)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
-def get_current_active_user(
-    current_user: models.User = Depends(get_current_user),
-) -> models.User:
+async def get_current_active_user(
+    current_user: UserPrincipal = Depends(get_current_user),
+) -> UserPrincipal:
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-    return current_user
\ No newline at end of file
+    return current_user
+
+async def get_yahoo_access_token(
+    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(get_current_active_user),
+) -> str:
+    """Returns a valid Yahoo access token for the current user, refreshing it if needed."""
+    return await yahoo_service.get_refreshed_token(db, user_id=current_user.id)
+
+async def get_league_access_token(
+    league_key: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(get_current_active_user),
+) -> str:
+    """
+    Like get_yahoo_access_token, for routes under /leagues/{league_key}: the
+    current user must be in that league. League-level data is cached and
+    shared between members, so Yahoo never gets to check this itself.
+    """
+    leagues = await yahoo_service.get_user_leagues(db, user_id=current_user.id)
+    if all(league.league_key != league_key for league in leagues):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="League not found.")
+    return await yahoo_service.get_refreshed_token(db, user_id=current_user.id)
+
+async def verify_internal_token(x_internal_token: Optional[str] = Header(None)) -> None:
+    """Guards internal endpoints; they are hidden entirely while INTERNAL_API_TOKEN is unset."""
+    if not settings.INTERNAL_API_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not x_internal_token or not secrets.compare_digest(x_internal_token, settings.INTERNAL_API_TOKEN):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid internal token")
@@ -1,44 +1,90 @@
-from typing import List
-from fastapi import APIRouter, Depends, Request, HTTPException
+import asyncio
+from typing import AsyncIterator, Awaitable, List, Literal, TypeVar
+from fastapi import APIRouter, Depends, Query, Request, HTTPException
+from fastapi.responses import StreamingResponse
 
-# NOTE: The following imports are based on common project structures and assumptions
-# about where authentication dependencies are located. The exact paths may need
-# to be adjusted to match the project's actual implementation.
-from backend.app.dependencies import get_current_active_user
-from backend.app.schemas.user import User
-from backend.app.schemas.waiver import WaiverPlayer
-from backend.app.services import waiver_service
+from app.api import deps
+from app.schemas.user import UserPrincipal
+from app.schemas.waiver import WaiverPlayer
+from app.services import waiver_service
 
 router = APIRouter()
 
+T = TypeVar("T")
+
+PlayerStatus = Literal["W", "FA", "A"]
+STATUS_QUERY = Query("W", description="W = on waivers, FA = free agents, A = all available players.")
+
+async def _cancel_on_disconnect(request: Request, awaitable: Awaitable[T]) -> T:
+    """
+    Awaits `awaitable`, cancelling it if the client goes away first so an
+    abandoned page load does not keep holding a Yahoo request slot.
+    """
+    async def wait_for_disconnect():
+        while (await request.receive())["type"] != "http.disconnect":
+            pass
+
+    work = asyncio.ensure_future(awaitable)
+    watcher = asyncio.ensure_future(wait_for_disconnect())
+    try:
+        await asyncio.wait({work, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        watcher.cancel()
+    if not work.done():
+        work.cancel()
+        raise HTTPException(status_code=499, detail="Client closed request.")
+    return work.result()
+
 @router.get(
     "/waiver-wire",
     response_model=List[WaiverPlayer],
     summary="Get Waiver Wire Players",
     description="Fetches a list of players currently available on the waiver wire for a given league. The league_key must be provided in the path prefix when this router is included in the main app."
 )
-def read_waiver_wire(
+async def read_waiver_wire(
     request: Request,
-    current_user: User = Depends(get_current_active_user)
+    status: PlayerStatus = STATUS_QUERY,
+    access_token: str = Depends(deps.get_league_access_token),
+    current_user: UserPrincipal = Depends(deps.get_current_active_user),
 ):
     """
     Retrieves waiver wire players from the Yahoo Fantasy API for a specific league.
     The `league_key` is extracted from the URL path parameters.
-    Requires an authenticated user with a valid Yahoo access token.
+    Requires an authenticated user with a linked Yahoo account who is in the league.
     """
     if "league_key" not in request.path_params:
         raise HTTPException(status_code=400, detail="League key missing in URL path.")
 
     league_key = request.path_params["league_key"]
-    
-    if not hasattr(current_user, 'yahoo_access_token') or not current_user.yahoo_access_token:
-        raise HTTPException(
-            status_code=401, 
-            detail="User not authenticated with Yahoo or access token is missing."
-        )
-
-    waiver_players = waiver_service.process_waiver_data(
-        access_token=current_user.yahoo_access_token, 
-        league_key=league_key
+
+    waiver_players = await _cancel_on_disconnect(
+        request,
+        waiver_service.process_waiver_data(
+            access_token=access_token, user_id=current_user.id, league_key=league_key, status=status
+        ),
     )
     return waiver_players
+
+@router.get(
+    "/waiver-wire/stream",
+    summary="Stream Waiver Wire Players",
+    description="Same data as /waiver-wire, streamed as newline-delimited JSON while Yahoo pages are still being fetched.",
+    response_class=StreamingResponse,
+)
+async def stream_waiver_wire(
+    request: Request,
+    status: PlayerStatus = STATUS_QUERY,
+    access_token: str = Depends(deps.get_league_access_token),
+    current_user: UserPrincipal = Depends(deps.get_current_active_user),
+):
+    """Streams one WaiverPlayer JSON object per line as each Yahoo page arrives."""
+    if "league_key" not in request.path_params:
+        raise HTTPException(status_code=400, detail="League key missing in URL path.")
+
+    league_key = request.path_params["league_key"]
+
+    async def lines() -> AsyncIterator[str]:
+        async for player in waiver_service.iter_waiver_players(access_token, current_user.id, league_key, status=status):
+            yield player.model_dump_json() + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
@@ -1,31 +1,39 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status, Response
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app import schemas, crud, models
+from app import schemas, crud
 from app.api import deps
 from app.core import security
 from app.core.db import get_db
 from app.core.config import settings
+from app.core.password_hasher import password_hasher
 
 router = APIRouter()
 
 @router.post("/login", response_model=schemas.user.UserPublic)
-def login_for_access_token(
+async def login_for_access_token(
     response: Response,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     form_data: OAuth2PasswordRequestForm = Depends(),
 ):
     """
     Authenticates user and sets an HttpOnly access token cookie.
     """
-    user = crud.crud_user.get_user_by_email(db, email=form_data.username)
-    if not user or not security.verify_password(form_data.password, user.hashed_password):
+    user = await crud.crud_user.get_user_by_email(db, email=form_data.username)
+    valid, new_hash = (False, None)
+    if user:
+        valid, new_hash = await password_hasher.verify_and_update(form_data.password, user.hashed_password)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
         )
+    if new_hash:
+        # Stored with an outdated bcrypt cost; upgrade it while we have the password.
+        user.hashed_password = new_hash
+        await db.commit()
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
 
@@ -45,18 +53,18 @@ def login_for_access_token(
     return user
 
 @router.post("/register", response_model=schemas.user.UserPublic, status_code=status.HTTP_201_CREATED)
-def register_user(
+async def register_user(
     user_in: schemas.user.UserCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Create new user."""
-    user = crud.crud_user.get_user_by_email(db, email=user_in.email)
+    user = await crud.crud_user.get_user_by_email(db, email=user_in.email)
     if user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="The user with this email already exists.",
         )
-    new_user = crud.crud_user.create_user(db=db, user_in=user_in)
+    new_user = await crud.crud_user.create_user(db=db, user_in=user_in)
     return new_user
 
 @router.post("/logout")
@@ -66,6 +74,6 @@ def logout(response: Response):
     return {"message": "Successfully logged out"}
 
 @router.get("/users/me", response_model=schemas.user.UserPublic)
-def read_users_me(current_user: models.User = Depends(deps.get_current_active_user)):
+async def read_users_me(current_user: schemas.user.UserPrincipal = Depends(deps.get_current_active_user)):
     """Get current user."""
     return current_user
\ No newline at end of file
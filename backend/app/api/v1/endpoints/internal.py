@@ -0,0 +1,60 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from app.api import deps
+from app.core.cache import cache_stats
+from app.core.db_pool import db_pool_stats
+from app.core.metrics import render_metrics
+from app.core.password_hasher import password_hasher
+from app.core.request_scheduler import scheduler_stats
+from app.core.singleflight import singleflight_stats
+from app.core import db, tracing
+
+router = APIRouter(dependencies=[Depends(deps.verify_internal_token)])
+
+@router.get("/stats")
+async def get_internal_stats():
+    """
+    Process-local counters: database pool, password hashing, read-through
+    caches, request coalescing and outbound scheduling. The pool is null until
+    something has used the database; asking for stats does not create it.
+    """
+    return {
+        "db_pool": db_pool_stats(db._engine.sync_engine) if db._engine is not None else None,
+        "password_hashing": password_hasher.stats(),
+        "caches": cache_stats(),
+        "singleflight": singleflight_stats(),
+        "outbound_schedulers": scheduler_stats(),
+    }
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Latency histograms and error counters in the Prometheus text format.
+    Rendered on the event loop, where every series is recorded, so the output
+    is a consistent snapshot.
+    """
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+def _trace_buffer() -> tracing.InMemoryExporter:
+    if not isinstance(tracing.exporter, tracing.InMemoryExporter):
+        raise HTTPException(status_code=404, detail="Traces are not kept in memory (see TRACE_EXPORTER).")
+    return tracing.exporter
+
+# The trace handlers are async so they read the buffer on the event loop,
+# where TracingMiddleware appends to it.
+@router.get("/traces")
+async def get_recent_traces(limit: int = Query(20, ge=1, le=200), route: Optional[str] = None):
+    """The most recent request traces, newest first, optionally for one route template."""
+    traces = [t for t in reversed(_trace_buffer().traces) if route is None or t["route"] == route]
+    return traces[:limit]
+
+@router.get("/traces/{request_id}")
+async def get_trace(request_id: str):
+    """The trace of one request, by the X-Request-ID it was served with."""
+    trace = _trace_buffer().find(request_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found.")
+    return trace
@@ -0,0 +1,42 @@
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api import deps
+from app.core.db import get_db
+from app.schemas.league import LeagueDetail, LeagueSummary, LeagueSyncResult
+from app.schemas.user import UserPrincipal
+from app.services import league_sync_service
+
+router = APIRouter()
+
+@router.post("/sync", response_model=LeagueSyncResult)
+async def sync_leagues(
+    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(deps.get_current_active_user),
+):
+    """
+    Pulls the user's Yahoo leagues, teams and rosters into the database.
+    Only rosters that changed since the last sync are rewritten.
+    """
+    return await league_sync_service.sync_user_leagues(db, user_id=current_user.id)
+
+@router.get("", response_model=List[LeagueSummary])
+async def list_leagues(
+    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(deps.get_current_active_user),
+):
+    """The user's synced leagues."""
+    return await league_sync_service.get_user_leagues(db, user_id=current_user.id)
+
+@router.get("/{league_id}", response_model=LeagueDetail)
+async def get_league(
+    league_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(deps.get_current_active_user),
+):
+    """A synced league with every team's roster, served from the database."""
+    league = await league_sync_service.get_league(db, league_id=league_id, user_id=current_user.id)
+    if league is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="League not found.")
+    return league
@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api import deps
+from app.core.db import get_db
+from app.schemas.player import PlayerValueHistory
+from app.schemas.user import UserPrincipal
+from app.services import player_value_history_service
+
+router = APIRouter()
+
+@router.get("/{player_id}/values/history", response_model=PlayerValueHistory)
+async def get_player_value_history(
+    player_id: int,
+    league_format: str = Query("Superflex"),
+    weeks: int = Query(52, ge=1, le=520),
+    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(deps.get_current_active_user),
+):
+    """
+    Weekly value trend for a player, one point per week, for charting.
+    """
+    return await player_value_history_service.get_value_history(db, player_id, league_format, weeks=weeks)
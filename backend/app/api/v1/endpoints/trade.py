@@ -0,0 +1,62 @@
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api import deps
+from app.core.db import get_db
+from app.models.league import league_members
+from app.models.team import Team
+from app.schemas.trade import TradeAnalysis, TradeBatchRequest, TradeRequest, TradeSuggestions
+from app.schemas.user import UserPrincipal
+from app.services import trade_analyzer_service, trade_suggestion_service
+
+router = APIRouter()
+
+@router.post("/analyze", response_model=TradeAnalysis)
+async def analyze_trade(
+    trade_request: TradeRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(deps.get_current_active_user),
+):
+    """
+    Compares the latest values of both sides of a proposed trade.
+    """
+    return await trade_analyzer_service.analyze_trade(db, trade_request)
+
+@router.post("/analyze/batch", response_model=List[TradeAnalysis])
+async def analyze_trades(
+    batch: TradeBatchRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(deps.get_current_active_user),
+):
+    """
+    Scores up to 1000 candidate trades in one call; results are in request order.
+    """
+    return await trade_analyzer_service.analyze_trades(db, batch.trades)
+
+@router.get("/suggestions", response_model=TradeSuggestions)
+async def suggest_trades(
+    my_team_id: int = Query(...),
+    their_team_id: int = Query(...),
+    league_format: str = Query("Superflex"),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(deps.get_current_active_user),
+):
+    """
+    Suggests fairly balanced 1-for-1, 2-for-1 and 2-for-2 trades between two
+    teams of one of the user's leagues.
+    """
+    teams = (await db.execute(
+        select(Team.league_id)
+        .join(league_members, Team.league_id == league_members.c.league_id)
+        .where(Team.id.in_([my_team_id, their_team_id]), league_members.c.user_id == current_user.id)
+    )).all()
+    if (
+        my_team_id == their_team_id
+        or len(teams) != 2
+        or teams[0].league_id != teams[1].league_id
+    ):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Teams not found in your leagues.")
+    return await trade_suggestion_service.suggest_trades(db, my_team_id, their_team_id, league_format, limit=limit)
@@ -3,10 +3,10 @@ from typing import Dict
 import httpx
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi.responses import RedirectResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from jose import jwt, JWTError
 
-from app import crud, models, schemas
+from app import crud, schemas
 from app.api import deps
 from app.core.db import get_db
 from app.core.config import settings
@@ -16,7 +16,7 @@ router = APIRouter()
 
 @router.get("/yahoo/auth", response_model=schemas.yahoo_token.AuthURL)
 def get_yahoo_auth_url(
-    current_user: models.User = Depends(deps.get_current_active_user),
+    current_user: schemas.user.UserPrincipal = Depends(deps.get_current_active_user),
 ):
     """
     Generate the Yahoo authorization URL for the user to visit.
@@ -29,7 +29,7 @@ def get_yahoo_auth_url(
 async def handle_yahoo_callback(
     code: str = Query(...),
     state: str = Query(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Handles the redirect from Yahoo after user authorization.
@@ -59,24 +59,27 @@ async def handle_yahoo_callback(
         expires_at=int(time.time()) + token_info["expires_in"],
     )
 
-    crud.crud_yahoo_token.create_or_update(db, obj_in=token_in, user_id=user_id)
+    await crud.crud_yahoo_token.create_or_update(db, obj_in=token_in, user_id=user_id)
+    yahoo_service.remember_token(user_id, token_in)
+    # A newly linked account may see a different set of leagues.
+    await yahoo_service.leagues_cache.invalidate(str(user_id))
 
     # Redirect user back to the leagues page in the frontend
     return RedirectResponse(url=f"{settings.FRONTEND_URL}/leagues")
 
 @router.get("/yahoo/status", response_model=schemas.yahoo_token.YahooAuthStatus)
-def get_yahoo_link_status(
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(deps.get_current_active_user),
+async def get_yahoo_link_status(
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.user.UserPrincipal = Depends(deps.get_current_active_user),
 ):
     """Check if the current user has linked their Yahoo account."""
-    token = crud.crud_yahoo_token.get_by_user_id(db, user_id=current_user.id)
+    token = await crud.crud_yahoo_token.get_by_user_id(db, user_id=current_user.id)
     return {"is_linked": token is not None}
 
 @router.get("/yahoo/leagues", response_model=schemas.yahoo_token.YahooLeaguesResponse)
 async def fetch_user_leagues(
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(deps.get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.user.UserPrincipal = Depends(deps.get_current_active_user),
 ):
     """Fetch the authenticated user's fantasy leagues from Yahoo."""
     leagues = await yahoo_service.get_user_leagues(db, user_id=current_user.id)
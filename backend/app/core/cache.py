@@ -0,0 +1,155 @@
+"""
+In-process TTL caches with stale-while-revalidate.
+
+Each cached value has two deadlines: until `ttl` it is fresh and served as is;
+until `ttl + stale_ttl` it is served immediately while a single background task
+reloads it. After that it is treated as a miss. Storage goes through a small
+backend interface so a shared store (e.g. Redis) can replace the default
+in-memory LRU without touching callers.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Protocol, Set
+
+from app.core.config import settings
+from app.core.request_scheduler import background_lane
+
+logger = logging.getLogger(__name__)
+
+Loader = Callable[[], Awaitable[Any]]
+
+@dataclass
+class CacheEntry:
+    value: Any
+    fresh_until: float  # wall-clock seconds, so entries can be shared across processes
+    stale_until: float
+
+class CacheBackend(Protocol):
+    async def get(self, key: str) -> Optional[CacheEntry]: ...
+    async def set(self, key: str, entry: CacheEntry) -> None: ...
+    async def delete(self, key: str) -> None: ...
+
+class InMemoryBackend:
+    """Size-bounded LRU dictionary; the default backend."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    async def set(self, key: str, entry: CacheEntry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class SWRCache:
+    """A named cache namespace with its own TTLs on top of a backend."""
+
+    def __init__(self, name: str, ttl: float, stale_ttl: float, backend: CacheBackend):
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.backend = backend
+        self._refreshing: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self.counters: Dict[str, int] = {
+            "hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "refresh_errors": 0,
+        }
+
+    def _key(self, key: str) -> str:
+        return f"{self.name}:{key}"
+
+    async def get(self, key: str, refresh: Optional[Loader] = None) -> Any:
+        """
+        Returns the cached value or None. A stale value is still returned, and
+        `refresh` (if given) is scheduled in the background to replace it.
+        """
+        entry = await self.backend.get(self._key(key))
+        now = time.time()
+        if entry is None or now >= entry.stale_until:
+            self.counters["misses"] += 1
+            return None
+        if now < entry.fresh_until:
+            self.counters["hits"] += 1
+        else:
+            self.counters["stale_hits"] += 1
+            if refresh is not None:
+                self._schedule_refresh(key, refresh)
+        return entry.value
+
+    async def set(self, key: str, value: Any) -> None:
+        now = time.time()
+        await self.backend.set(
+            self._key(key), CacheEntry(value, now + self.ttl, now + self.ttl + self.stale_ttl)
+        )
+
+    async def invalidate(self, key: str) -> None:
+        await self.backend.delete(self._key(key))
+
+    async def get_or_load(self, key: str, load: Loader, refresh: Optional[Loader] = None) -> Any:
+        """
+        Serves `key` from the cache, calling `load` on a miss. `refresh` is used
+        for background revalidation and defaults to `load`; pass a separate one
+        when `load` closes over request-scoped state such as a DB session.
+        """
+        value = await self.get(key, refresh=refresh or load)
+        if value is None:
+            value = await load()
+            await self.set(key, value)
+        return value
+
+    def _schedule_refresh(self, key: str, refresh: Loader) -> None:
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+
+        async def run():
+            try:
+                # Someone is already being served the stale value, so the
+                # refresh's upstream calls yield to interactive ones.
+                with background_lane():
+                    value = await refresh()
+                await self.set(key, value)
+                self.counters["refreshes"] += 1
+            except Exception as e:
+                self.counters["refresh_errors"] += 1
+                logger.warning(f"Background refresh of {self._key(key)} failed: {e!r}")
+            finally:
+                self._refreshing.discard(key)
+
+        task = asyncio.ensure_future(run())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+_backend: CacheBackend = InMemoryBackend(settings.CACHE_MAX_ENTRIES)
+_caches: Dict[str, SWRCache] = {}
+
+def create_cache(name: str, ttl: float, stale_ttl: float) -> SWRCache:
+    """Creates a cache namespace on the shared backend."""
+    cache = _caches[name] = SWRCache(name, ttl, stale_ttl, _backend)
+    return cache
+
+def configure_backend(backend: CacheBackend) -> None:
+    """Points every cache namespace at a different (e.g. shared) backend."""
+    global _backend
+    _backend = backend
+    for cache in _caches.values():
+        cache.backend = backend
+
+def cache_stats() -> Dict[str, Dict[str, int]]:
+    return {name: dict(cache.counters) for name, cache in _caches.items()}
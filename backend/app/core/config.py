@@ -7,14 +7,113 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
 
+    # Password hashing. Changing the bcrypt cost rehashes each password on its
+    # owner's next login. Hashing runs on a dedicated thread pool; once
+    # max pending calls are running or queued, logins get 503 + Retry-After.
+    PASSWORD_BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 64
+
     # Database
     DATABASE_URL: str
+    # Connection pool (per worker process). Requests that cannot get a
+    # connection within the timeout (seconds) fail; connections older than
+    # the recycle age are replaced, and pre-ping drops dead ones on checkout.
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 30 * 60
+    DB_POOL_PRE_PING: bool = True
+
+    # Shared secret for the internal endpoints and request profiling
+    # (X-Internal-Token header); both are disabled while unset.
+    INTERNAL_API_TOKEN: Optional[str] = None
+    # Latency histograms per route, Yahoo endpoint and SQL statement shape,
+    # served in Prometheus format at /api/v1/internal/metrics.
+    METRICS_ENABLED: bool = True
+    # Per-request traces (Yahoo, token and DB spans) with a Server-Timing
+    # response header. Finished traces go to the exporter: "memory" keeps the
+    # last TRACE_BUFFER_SIZE for /api/v1/internal/traces, "file" also appends
+    # them to TRACE_FILE as JSON lines, "none" drops them.
+    TRACING_ENABLED: bool = True
+    TRACE_EXPORTER: str = "memory"
+    TRACE_FILE: str = "traces.jsonl"
+    TRACE_BUFFER_SIZE: int = 200
+    # Sampling profiler. A request sent with `X-Profile: 1` and a valid
+    # X-Internal-Token is sampled every PROFILER_REQUEST_INTERVAL seconds
+    # (the GIL switch interval, 5 ms, bounds the effective rate) and answered
+    # with its collapsed stacks. With PROFILER_ENABLED, the event loop is also
+    # sampled every PROFILER_INTERVAL seconds and the aggregated stacks are
+    # written to PROFILER_DIR every PROFILER_FLUSH_INTERVAL seconds.
+    PROFILER_REQUEST_INTERVAL: float = 0.005
+    PROFILER_ENABLED: bool = False
+    PROFILER_INTERVAL: float = 0.05
+    PROFILER_FLUSH_INTERVAL: float = 300.0
+    PROFILER_DIR: str = "profiles"
 
     # Yahoo API Credentials
     YAHOO_CLIENT_ID: str
     YAHOO_CLIENT_SECRET: str
     YAHOO_REDIRECT_URI: str
 
+    # Outbound Yahoo HTTP clients (shared, pooled per host)
+    YAHOO_HTTP2: bool = True
+    YAHOO_HTTP_TIMEOUT: float = 10.0  # seconds, read/write/pool
+    YAHOO_HTTP_CONNECT_TIMEOUT: float = 5.0
+    YAHOO_HTTP_MAX_CONNECTIONS_PER_HOST: int = 50
+    YAHOO_HTTP_MAX_KEEPALIVE_PER_HOST: int = 20
+    YAHOO_HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    YAHOO_MAX_CONCURRENT_REQUESTS: int = 32  # in-flight Fantasy API calls per worker
+    YAHOO_REQUEST_DEADLINE: float = 15.0  # seconds, including time queued and retries
+    # Fantasy API rate limits per worker (requests/second and burst size),
+    # for the app as a whole and for each user's token. Throttled responses
+    # (999/429) are retried after a jittered exponential backoff starting at
+    # the base and capped at the max (seconds).
+    YAHOO_RATE_LIMIT_APP_RPS: float = 20.0
+    YAHOO_RATE_LIMIT_APP_BURST: int = 40
+    YAHOO_RATE_LIMIT_USER_RPS: float = 5.0
+    YAHOO_RATE_LIMIT_USER_BURST: int = 20
+    YAHOO_THROTTLE_RETRIES: int = 3
+    YAHOO_BACKOFF_BASE: float = 0.5
+    YAHOO_BACKOFF_MAX: float = 8.0
+    YAHOO_MAX_CONCURRENT_PAGES: int = 4  # pages fetched at once by paginated collections
+
+    # Yahoo OAuth token lifecycle (seconds). Requests refresh a token once it is
+    # within the margin of expiry; the background renewer refreshes tokens of
+    # users active in the last window as soon as they are within renew-ahead.
+    YAHOO_TOKEN_REFRESH_MARGIN: int = 5 * 60
+    YAHOO_TOKEN_RENEW_AHEAD: int = 15 * 60
+    YAHOO_TOKEN_RENEWAL_INTERVAL: int = 60
+    YAHOO_TOKEN_RENEWAL_ACTIVE_WINDOW: int = 24 * 60 * 60
+
+    # Read-through caches for Yahoo data (seconds). Stale entries are served
+    # while a background refresh runs, until ttl + stale_ttl has passed.
+    CACHE_MAX_ENTRIES: int = 10_000
+    LEAGUES_CACHE_TTL: int = 60 * 60
+    LEAGUES_CACHE_STALE_TTL: int = 60 * 60 * 24
+    WAIVER_CACHE_TTL: int = 2 * 60
+    WAIVER_CACHE_STALE_TTL: int = 15 * 60
+    # Authenticated user principals, keyed by token subject. Changes made
+    # through crud_user invalidate them; other workers see them within the TTL.
+    USER_CACHE_TTL: int = 60
+
+    # In-memory latest player value index: how often (seconds) the API checks
+    # player_values for new rows and rebuilds it.
+    PLAYER_VALUE_INDEX_REFRESH_SECONDS: int = 60
+
+    # player_values is partitioned by month: partitions are created this many
+    # months ahead, and rows older than the retention window are downsampled
+    # to one per player, format and week.
+    PLAYER_VALUE_PARTITIONS_AHEAD: int = 2
+    PLAYER_VALUE_RAW_RETENTION_DAYS: int = 90
+
+    # Trade suggestion search budget per request (seconds); the best packages
+    # found so far are returned when it runs out.
+    TRADE_SUGGESTION_TIME_BUDGET: float = 0.05
+
+    # Root log level, applied by the app lifespan (never at import).
+    LOG_LEVEL: str = "INFO"
+
     # Frontend URL (for CORS and redirects)
     FRONTEND_URL: str = "http://localhost:5173"
     
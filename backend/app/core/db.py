@@ -1,17 +1,73 @@
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base
 
 from app.core.config import settings
+from app.core.db_pool import InstrumentedQueuePool, instrument_pool
+from app.core.metrics import instrument_queries
+from app.core.tracing import trace_queries
+
+# Drivers the application talks to; URLs naming another driver are used as is.
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
 
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def async_database_url(url: str) -> str:
+    """Rewrites a driver-less URL (e.g. postgresql://...) to its async driver."""
+    scheme, separator, rest = url.partition("://")
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}{separator}{rest}"
+
+def pool_options(url: str) -> dict:
+    """Pool configuration from settings; SQLite keeps SQLAlchemy's default pool."""
+    if url.startswith("sqlite"):
+        return {}
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
 
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
+# Created on first use rather than at import, so importing the app (workers,
+# reloads, scripts, Alembic) never loads a database driver or builds a pool.
+_engine: Optional[AsyncEngine] = None
+_session_factory: Optional[async_sessionmaker] = None
+
+def get_engine() -> AsyncEngine:
+    global _engine, _session_factory
+    if _engine is None:
+        _engine = create_async_engine(async_database_url(settings.DATABASE_URL), **pool_options(settings.DATABASE_URL))
+        instrument_pool(_engine.sync_engine)
+        if settings.METRICS_ENABLED:
+            instrument_queries(_engine.sync_engine)
+        if settings.TRACING_ENABLED:
+            trace_queries(_engine.sync_engine)
+        # Objects stay usable after commit; with AsyncSession an expired
+        # attribute cannot be lazily reloaded.
+        _session_factory = async_sessionmaker(
+            _engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+        )
+    return _engine
+
+def SessionLocal() -> AsyncSession:
+    """Opens a new session on the application engine (creating the engine if needed)."""
+    get_engine()
+    return _session_factory()
+
+async def dispose_engine() -> None:
+    """Closes the pool's connections; the next session starts a fresh engine."""
+    global _engine, _session_factory
+    if _engine is not None:
+        await _engine.dispose()
+        _engine = _session_factory = None
+
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
\ No newline at end of file
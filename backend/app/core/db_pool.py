@@ -0,0 +1,98 @@
+"""
+Database connection pool telemetry.
+
+InstrumentedQueuePool times every wait for a connection (including opening a
+new one when the pool may grow) and counts checkouts that time out. Pool event
+hooks track connections opened, checked out, returned and invalidated. Together
+they show whether slow requests are queueing for connections rather than
+waiting on PostgreSQL itself.
+"""
+import time
+from bisect import bisect_left
+from typing import Any, Dict
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Upper bounds (seconds) of the checkout wait histogram buckets; the last
+# bucket catches everything slower.
+WAIT_BUCKETS = (0.001, 0.005, 0.025, 0.1, 0.5, 2.5)
+
+class PoolStats:
+    def __init__(self):
+        self.counters: Dict[str, int] = {
+            "connects": 0, "checkouts": 0, "checkins": 0, "invalidations": 0,
+            "timeouts": 0, "checked_out": 0, "peak_checked_out": 0,
+        }
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS) + 1)
+
+    def record_wait(self, seconds: float) -> None:
+        self.wait_total += seconds
+        self.wait_max = max(self.wait_max, seconds)
+        self.wait_buckets[bisect_left(WAIT_BUCKETS, seconds)] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        waits = sum(self.wait_buckets)
+        labels = [f"<={bound * 1000:g}ms" for bound in WAIT_BUCKETS] + [f">{WAIT_BUCKETS[-1] * 1000:g}ms"]
+        return {
+            **self.counters,
+            "wait_ms_avg": round(self.wait_total / waits * 1000, 3) if waits else 0.0,
+            "wait_ms_max": round(self.wait_max * 1000, 3),
+            "wait_histogram": dict(zip(labels, self.wait_buckets)),
+        }
+
+# Module level so the numbers survive engine.dispose(), which swaps in a new pool.
+pool_stats = PoolStats()
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            pool_stats.counters["timeouts"] += 1
+            raise
+        finally:
+            pool_stats.record_wait(time.perf_counter() - started)
+
+def instrument_pool(engine: Engine) -> None:
+    """Registers the pool event hooks feeding pool_stats on a (sync) engine."""
+    counters = pool_stats.counters
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        counters["connects"] += 1
+
+    @event.listens_for(engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        counters["checkouts"] += 1
+        counters["checked_out"] += 1
+        counters["peak_checked_out"] = max(counters["peak_checked_out"], counters["checked_out"])
+
+    @event.listens_for(engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        counters["checkins"] += 1
+        # Checkin also fires for connections discarded during checkout (e.g.
+        # a failed pre-ping), so never let the gauge go negative.
+        counters["checked_out"] = max(counters["checked_out"] - 1, 0)
+
+    @event.listens_for(engine, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        counters["invalidations"] += 1
+
+def db_pool_stats(engine: Engine) -> Dict[str, Any]:
+    """Event counters plus the pool's own view of its current state."""
+    pool = engine.pool
+    stats: Dict[str, Any] = {"pool": pool.__class__.__name__, **pool_stats.snapshot()}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            idle=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),  # negative while below pool_size
+            in_use=pool.checkedout(),
+            timeout_seconds=pool.timeout(),
+        )
+    return stats
@@ -0,0 +1,56 @@
+from typing import Any, Dict
+
+import httpx
+
+from app.core.config import settings
+
+# One pooled client per upstream host, so each host gets its own connection
+# limits and a slow OAuth endpoint cannot starve Fantasy API calls (or vice versa).
+YAHOO_API_CLIENT = "yahoo_api"      # fantasysports.yahooapis.com
+YAHOO_LOGIN_CLIENT = "yahoo_login"  # api.login.yahoo.com
+
+_clients: Dict[str, httpx.AsyncClient] = {}
+
+def build_client(**overrides: Any) -> httpx.AsyncClient:
+    """Builds an AsyncClient with the pooling and timeout settings from config."""
+    options: Dict[str, Any] = {
+        "http2": settings.YAHOO_HTTP2,
+        "timeout": httpx.Timeout(
+            settings.YAHOO_HTTP_TIMEOUT, connect=settings.YAHOO_HTTP_CONNECT_TIMEOUT
+        ),
+        "limits": httpx.Limits(
+            max_connections=settings.YAHOO_HTTP_MAX_CONNECTIONS_PER_HOST,
+            max_keepalive_connections=settings.YAHOO_HTTP_MAX_KEEPALIVE_PER_HOST,
+            keepalive_expiry=settings.YAHOO_HTTP_KEEPALIVE_EXPIRY,
+        ),
+    }
+    options.update(overrides)
+    return httpx.AsyncClient(**options)
+
+def get_client(name: str) -> httpx.AsyncClient:
+    """
+    Returns the shared client for the given upstream, creating it on first use.
+    The app lifespan opens and closes these; scripts get one lazily.
+    """
+    client = _clients.get(name)
+    if client is None or client.is_closed:
+        client = _clients[name] = build_client()
+    return client
+
+def get_yahoo_api_client() -> httpx.AsyncClient:
+    return get_client(YAHOO_API_CLIENT)
+
+def get_yahoo_login_client() -> httpx.AsyncClient:
+    return get_client(YAHOO_LOGIN_CLIENT)
+
+async def open_http_clients() -> None:
+    """Creates the shared clients up front (called from the app lifespan)."""
+    get_yahoo_api_client()
+    get_yahoo_login_client()
+
+async def close_http_clients() -> None:
+    """Closes every shared client and drops its pooled connections."""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.aclose()
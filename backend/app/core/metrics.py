@@ -0,0 +1,234 @@
+"""
+Latency histograms and error counters, rendered in the Prometheus text format.
+
+Three families are recorded: HTTP requests per route template (MetricsMiddleware),
+Yahoo calls per endpoint (yahoo_api / yahoo_service), and SQL statements per
+statement shape (instrument_queries). The outbound request scheduler adds its
+queue depth, queue wait and throttling. Recording is a bucket lookup and a few
+increments, cheap enough to stay on in production. The numbers are per worker
+process; Prometheus sums them across workers.
+"""
+import re
+import time
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Upper bounds (seconds) of the latency histogram buckets.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Label sets per metric beyond which new ones are folded into "other", so an
+# unexpected source of label values cannot grow memory or the scrape unbounded.
+MAX_SERIES = 500
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series: Dict[Tuple[str, ...], list] = {}
+        _metrics.append(self)
+
+    def _new_series(self) -> list:
+        raise NotImplementedError
+
+    def _get(self, labels: Tuple[str, ...]) -> list:
+        series = self._series.get(labels)
+        if series is None:
+            if len(self._series) >= MAX_SERIES:
+                labels = ("other",) * len(self.labelnames)
+                series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = self._new_series()
+        return series
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_series(self) -> list:
+        return [0.0]
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._get(labels)[0] += amount
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for labels, (value,) in sorted(self._series.items()):
+            lines.append(f"{self.name}_total{_format_labels(self.labelnames, labels)} {value:g}")
+        return lines
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_series(self) -> list:
+        return [0.0]
+
+    def set(self, value: float, *labels: str) -> None:
+        self._get(labels)[0] = value
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for labels, (value,) in sorted(self._series.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value:g}")
+        return lines
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def _new_series(self) -> list:
+        # Per-bucket counts (the last one is +Inf), then the sum.
+        return [0] * (len(self.buckets) + 1) + [0.0]
+
+    def observe(self, seconds: float, *labels: str) -> None:
+        series = self._get(labels)
+        series[bisect_left(self.buckets, seconds)] += 1
+        series[-1] += seconds
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        bounds = [f"{bound:g}" for bound in self.buckets] + ["+Inf"]
+        for labels, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, series):
+                cumulative += count
+                bucket_labels = _format_labels(self.labelnames, labels, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {series[-1]:g}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+_metrics: List[_Metric] = []
+
+def render_metrics() -> str:
+    """Every metric in the Prometheus text exposition format (version 0.0.4)."""
+    return "\n".join(line for metric in _metrics for line in metric.render()) + "\n"
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "Time to serve HTTP requests, by route template.", ("method", "route"),
+)
+http_requests = Counter(
+    "http_requests", "HTTP responses by route template and status code.", ("method", "route", "status"),
+)
+yahoo_request_duration = Histogram(
+    "yahoo_request_duration_seconds", "Time for Yahoo calls (request, download and parse), by endpoint.", ("endpoint",),
+)
+yahoo_request_errors = Counter(
+    "yahoo_request_errors", "Failed Yahoo calls by endpoint and reason.", ("endpoint", "reason"),
+)
+db_query_duration = Histogram(
+    "db_query_duration_seconds", "SQL statement execution time, by statement shape.", ("statement",),
+)
+db_query_errors = Counter(
+    "db_query_errors", "Failed SQL statements by statement shape.", ("statement",),
+)
+outbound_queue_wait = Histogram(
+    "outbound_queue_wait_seconds", "Time outbound requests waited for the scheduler, by lane.", ("scheduler", "lane"),
+)
+outbound_queue_depth = Gauge(
+    "outbound_queue_depth", "Outbound requests waiting for the scheduler, by lane.", ("scheduler", "lane"),
+)
+outbound_throttled = Counter(
+    "outbound_throttled", "Throttled responses from upstream, by the limit that was hit.", ("scheduler", "scope"),
+)
+
+def route_template(scope) -> str:
+    """The path template of the route that handled the request, read from the (shared) scope."""
+    # FastAPI versions that resolve included routers lazily store the route
+    # relative to its router and keep the full path on the effective route.
+    route = scope.get("fastapi", {}).get("effective_route_context") or scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording each HTTP request's latency and status against
+    the route template it matched (e.g. /api/v1/leagues/{league_id}), never
+    the raw path, so label values stay bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = route_template(scope)
+            http_request_duration.observe(time.perf_counter() - started, scope["method"], route)
+            http_requests.inc(scope["method"], route, str(status))
+
+# Longest statement shape kept as a label value.
+MAX_SHAPE_LENGTH = 300
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_CAST = re.compile(r"::\w+(?:\[\])?")
+_PLACEHOLDER = re.compile(r"\$\d+|%\(\w+\)s|\b\d+\b")
+_VALUE_LIST = re.compile(r"\(\?(?:, \?)*\)")
+_REPEATED_LISTS = re.compile(r"\(\.\.\.\)(?:, \(\.\.\.\))+")
+_WHITESPACE = re.compile(r"\s+")
+_shapes: Dict[str, str] = {}
+
+def statement_shape(statement: str) -> str:
+    """
+    SQL with parameters, literals, expanded IN lists and multi-row VALUES
+    collapsed, so every execution of the same query shares one label value.
+    """
+    shape = _shapes.get(statement)
+    if shape is None:
+        shape = _WHITESPACE.sub(" ", statement).strip()
+        shape = _PLACEHOLDER.sub("?", _CAST.sub("", _STRING_LITERAL.sub("?", shape)))
+        shape = _VALUE_LIST.sub("(...)", shape)
+        shape = _REPEATED_LISTS.sub("(...), ...", shape)[:MAX_SHAPE_LENGTH]
+        if len(_shapes) >= 4 * MAX_SERIES:
+            _shapes.clear()
+        _shapes[statement] = shape
+    return shape
+
+def instrument_queries(engine: Engine) -> None:
+    """Records the execution time and failures of every statement run on the engine."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        db_query_duration.observe(time.perf_counter() - context._metrics_started, statement_shape(statement))
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        if exception_context.statement:
+            db_query_errors.inc(statement_shape(exception_context.statement))
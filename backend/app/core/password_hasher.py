@@ -0,0 +1,107 @@
+"""
+Password hashing off the event loop.
+
+bcrypt is deliberately slow (100 ms or more per call at the default cost), so
+hashes and verifications run on a dedicated, fixed-size thread pool. bcrypt
+releases the GIL while it works, so the workers run in parallel, and a login
+burst cannot exhaust AnyIO's shared threadpool that other sync work relies on.
+Admission control caps how many calls may be running or queued at once; past
+that, callers get PasswordHasherBusy straight away instead of queueing for
+seconds behind the burst.
+"""
+import asyncio
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.core import security
+from app.core.config import settings
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing queue is full; the request should be retried later."""
+
+class PasswordHasher:
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.counters: Dict[str, int] = {
+            "submitted": 0, "completed": 0, "rejected": 0, "pending": 0, "peak_pending": 0,
+        }
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+        self.run_total = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="password-hasher")
+        return self._executor
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        counters = self.counters
+        if counters["pending"] >= self.max_pending:
+            counters["rejected"] += 1
+            raise PasswordHasherBusy()
+        counters["submitted"] += 1
+        counters["pending"] += 1
+        counters["peak_pending"] = max(counters["peak_pending"], counters["pending"])
+
+        loop = asyncio.get_running_loop()
+        submitted = time.perf_counter()
+
+        def timed():
+            started = time.perf_counter()
+            result = fn(*args)
+            return result, started - submitted, time.perf_counter() - started
+
+        def finished(future: Future):
+            # Runs in the worker thread (or in shutdown's, for work it cancels).
+            # The bookkeeping is handed to the loop, so counters and totals are
+            # only ever touched there. A cancelled caller does not stop the
+            # hash, so the slot is only released once the work is really done.
+            try:
+                loop.call_soon_threadsafe(self._finish, future)
+            except RuntimeError:
+                pass  # The loop has closed; nobody is left to read the stats.
+
+        future = self._get_executor().submit(timed)
+        future.add_done_callback(finished)
+        result, _, _ = await asyncio.wrap_future(future)
+        return result
+
+    def _finish(self, future: Future) -> None:
+        self.counters["pending"] -= 1
+        if future.cancelled():
+            return  # Dropped from the queue by shutdown(); it never ran.
+        self.counters["completed"] += 1
+        if future.exception() is None:
+            _, waited, ran = future.result()
+            self.queue_wait_total += waited
+            self.queue_wait_max = max(self.queue_wait_max, waited)
+            self.run_total += ran
+
+    async def hash(self, password: str) -> str:
+        return await self.run(security.get_password_hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Checks a password; also returns a new hash when the stored one uses an outdated cost."""
+        return await self.run(security.verify_and_update_password, password, hashed_password)
+
+    def stats(self) -> Dict[str, Any]:
+        completed = self.counters["completed"]
+        return {
+            **self.counters,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "queue_depth": max(self.counters["pending"] - self.workers, 0),
+            "queue_wait_ms_avg": round(self.queue_wait_total / completed * 1000, 3) if completed else 0.0,
+            "queue_wait_ms_max": round(self.queue_wait_max * 1000, 3),
+            "hash_ms_avg": round(self.run_total / completed * 1000, 3) if completed else 0.0,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+password_hasher = PasswordHasher(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_PENDING)
@@ -0,0 +1,194 @@
+"""
+Sampling profiler for the event loop thread.
+
+A StackSampler thread records the target thread's Python stack at a fixed
+interval via sys._current_frames() and counts identical stacks. Output is
+in the collapsed-stack format ("outer;inner;leaf count" per line). Brendan
+Gregg's flamegraph.pl, speedscope and most flame graph viewers read it.
+
+Two entry points use it:
+
+- ProfilingMiddleware profiles a single live request. It runs when the
+  request carries `X-Profile: 1` and a valid X-Internal-Token, and answers
+  with the collapsed stacks instead of the normal response.
+- ContinuousProfiler samples at a low rate for the life of the process and
+  writes the aggregated stacks to PROFILER_DIR every flush interval.
+
+All async code in this app runs on the event loop thread, so that is the
+thread sampled. Anything else the loop runs meanwhile, such as other
+requests or background tasks, is sampled too. Time spent waiting on I/O
+shows up under the event loop's select call.
+"""
+import logging
+import os
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_STDLIB_DIR = os.path.dirname(os.__file__)
+_frame_names: Dict[object, str] = {}
+
+def _frame_name(code) -> str:
+    """function (path:first line), with the path relative to its package root or the stdlib."""
+    name = _frame_names.get(code)
+    if name is None:
+        path = code.co_filename
+        if "site-packages" + os.sep in path:
+            path = path.split("site-packages" + os.sep, 1)[1]
+        elif path.startswith(_BACKEND_DIR):
+            path = os.path.relpath(path, _BACKEND_DIR)
+        elif path.startswith(_STDLIB_DIR):
+            path = os.path.relpath(path, _STDLIB_DIR)
+        name = _frame_names[code] = f"{code.co_name} ({path}:{code.co_firstlineno})"
+    return name
+
+class StackSampler:
+    """Samples one thread's stack every `interval` seconds from a background thread."""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def sample(self) -> None:
+        frame = sys._current_frames().get(self.thread_id)
+        if frame is None:
+            return
+        names = []
+        while frame is not None:
+            names.append(_frame_name(frame.f_code))
+            frame = frame.f_back
+        self.stacks[";".join(reversed(names))] += 1
+        self.samples += 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def start(self) -> "StackSampler":
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def collapsed(self) -> str:
+        """Stacks in the collapsed format, most frequent first."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+def _profile_requested(scope) -> bool:
+    if not settings.INTERNAL_API_TOKEN:
+        return False
+    headers = dict(scope["headers"])
+    token = headers.get(b"x-internal-token", b"").decode("latin-1")
+    return headers.get(b"x-profile") == b"1" and secrets.compare_digest(token, settings.INTERNAL_API_TOKEN)
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that profiles a request sent with `X-Profile: 1` and a
+    valid X-Internal-Token. The route runs normally, but its response is
+    replaced by the collapsed stacks sampled while it ran. The original
+    status is returned in X-Profiled-Status. Requests without both headers
+    pass straight through.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _profile_requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        async def discard(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        sampler = StackSampler(threading.get_ident(), settings.PROFILER_REQUEST_INTERVAL).start()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, discard)
+        finally:
+            sampler.stop()
+        elapsed = time.perf_counter() - started
+        logger.info(f"Profiled {scope['method']} {scope['path']}: {sampler.samples} samples in {elapsed * 1000:.1f} ms")
+
+        body = sampler.collapsed().encode()
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/plain; charset=utf-8"),
+                (b"content-length", str(len(body)).encode()),
+                (b"x-profiled-status", str(status).encode()),
+                (b"x-profile-samples", str(sampler.samples).encode()),
+                (b"x-profile-duration-ms", f"{elapsed * 1000:.1f}".encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+class ContinuousProfiler:
+    """
+    Samples a thread at a low rate for as long as it runs, writing the stacks
+    gathered every `flush_interval` seconds to
+    <directory>/stacks-<pid>-<timestamp>.txt (collapsed format).
+    """
+
+    def __init__(self, directory: str, interval: float, flush_interval: float):
+        self.directory = directory
+        self.interval = interval
+        self.flush_interval = flush_interval
+        self._sampler: Optional[StackSampler] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _flush(self) -> None:
+        stacks, self._sampler.stacks = self._sampler.stacks, Counter()
+        if not stacks:
+            return
+        path = os.path.join(self.directory, f"stacks-{os.getpid()}-{time.strftime('%Y%m%dT%H%M%S')}.txt")
+        with open(path, "w") as f:
+            f.writelines(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+    def _run(self) -> None:
+        next_flush = time.monotonic() + self.flush_interval
+        while not self._stop.wait(self.interval):
+            self._sampler.sample()
+            if time.monotonic() >= next_flush:
+                self._flush()
+                next_flush += self.flush_interval
+        self._flush()
+
+    def start(self, thread_id: int) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        self._sampler = StackSampler(thread_id, self.interval)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="continuous-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops sampling and writes out what was gathered since the last flush."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+continuous_profiler = ContinuousProfiler(
+    settings.PROFILER_DIR, settings.PROFILER_INTERVAL, settings.PROFILER_FLUSH_INTERVAL
+)
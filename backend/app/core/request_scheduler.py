@@ -0,0 +1,224 @@
+"""
+Rate-limited scheduling of outbound requests.
+
+A RequestScheduler admits requests to an upstream under three limits: a cap
+on requests in flight, a token bucket for the whole app (e.g. per client ID),
+and a token bucket per user. Waiting requests queue in priority lanes. Ready
+interactive requests (page loads) always go before background ones (cache
+refreshes, syncs, renewals). Within a lane, a request whose user is out of
+tokens does not hold up requests for other users.
+
+When the upstream answers with a throttling response, the caller reports it
+with `throttled()`. That blocks the bucket that was hit for a jittered,
+exponentially growing delay, so every queued request backs off with it, and
+the caller retries by queueing again.
+
+The lane comes from a context variable, so it follows a call into the tasks
+it spawns. Code doing background work wraps it in `background_lane()`. The
+limits are per worker process.
+"""
+import asyncio
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Any, Deque, Dict, Iterator, Optional, Tuple
+
+from app.core.metrics import outbound_queue_depth, outbound_queue_wait, outbound_throttled
+
+# Idle per-user buckets beyond which full ones are dropped.
+MAX_USER_BUCKETS = 10_000
+
+class Lane(IntEnum):
+    """Priority lanes, highest priority first."""
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+_lane: ContextVar[Lane] = ContextVar("request_lane", default=Lane.INTERACTIVE)
+
+@contextmanager
+def background_lane() -> Iterator[None]:
+    """Runs outbound requests made inside the block (and tasks it spawns) in the background lane."""
+    token = _lane.set(Lane.BACKGROUND)
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+def backoff_delay(attempt: int, base: float, cap: float, retry_after: Optional[float] = None) -> float:
+    """
+    Exponential backoff with jitter: between half and all of base * 2**attempt
+    (capped), and never less than the upstream's Retry-After.
+    """
+    ceiling = min(cap, base * 2 ** attempt)
+    return max(ceiling / 2 + random.uniform(0, ceiling / 2), retry_after or 0.0)
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until a token can be taken (0 if one can be now)."""
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        self.tokens -= 1
+
+    def block(self, seconds: float) -> None:
+        """Refuses tokens for `seconds`, then refills from empty."""
+        now = time.monotonic()
+        self.blocked_until = max(self.blocked_until, now + seconds)
+        self.tokens = 0.0
+        self.updated = self.blocked_until
+
+    def idle(self, now: float) -> bool:
+        if now < self.blocked_until:
+            return False
+        self._refill(now)
+        return self.tokens >= self.burst
+
+class RequestScheduler:
+    def __init__(
+        self, name: str, max_concurrent: int,
+        app_rate: float, app_burst: float, user_rate: float, user_burst: float,
+    ):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self._app_bucket = TokenBucket(app_rate, app_burst)
+        self._user_buckets: Dict[str, TokenBucket] = {}
+        self._lanes: Dict[Lane, Deque[Tuple[asyncio.Future, str]]] = {lane: deque() for lane in Lane}
+        self._in_flight = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.counters: Dict[str, int] = {"granted": 0, "throttled_app": 0, "throttled_user": 0}
+        self._waits: Dict[Lane, list] = {lane: [0, 0.0, 0.0] for lane in Lane}  # count, total, max
+
+    def _user_bucket(self, user_key: str) -> TokenBucket:
+        bucket = self._user_buckets.get(user_key)
+        if bucket is None:
+            if len(self._user_buckets) >= MAX_USER_BUCKETS:
+                now = time.monotonic()
+                for key in [key for key, b in self._user_buckets.items() if b.idle(now)]:
+                    del self._user_buckets[key]
+            bucket = self._user_buckets[user_key] = TokenBucket(self.user_rate, self.user_burst)
+        return bucket
+
+    def _record_depth(self, lane: Lane) -> None:
+        outbound_queue_depth.set(len(self._lanes[lane]), self.name, lane.name.lower())
+
+    def _dispatch(self) -> None:
+        """Grants slots to ready waiters in lane order; re-runs itself when the next token is due."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        now = time.monotonic()
+        retry_in: Optional[float] = None
+        for lane in Lane:
+            queue = self._lanes[lane]
+            if any(waiter.done() for waiter, _ in queue):
+                # Drop waiters cancelled before their task could dequeue them.
+                queue = self._lanes[lane] = deque(entry for entry in queue if not entry[0].done())
+            while queue and self._in_flight < self.max_concurrent:
+                app_wait = self._app_bucket.wait_time(now)
+                if app_wait > 0:
+                    retry_in = app_wait
+                    break
+                ready = None
+                for index, (waiter, user_key) in enumerate(queue):
+                    user_wait = self._user_bucket(user_key).wait_time(now)
+                    if user_wait == 0:
+                        ready = index
+                        break
+                    retry_in = user_wait if retry_in is None else min(retry_in, user_wait)
+                if ready is None:
+                    break
+                waiter, user_key = queue[ready]
+                del queue[ready]
+                self._app_bucket.take()
+                self._user_bucket(user_key).take()
+                self._in_flight += 1
+                self.counters["granted"] += 1
+                waiter.set_result(None)
+            self._record_depth(lane)
+        if retry_in is not None and any(self._lanes.values()):
+            self._timer = asyncio.get_running_loop().call_later(retry_in, self._dispatch)
+
+    def _release(self) -> None:
+        self._in_flight -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, user_key: str):
+        """Waits until the request may go out under every limit, and holds its slot for the block."""
+        lane = _lane.get()
+        waiter = asyncio.get_running_loop().create_future()
+        entry = (waiter, user_key)
+        queued = time.perf_counter()
+        self._lanes[lane].append(entry)
+        self._dispatch()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release()  # Granted just as the caller gave up.
+            elif entry in self._lanes[lane]:  # Unless _dispatch already dropped it.
+                self._lanes[lane].remove(entry)
+                self._record_depth(lane)
+            raise
+        waited = time.perf_counter() - queued
+        wait = self._waits[lane]
+        wait[0] += 1
+        wait[1] += waited
+        wait[2] = max(wait[2], waited)
+        outbound_queue_wait.observe(waited, self.name, lane.name.lower())
+        try:
+            yield
+        finally:
+            self._release()
+
+    def throttled(self, user_key: str, delay: float, app_wide: bool) -> None:
+        """Backs off after a throttling response: the app's bucket or the user's is blocked for `delay`."""
+        scope = "app" if app_wide else "user"
+        bucket = self._app_bucket if app_wide else self._user_bucket(user_key)
+        bucket.block(delay)
+        self.counters[f"throttled_{scope}"] += 1
+        outbound_throttled.inc(self.name, scope)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "in_flight": self._in_flight,
+            "lanes": {
+                lane.name.lower(): {
+                    "queued": len(self._lanes[lane]),
+                    "waits": count,
+                    "avg_wait_ms": round(total / count * 1000, 2) if count else 0.0,
+                    "max_wait_ms": round(longest * 1000, 2),
+                }
+                for lane, (count, total, longest) in self._waits.items()
+            },
+            "user_buckets": len(self._user_buckets),
+        }
+
+_schedulers: Dict[str, RequestScheduler] = {}
+
+def create_scheduler(name: str, **limits: Any) -> RequestScheduler:
+    scheduler = _schedulers[name] = RequestScheduler(name, **limits)
+    return scheduler
+
+def scheduler_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: scheduler.stats() for name, scheduler in _schedulers.items()}
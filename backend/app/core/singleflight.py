@@ -0,0 +1,56 @@
+"""
+Request coalescing ("single flight") for async calls.
+
+While a call for a key is in flight, further callers with the same key wait on
+that call instead of starting their own, and every caller receives the same
+result object (treat it as read-only). The shared call runs in its own task,
+so one caller being cancelled does not fail the others; it is only cancelled
+once every caller has gone away.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, Tuple[asyncio.Task, list]] = {}
+        self.counters: Dict[str, int] = {"calls": 0, "coalesced": 0, "in_flight": 0}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.counters["calls"] += 1
+        call = self._calls.get(key)
+        if call is None:
+            task = asyncio.ensure_future(fn())
+            call = self._calls[key] = (task, [0])
+            task.add_done_callback(lambda t, key=key: self._finish(key, t))
+            self.counters["in_flight"] = len(self._calls)
+        else:
+            self.counters["coalesced"] += 1
+
+        task, waiters = call
+        waiters[0] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if waiters[0] == 1 and not task.done():
+                task.cancel()
+            raise
+        finally:
+            waiters[0] -= 1
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key, (None,))[0] is task:
+            del self._calls[key]
+        self.counters["in_flight"] = len(self._calls)
+        # Mark the exception as retrieved even if every waiter was cancelled.
+        if not task.cancelled():
+            task.exception()
+
+_groups: Dict[str, SingleFlight] = {}
+
+def create_group(name: str) -> SingleFlight:
+    group = _groups[name] = SingleFlight(name)
+    return group
+
+def singleflight_stats() -> Dict[str, Dict[str, int]]:
+    return {name: dict(group.counters) for name, group in _groups.items()}
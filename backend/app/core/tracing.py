@@ -0,0 +1,262 @@
+"""
+Per-request tracing.
+
+TracingMiddleware starts a trace for each HTTP request, keyed by a request ID
+(the caller's X-Request-ID when it sends a usable one, a fresh one
+otherwise). Code records spans with `span(...)` blocks, or `add_span` for time
+gathered in pieces. A span lands in the trace of the request it runs under,
+because the trace is held in a context variable; outside a request, spans are
+no-ops. When the response starts, the spans so far are summed by name into a
+Server-Timing header. Browser devtools show that breakdown. Once the request
+ends, the whole trace goes to the configured exporter.
+
+Spans started in tasks spawned by the request (asyncio.gather, request
+coalescing) land in the same trace, so Server-Timing totals for concurrent
+spans can exceed the request's wall time.
+"""
+import json
+import queue
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.metrics import route_template, statement_shape
+
+# Request IDs accepted from callers; anything else is replaced.
+_REQUEST_ID = re.compile(r"[A-Za-z0-9._-]{1,64}")
+
+class Trace:
+    def __init__(self, request_id: str, method: str, path: str):
+        self.request_id = request_id
+        self.method = method
+        self.path = path
+        self.route: Optional[str] = None
+        self.status: Optional[int] = None
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.spans: List[Dict[str, Any]] = []
+        self._next_span_id = 1
+
+    def new_span_id(self) -> int:
+        span_id = self._next_span_id
+        self._next_span_id += 1
+        return span_id
+
+    def record(
+        self, span_id: int, name: str, started: float, duration: float,
+        parent_id: Optional[int], attributes: Dict[str, Any],
+    ) -> None:
+        # Spans still open when the request finishes (e.g. a background
+        # refresh it triggered) are not recorded.
+        if self.duration is None:
+            self.spans.append({
+                "id": span_id,
+                "parent_id": parent_id,
+                "name": name,
+                "start_ms": round((started - self.started) * 1000, 3),
+                "duration_ms": round(duration * 1000, 3),
+                **({"attributes": attributes} if attributes else {}),
+            })
+
+    def server_timing(self) -> str:
+        """Span durations summed by name, as a Server-Timing header value."""
+        totals: Dict[str, List[float]] = {}
+        for recorded in self.spans:
+            total = totals.setdefault(recorded["name"], [0.0, 0])
+            total[0] += recorded["duration_ms"]
+            total[1] += 1
+        entries = [
+            f'{name};dur={duration:.1f}' + (f';desc="{count} calls"' if count > 1 else "")
+            for name, (duration, count) in totals.items()
+        ]
+        entries.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(entries)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "request_id": self.request_id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status": self.status,
+            "started_at": self.started_at,
+            "duration_ms": round((self.duration or 0.0) * 1000, 3),
+            "spans": self.spans,
+        }
+
+_trace: ContextVar[Optional[Trace]] = ContextVar("trace", default=None)
+_parent_span: ContextVar[Optional[int]] = ContextVar("parent_span", default=None)
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Dict[str, Any]]:
+    """
+    Times the block as a span of the current request's trace. Yields the
+    span's attributes, which the block may add to (e.g. a response status).
+    """
+    trace = _trace.get()
+    if trace is None:
+        yield attributes
+        return
+    span_id = trace.new_span_id()
+    parent_id = _parent_span.get()
+    token = _parent_span.set(span_id)
+    started = time.perf_counter()
+    try:
+        yield attributes
+    except BaseException as e:
+        attributes["error"] = type(e).__name__
+        raise
+    finally:
+        _parent_span.reset(token)
+        trace.record(span_id, name, started, time.perf_counter() - started, parent_id, attributes)
+
+def add_span(name: str, duration: float, **attributes: Any) -> None:
+    """Records a span whose time was measured elsewhere, ending now."""
+    trace = _trace.get()
+    if trace is not None:
+        trace.record(trace.new_span_id(), name, time.perf_counter() - duration, duration, _parent_span.get(), attributes)
+
+class SpanExporter:
+    """Receives each finished trace. Subclass and pass to set_exporter to plug in another backend."""
+
+    def export(self, trace: Trace) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Called at shutdown; flushes anything still buffered."""
+
+class InMemoryExporter(SpanExporter):
+    """Keeps the most recent traces (served by /api/v1/internal/traces)."""
+
+    def __init__(self, max_traces: int):
+        self.traces: Deque[Dict[str, Any]] = deque(maxlen=max_traces)
+
+    def export(self, trace: Trace) -> None:
+        self.traces.append(trace.to_dict())
+
+    def find(self, request_id: str) -> Optional[Dict[str, Any]]:
+        return next((t for t in reversed(self.traces) if t["request_id"] == request_id), None)
+
+class JsonLinesExporter(InMemoryExporter):
+    """
+    Also appends every trace to a JSON Lines file, for local inspection. The
+    file is written by a background thread, started on the first export, so
+    requests never wait on disk; traces queued meanwhile go out in one write.
+    """
+
+    def __init__(self, path: str, max_traces: int):
+        super().__init__(max_traces)
+        self.path = path
+        self._pending: "queue.SimpleQueue[Optional[Dict[str, Any]]]" = queue.SimpleQueue()
+        self._writer: Optional[threading.Thread] = None
+
+    def export(self, trace: Trace) -> None:
+        super().export(trace)
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._write, name="trace-writer", daemon=True)
+            self._writer.start()
+        self._pending.put(self.traces[-1])
+
+    def _write(self) -> None:
+        while True:
+            batch = [self._pending.get()]
+            while True:
+                try:
+                    batch.append(self._pending.get_nowait())
+                except queue.Empty:
+                    break
+            with open(self.path, "a") as f:
+                f.writelines(json.dumps(t) + "\n" for t in batch if t is not None)
+            if None in batch:
+                return
+
+    def close(self) -> None:
+        """Writes out the traces still queued and stops the writer thread."""
+        if self._writer is not None:
+            self._pending.put(None)
+            self._writer.join()
+            self._writer = None
+
+def _build_exporter() -> Optional[SpanExporter]:
+    if settings.TRACE_EXPORTER == "memory":
+        return InMemoryExporter(settings.TRACE_BUFFER_SIZE)
+    if settings.TRACE_EXPORTER == "file":
+        return JsonLinesExporter(settings.TRACE_FILE, settings.TRACE_BUFFER_SIZE)
+    if settings.TRACE_EXPORTER == "none":
+        return None
+    raise ValueError(f"Unknown TRACE_EXPORTER {settings.TRACE_EXPORTER!r}; expected memory, file or none.")
+
+exporter: Optional[SpanExporter] = _build_exporter()
+
+def set_exporter(new_exporter: Optional[SpanExporter]) -> None:
+    global exporter
+    exporter = new_exporter
+
+class TracingMiddleware:
+    """
+    ASGI middleware that runs each HTTP request under its own trace and adds
+    X-Request-ID and Server-Timing headers to the response.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")
+                break
+        if not request_id or not _REQUEST_ID.fullmatch(request_id):
+            request_id = uuid.uuid4().hex
+        trace = Trace(request_id, scope["method"], scope["path"])
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                trace.status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-request-id", request_id.encode()),
+                    (b"server-timing", trace.server_timing().encode()),
+                ]
+            await send(message)
+
+        token = _trace.set(trace)
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _trace.reset(token)
+            trace.route = route_template(scope)
+            trace.duration = time.perf_counter() - trace.started
+            if exporter is not None:
+                exporter.export(trace)
+
+def trace_queries(engine: Engine) -> None:
+    """Records every statement run on the engine as a "db" span of the current request."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._trace_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        trace = _trace.get()
+        if trace is not None:
+            started = context._trace_started
+            trace.record(
+                trace.new_span_id(), "db", started, time.perf_counter() - started,
+                _parent_span.get(), {"statement": statement_shape(statement)},
+            )
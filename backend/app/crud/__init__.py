@@ -0,0 +1 @@
+from . import crud_user, crud_yahoo_token
@@ -1,20 +1,59 @@
 from typing import Optional
-from sqlalchemy.orm import Session
-from app.core.security import get_password_hash
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import create_cache
+from app.core.config import settings
+from app.core.password_hasher import password_hasher
 from app.models.user import User
-from app.schemas.user import UserCreate
+from app.schemas.user import UserCreate, UserPrincipal, UserUpdate
 
-def get_user_by_email(db: Session, *, email: str) -> Optional[User]:
-    return db.query(User).filter(User.email == email).first()
+# Principals of recently authenticated users, keyed by email (the token
+# subject). No stale window: a deactivated user must not be served stale.
+principal_cache = create_cache("users", settings.USER_CACHE_TTL, 0)
 
-def create_user(db: Session, *, user_in: UserCreate) -> User:
-    hashed_password = get_password_hash(user_in.password)
+async def get_user_by_email(db: AsyncSession, *, email: str) -> Optional[User]:
+    result = await db.execute(select(User).where(User.email == email))
+    return result.scalars().first()
+
+async def get_principal_by_email(db: AsyncSession, *, email: str) -> Optional[UserPrincipal]:
+    """The user for a token subject, from the principal cache when possible."""
+    principal = await principal_cache.get(email)
+    if principal is None:
+        user = await get_user_by_email(db, email=email)
+        if user is None:
+            return None
+        principal = UserPrincipal.model_validate(user)
+        await principal_cache.set(email, principal)
+    return principal
+
+async def create_user(db: AsyncSession, *, user_in: UserCreate) -> User:
+    hashed_password = await password_hasher.hash(user_in.password)
     db_user = User(
         email=user_in.email,
         full_name=user_in.full_name,
         hashed_password=hashed_password,
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    return db_user
\ No newline at end of file
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
+
+async def update_user(db: AsyncSession, *, db_user: User, user_in: UserUpdate) -> User:
+    old_email = db_user.email
+    fields = user_in.model_dump(exclude_unset=True)
+    password = fields.pop("password", None)
+    if password is not None:
+        db_user.hashed_password = await password_hasher.hash(password)
+    for field, value in fields.items():
+        setattr(db_user, field, value)
+    await db.commit()
+    await db.refresh(db_user)
+    await principal_cache.invalidate(old_email)
+    await principal_cache.invalidate(db_user.email)
+    return db_user
+
+async def set_user_active(db: AsyncSession, *, db_user: User, is_active: bool) -> User:
+    db_user.is_active = is_active
+    await db.commit()
+    await principal_cache.invalidate(db_user.email)
+    return db_user
@@ -1,15 +1,33 @@
-from typing import Optional
-from sqlalchemy.orm import Session
+from typing import List, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.yahoo_token import YahooToken
 from app.schemas.yahoo_token import YahooTokenCreate
 
-def get_by_user_id(db: Session, *, user_id: int) -> Optional[YahooToken]:
-    return db.query(YahooToken).filter(YahooToken.user_id == user_id).first()
+async def get_by_user_id(db: AsyncSession, *, user_id: int) -> Optional[YahooToken]:
+    result = await db.execute(select(YahooToken).where(YahooToken.user_id == user_id))
+    return result.scalars().first()
 
-def create_or_update(
-    db: Session, *, obj_in: YahooTokenCreate, user_id: int
+async def get_by_user_id_for_update(db: AsyncSession, *, user_id: int) -> Optional[YahooToken]:
+    """Reads the token row and locks it until the transaction ends."""
+    result = await db.execute(
+        select(YahooToken)
+        .where(YahooToken.user_id == user_id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    return result.scalars().first()
+
+async def get_expiring(db: AsyncSession, *, before: int, user_ids: List[int]) -> List[YahooToken]:
+    result = await db.execute(
+        select(YahooToken).where(YahooToken.expires_at < before, YahooToken.user_id.in_(user_ids))
+    )
+    return list(result.scalars().all())
+
+async def create_or_update(
+    db: AsyncSession, *, obj_in: YahooTokenCreate, user_id: int
 ) -> YahooToken:
-    db_obj = get_by_user_id(db, user_id=user_id)
+    db_obj = await get_by_user_id(db, user_id=user_id)
     update_data = obj_in.model_dump(exclude_unset=True)
     if db_obj:
         for field, value in update_data.items():
@@ -18,6 +36,6 @@ def create_or_update(
         db_obj = YahooToken(**update_data, user_id=user_id)
         db.add(db_obj)
 
-    db.commit()
-    db.refresh(db_obj)
-    return db_obj
\ No newline at end of file
+    await db.commit()
+    await db.refresh(db_obj)
+    return db_obj
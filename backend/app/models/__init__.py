@@ -0,0 +1,5 @@
+from .user import User
+from .yahoo_token import YahooToken
+from .league import League, ScoringType, league_members
+from .team import Team, roster_association
+from .player import Player, PlayerValue, PlayerValueLatest, PlayerValuePartition, PlayerValueWeekly, PlayerSourceMapping, Position
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Enum as SQLAlchemyEnum
+from sqlalchemy import Column, DateTime, Integer, String, ForeignKey, Table, Enum as SQLAlchemyEnum
 from sqlalchemy.orm import relationship
 from ..core.db import Base
 import enum
@@ -8,6 +8,14 @@ class ScoringType(enum.Enum):
     HALF_PPR = "Half-PPR"
     STANDARD = "Standard"
 
+# Users who are in each league; visibility goes by this, not by owner_id.
+league_members = Table(
+    "league_members",
+    Base.metadata,
+    Column("league_id", Integer, ForeignKey("leagues.id"), primary_key=True),
+    Column("user_id", Integer, ForeignKey("users.id"), primary_key=True, index=True),
+)
+
 class League(Base):
     __tablename__ = "leagues"
 
@@ -16,8 +24,9 @@ class League(Base):
     name = Column(String, nullable=False)
     season = Column(Integer, nullable=False)
     scoring_type = Column(SQLAlchemyEnum(ScoringType), nullable=False)
+    synced_at = Column(DateTime(timezone=True), nullable=True)  # last sync from Yahoo
     
-    owner_id = Column(Integer, ForeignKey("users.id"))
+    owner_id = Column(Integer, ForeignKey("users.id"))  # the user who first synced it
     owner = relationship("User", back_populates="leagues")
     
     teams = relationship("Team", back_populates="league")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Enum as SQLAlchemyEnum, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Float, Enum as SQLAlchemyEnum, ForeignKey, Date, DateTime, Index, Sequence, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..core.db import Base
@@ -13,13 +13,17 @@ class Position(enum.Enum):
     K = "K"
     DEF = "DEF"
 
+class ScoringFormat(str, enum.Enum):
+    ONE_QB = "1QB"
+    SUPERFLEX = "Superflex"
+
 class Player(Base):
     __tablename__ = "players"
 
     id = Column(Integer, primary_key=True, index=True)
     yahoo_player_id = Column(String, unique=True, index=True)
     name = Column(String, nullable=False)
-    position = Column(SQLAlchemyEnum(Position), nullable=False)
+    position = Column(SQLAlchemyEnum(Position, quote=True), nullable=False)
     nfl_team_abbr = Column(String, nullable=True)
     
     # Fields for future data enrichment
@@ -32,19 +36,71 @@ class Player(Base):
     )
 
 class PlayerValue(Base):
+    """
+    Value history, range-partitioned by month on date_updated (which is why it
+    is part of the primary key). Partitions are created ahead of time by
+    player_value_history_service.ensure_value_partitions.
+    """
     __tablename__ = "player_values"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, Sequence("player_values_id_seq"), primary_key=True, index=True)
     player_id = Column(Integer, ForeignKey("players.id"), nullable=False, index=True)
     value = Column(Integer, nullable=False)
     format = Column(String, nullable=False) # e.g., '1QB', 'Superflex'
     source = Column(String, nullable=False, default='FantasyCalc')
-    date_updated = Column(DateTime(timezone=True), server_default=func.now())
+    date_updated = Column(DateTime(timezone=True), primary_key=True, server_default=func.now())
+
+    player = relationship("Player")
+
+    __table_args__ = (
+        # Latest-value-per-player lookups read (player_id, format) newest first;
+        # including value lets them be answered from the index alone.
+        Index(
+            "ix_player_values_player_format_date",
+            player_id, format, date_updated.desc(),
+            postgresql_include=["value"],
+        ),
+        {"postgresql_partition_by": "RANGE (date_updated)"},
+    )
+
+class PlayerValuePartition(Base):
+    """One row per monthly player_values partition; tracks retention downsampling."""
+    __tablename__ = "player_value_partitions"
+
+    name = Column(String, primary_key=True)
+    range_start = Column(Date, nullable=False)
+    range_end = Column(Date, nullable=False)
+    downsampled_at = Column(DateTime(timezone=True), nullable=True)
+
+class PlayerValueWeekly(Base):
+    """Weekly rollup of player values (last, low, high) that backs the value history API."""
+    __tablename__ = "player_value_weekly"
+
+    player_id = Column(Integer, ForeignKey("players.id"), primary_key=True)
+    format = Column(String, primary_key=True)
+    week_start = Column(Date, primary_key=True)  # Monday
+    value = Column(Integer, nullable=False)
+    low = Column(Integer, nullable=False)
+    high = Column(Integer, nullable=False)
+
+class PlayerValueLatest(Base):
+    """Latest value per (player, format), kept current by the value sync."""
+    __tablename__ = "player_values_latest"
+
+    player_id = Column(Integer, ForeignKey("players.id"), primary_key=True)
+    format = Column(String, primary_key=True)
+    value = Column(Integer, nullable=False)
+    source = Column(String, nullable=False)
+    date_updated = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     player = relationship("Player")
 
 class PlayerSourceMapping(Base):
     __tablename__ = "player_source_mappings"
+    __table_args__ = (
+        # One mapping per external id per source; also the ON CONFLICT target for bulk upserts.
+        UniqueConstraint("source", "source_player_id", name="uq_player_source_mappings_source_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     player_id = Column(Integer, ForeignKey("players.id"), nullable=False, index=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Table
+from sqlalchemy import Column, Integer, String, ForeignKey, Table, UniqueConstraint
 from sqlalchemy.orm import relationship
 from ..core.db import Base
 
@@ -6,17 +6,23 @@ from ..core.db import Base
 roster_association = Table(
     "roster_association",
     Base.metadata,
-    Column("team_id", Integer, ForeignKey("teams.id")),
-    Column("player_id", Integer, ForeignKey("players.id")),
+    Column("team_id", Integer, ForeignKey("teams.id"), primary_key=True),
+    Column("player_id", Integer, ForeignKey("players.id"), primary_key=True),
 )
 
 class Team(Base):
     __tablename__ = "teams"
+    __table_args__ = (
+        UniqueConstraint("league_id", "yahoo_team_id", name="uq_teams_league_yahoo_team"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     yahoo_team_id = Column(String, nullable=False)
     name = Column(String, nullable=False)
     
+    # Digest of the Yahoo roster last written; an unchanged roster is skipped on sync.
+    roster_hash = Column(String, nullable=True)
+    
     league_id = Column(Integer, ForeignKey("leagues.id"))
     league = relationship("League", back_populates="teams")
 
@@ -20,4 +20,6 @@ class User(Base):
         back_populates="user",
         uselist=False,
         cascade="all, delete-orphan",
-    )
\ No newline at end of file
+    )
+
+    leagues = relationship("League", back_populates="owner")
\ No newline at end of file
@@ -0,0 +1 @@
+from . import league, player, trade, user, waiver, yahoo_token
@@ -0,0 +1,54 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from app.schemas.waiver import WaiverPlayer
+
+# --- Yahoo data pulled by the league sync ---
+class YahooLeagueSettings(BaseModel):
+    league_key: str
+    name: str
+    season: int
+    reception_points: float  # points per reception; decides PPR / Half-PPR / Standard
+
+class YahooTeam(BaseModel):
+    team_key: str
+    team_id: str
+    name: str
+    players: List[WaiverPlayer]  # roster players share the players collection's shape
+
+# --- API Response Schemas ---
+class LeagueSyncResult(BaseModel):
+    leagues: int = 0
+    leagues_created: int = 0
+    teams_created: int = 0
+    teams_removed: int = 0
+    rosters_changed: int = 0
+    rosters_unchanged: int = 0
+    roster_players_added: int = 0
+    roster_players_removed: int = 0
+    players_created: int = 0
+
+class RosterPlayer(BaseModel):
+    id: int
+    name: str
+    position: str
+    nfl_team_abbr: Optional[str] = None
+
+class TeamRoster(BaseModel):
+    id: int
+    yahoo_team_id: str
+    name: str
+    players: List[RosterPlayer]
+
+class LeagueSummary(BaseModel):
+    id: int
+    yahoo_league_id: str
+    name: str
+    season: int
+    scoring_type: str
+    synced_at: Optional[datetime] = None
+
+class LeagueDetail(LeagueSummary):
+    teams: List[TeamRoster]
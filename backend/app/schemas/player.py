@@ -0,0 +1,14 @@
+from datetime import date
+from pydantic import BaseModel
+from typing import List
+
+class ValuePoint(BaseModel):
+    week_start: date
+    value: int  # last value of the week
+    low: int
+    high: int
+
+class PlayerValueHistory(BaseModel):
+    player_id: int
+    format: str
+    points: List[ValuePoint]
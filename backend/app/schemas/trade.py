@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List
 
 class TradeRequest(BaseModel):
@@ -6,6 +6,9 @@ class TradeRequest(BaseModel):
     their_player_ids: List[int]
     league_format: str = "Superflex"
 
+class TradeBatchRequest(BaseModel):
+    trades: List[TradeRequest] = Field(..., max_length=1000)
+
 class PlayerTradeInfo(BaseModel):
     player_id: int
     name: str
@@ -16,6 +19,18 @@ class TradeSideAnalysis(BaseModel):
     players: List[PlayerTradeInfo]
     total_value: int
 
+class TradeSuggestion(BaseModel):
+    my_players: List[PlayerTradeInfo]
+    their_players: List[PlayerTradeInfo]
+    my_total_value: int
+    their_total_value: int
+    value_difference: int
+    percentage_difference: float
+
+class TradeSuggestions(BaseModel):
+    suggestions: List[TradeSuggestion]
+    complete: bool  # False if the search stopped at its time budget
+
 class TradeAnalysis(BaseModel):
     my_side: TradeSideAnalysis
     their_side: TradeSideAnalysis
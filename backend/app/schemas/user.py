@@ -16,6 +16,20 @@ class UserPublic(UserBase):
     is_active: bool
     model_config = ConfigDict(from_attributes=True)
 
+# Properties that may be changed on an existing user
+class UserUpdate(BaseModel):
+    email: Optional[EmailStr] = None
+    full_name: Optional[str] = None
+    password: Optional[str] = None
+
+# The authenticated user as seen by request handlers; cached between requests
+class UserPrincipal(BaseModel):
+    id: int
+    email: str
+    full_name: Optional[str] = None
+    is_active: bool
+    model_config = ConfigDict(from_attributes=True)
+
 # --- Token Schemas ---
 class Token(BaseModel):
     access_token: str
@@ -0,0 +1,95 @@
+"""
+Throughput of DB-bound request handlers under concurrent load: a sync
+Session used inside async handlers (the previous setup, which blocks the
+event loop for every query) versus the AsyncSession the API now uses.
+
+Each simulated request looks up a user by email, as the auth dependency does,
+plus a `pg_sleep(--latency)` standing in for the round trip to a remote
+database. Also reports the worst event loop stall seen by a ticker task.
+Needs DATABASE_URL pointing at a migrated PostgreSQL database.
+
+Usage: python -m app.scripts.benchmark_db_sessions --requests 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.orm import sessionmaker
+
+from app import crud
+from app.core.config import settings
+from app.core.db import SessionLocal, dispose_engine, get_engine
+from app.core.db_pool import db_pool_stats
+from app.models.user import User
+
+EMAIL = "benchmark@example.com"
+
+async def measure_loop_stall(stop: asyncio.Event) -> float:
+    """Largest delay between a 5 ms sleep and its wake-up while the load runs."""
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.005)
+        worst = max(worst, time.perf_counter() - started - 0.005)
+    return worst
+
+async def run_load(handler, total: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            await handler()
+            latencies.append(time.perf_counter() - started)
+
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(measure_loop_stall(stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    stall = await ticker
+    latencies.sort()
+    return total / elapsed, statistics.median(latencies), latencies[int(len(latencies) * 0.99) - 1], stall
+
+async def main():
+    parser = argparse.ArgumentParser(description="Sync vs async DB session throughput.")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.002, help="Simulated DB round trip (seconds).")
+    args = parser.parse_args()
+
+    sync_engine = create_engine(settings.DATABASE_URL.replace("+asyncpg", ""))
+    SyncSession = sessionmaker(bind=sync_engine)
+
+    async def sync_handler():
+        # What the sync crud functions did inside an async route.
+        with SyncSession() as db:
+            db.execute(select(User).where(User.email == EMAIL)).scalars().first()
+            db.execute(text("SELECT pg_sleep(:latency)"), {"latency": args.latency})
+
+    async def async_handler():
+        async with SessionLocal() as db:
+            await crud.crud_user.get_user_by_email(db, email=EMAIL)
+            await db.execute(text("SELECT pg_sleep(:latency)"), {"latency": args.latency})
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}, {args.latency * 1000:.1f} ms simulated DB latency")
+    for label, handler in (("sync Session", sync_handler), ("AsyncSession", async_handler)):
+        await handler()  # warm the pool
+        throughput, p50, p99, stall = await run_load(handler, args.requests, args.concurrency)
+        print(f"  {label:<13} {throughput:>8.0f} req/s  p50 {p50 * 1000:>7.2f} ms  p99 {p99 * 1000:>7.2f} ms  "
+              f"worst loop stall {stall * 1000:>7.2f} ms")
+    print(f"  async pool: {db_pool_stats(get_engine().sync_engine)}")
+
+    sync_engine.dispose()
+    await dispose_engine()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,97 @@
+"""
+Benchmarks the league sync against the local Yahoo stub.
+
+Runs a first sync of a user's leagues, a resync with nothing changed, and a
+resync after a few simulated roster moves, reporting what each one wrote.
+It then compares serving a league page (league, teams and rosters) from the
+database with fetching the same data from Yahoo at the given latency. Always
+uses a throwaway SQLite database.
+
+Usage: python -m app.scripts.benchmark_league_sync --latency 0.5 --moves 5
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+for _key in ("SECRET_KEY", "YAHOO_CLIENT_ID", "YAHOO_CLIENT_SECRET", "YAHOO_REDIRECT_URI"):
+    os.environ.setdefault(_key, "benchmark")
+# Tables are dropped and recreated, so never point this at a real database.
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.gettempdir()}/benchmark_league_sync.db"
+
+from sqlalchemy import select
+
+from app import crud
+from app.core.db import Base, SessionLocal, dispose_engine, get_engine
+from app.core.http import close_http_clients
+from app.models.league import League
+from app.schemas.user import UserCreate
+from app.schemas.yahoo_token import YahooTokenCreate
+from app.scripts.yahoo_stub_server import StubServer
+from app.services import league_sync_service, yahoo_api
+
+async def timed(coroutine):
+    started = time.perf_counter()
+    result = await coroutine
+    return result, (time.perf_counter() - started) * 1000
+
+async def run(args, stub: StubServer):
+    async with get_engine().begin() as connection:
+        await connection.run_sync(Base.metadata.drop_all)
+        await connection.run_sync(Base.metadata.create_all)
+
+    async with SessionLocal() as db:
+        user = await crud.crud_user.create_user(db, user_in=UserCreate(email="sync@example.com", password="benchmark"))
+        await crud.crud_yahoo_token.create_or_update(db, user_id=user.id, obj_in=YahooTokenCreate(
+            access_token="stub-access-token", refresh_token="stub-refresh-token",
+            token_type="bearer", expires_at=int(time.time()) + 3600,
+        ))
+
+        print(f"Yahoo stub latency {args.latency * 1000:.0f} ms\n")
+        for label, moves in (("first sync", 0), ("no changes", 0), (f"{args.moves} moves", args.moves)):
+            stub.app.roster_moves = moves
+            result, ms = await timed(league_sync_service.sync_user_leagues(db, user_id=user.id))
+            print(f"{label:<11} {ms:>8.1f} ms  rosters changed {result.rosters_changed:>3}, "
+                  f"unchanged {result.rosters_unchanged:>3}, players +{result.roster_players_added} "
+                  f"-{result.roster_players_removed}, new players {result.players_created}")
+
+        league = await db.scalar(select(League).order_by(League.id).limit(1))
+        db_times, yahoo_times = [], []
+        for _ in range(args.samples):
+            detail, ms = await timed(league_sync_service.get_league(db, league_id=league.id, user_id=user.id))
+            db_times.append(ms)
+        for _ in range(max(args.samples // 10, 3)):
+            _, ms = await timed(asyncio.gather(
+                yahoo_api.get_league_settings("stub-access-token", league.yahoo_league_id),
+                yahoo_api.get_league_rosters("stub-access-token", league.yahoo_league_id),
+            ))
+            yahoo_times.append(ms)
+        players = sum(len(team.players) for team in detail.teams)
+        print(f"\nleague page ({len(detail.teams)} teams, {players} rostered players)")
+        print(f"  from database  p50 {statistics.median(db_times):>8.2f} ms")
+        print(f"  from Yahoo     p50 {statistics.median(yahoo_times):>8.2f} ms")
+
+    await close_http_clients()
+    await dispose_engine()
+
+def main():
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    parser = argparse.ArgumentParser(description="League sync benchmark.")
+    parser.add_argument("--latency", type=float, default=0.5, help="Simulated Yahoo latency (seconds).")
+    parser.add_argument("--moves", type=int, default=5, help="Roster moves before the last resync.")
+    parser.add_argument("--samples", type=int, default=50)
+    args = parser.parse_args()
+
+    with StubServer(latency=args.latency, tls=False) as stub:
+        yahoo_api.YAHOO_API_BASE_URL = stub.base_url + "/fantasy/v2"
+        asyncio.run(run(args, stub))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Measures what the metrics and tracing instrumentation cost per request.
+
+Times the recording primitives on their own (a histogram observation, a
+counter increment, a statement shape lookup), then serves the same trivial
+route in-process without middleware, with MetricsMiddleware, and with
+TracingMiddleware as well (one span per request), and reports the
+difference per request.
+
+Usage: python -m app.scripts.benchmark_metrics --requests 5000
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+import timeit
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+import httpx
+from fastapi import APIRouter, FastAPI
+
+from app.core.metrics import Counter, Histogram, MetricsMiddleware, statement_shape
+from app.core.tracing import InMemoryExporter, TracingMiddleware, set_exporter, span
+
+STATEMENT = (
+    "SELECT players.id, players.name FROM players "
+    "WHERE players.yahoo_player_id IN ($1::VARCHAR, $2::VARCHAR, $3::VARCHAR) LIMIT $4"
+)
+
+def build_app(metrics: bool, tracing: bool) -> FastAPI:
+    router = APIRouter()
+
+    @router.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        with span("lookup", item_id=item_id):
+            return {"id": item_id}
+
+    app = FastAPI()
+    app.include_router(router, prefix="/api/v1")
+    if metrics:
+        app.add_middleware(MetricsMiddleware)
+    if tracing:
+        app.add_middleware(TracingMiddleware)
+    return app
+
+async def serve(app: FastAPI, requests: int) -> float:
+    """Mean seconds per request over `requests` sequential in-process calls."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        for _ in range(100):
+            await client.get("/api/v1/items/1")
+        started = time.perf_counter()
+        for i in range(requests):
+            (await client.get(f"/api/v1/items/{i}")).raise_for_status()
+        return (time.perf_counter() - started) / requests
+
+def per_call_ns(statement: str, namespace: dict, number: int = 200_000) -> float:
+    return min(timeit.repeat(statement, number=number, repeat=5, globals=namespace)) / number * 1e9
+
+def main():
+    parser = argparse.ArgumentParser(description="Metrics instrumentation overhead.")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    namespace = {
+        "histogram": Histogram("benchmark_seconds", "Benchmark histogram.", ("route",)),
+        "counter": Counter("benchmark", "Benchmark counter.", ("route", "status")),
+        "statement_shape": statement_shape,
+        "route": "/api/v1/items/{item_id}",
+        "status": "200",
+        "statement": STATEMENT,
+    }
+    statement_shape(STATEMENT)
+    print("recording primitives")
+    print(f"  histogram observe      {per_call_ns('histogram.observe(0.0123, route)', namespace):>8.0f} ns")
+    print(f"  counter inc            {per_call_ns('counter.inc(route, status)', namespace):>8.0f} ns")
+    print(f"  statement shape        {per_call_ns('statement_shape(statement)', namespace):>8.0f} ns (cached)")
+
+    set_exporter(InMemoryExporter(200))
+    variants = {
+        "without middleware": (False, False),
+        "with metrics": (True, False),
+        "with metrics + tracing": (True, True),
+    }
+    timings = {label: [] for label in variants}
+    for _ in range(args.rounds):
+        for label, (metrics, tracing) in variants.items():
+            timings[label].append(asyncio.run(serve(build_app(metrics, tracing), args.requests)))
+    baseline = statistics.median(timings["without middleware"]) * 1e6
+    print(f"\nin-process request ({args.requests} x {args.rounds} rounds, median)")
+    for label, samples in timings.items():
+        us = statistics.median(samples) * 1e6
+        print(f"  {label:<24} {us:>8.1f} us  ({us - baseline:+.1f} us)")
+
+if __name__ == "__main__":
+    main()
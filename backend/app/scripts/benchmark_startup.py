@@ -0,0 +1,122 @@
+"""
+Benchmarks application startup: how long `import main` takes, and how long a
+fresh uvicorn process takes to answer its first /api/health request.
+
+Each sample runs in a new interpreter, so nothing is already imported. The
+median over the runs is reported, followed by the slowest top-level imports
+from `python -X importtime`. The processes run outside the backend directory
+(so a local .env is not read) with placeholder settings; startup must not
+need a reachable database, so none is used.
+
+Usage: python -m app.scripts.benchmark_startup --runs 5
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+def child_env() -> dict:
+    env = dict(os.environ, PYTHONPATH=str(BACKEND_DIR))
+    for key in ("SECRET_KEY", "YAHOO_CLIENT_ID", "YAHOO_CLIENT_SECRET", "YAHOO_REDIRECT_URI"):
+        env.setdefault(key, "benchmark")
+    # Never connected to during startup; a session would fail loudly.
+    env["DATABASE_URL"] = "postgresql://benchmark@127.0.0.1:1/benchmark"
+    return env
+
+def import_time(env: dict) -> float:
+    code = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+    output = subprocess.run(
+        [sys.executable, "-c", code], env=env, cwd=tempfile.gettempdir(),
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return float(output.strip().splitlines()[-1]) * 1000
+
+def slowest_imports(env: dict, top: int) -> list:
+    """
+    Cumulative import time per top-level package, slowest first. A package is
+    counted wherever something outside it imports it; time it spends importing
+    other packages is included, so the figures overlap.
+    """
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"], env=env, cwd=tempfile.gettempdir(),
+        check=True, capture_output=True, text=True,
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line[len("import time:"):].split("|")
+            if cumulative.strip().isdigit():
+                depth = (len(name) - len(name.lstrip()) - 1) // 2
+                rows.append((depth, int(cumulative), name.strip().split(".")[0]))
+
+    # -X importtime lists an import after everything it imported; walking the
+    # lines backwards visits each one after its importer.
+    totals = defaultdict(int)
+    importers = []
+    for depth, cumulative, package in reversed(rows):
+        del importers[depth:]
+        if not importers or importers[-1] != package:
+            totals[package] += cumulative
+        importers.append(package)
+    totals.pop("main", None)
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)[:top]
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def first_request_time(env: dict, timeout: float) -> float:
+    port = free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        env=env, cwd=tempfile.gettempdir(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        with httpx.Client(timeout=1) as client:
+            while time.perf_counter() - started < timeout:
+                try:
+                    if client.get(f"http://127.0.0.1:{port}/api/health").status_code == 200:
+                        return (time.perf_counter() - started) * 1000
+                except httpx.TransportError:
+                    pass
+                if process.poll() is not None:
+                    raise RuntimeError(f"uvicorn exited with code {process.returncode} before serving")
+                time.sleep(0.005)
+        raise RuntimeError(f"no response from /api/health within {timeout:.0f}s")
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+def main():
+    parser = argparse.ArgumentParser(description="Application startup benchmark.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="Slowest top-level imports to list.")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Seconds to wait for the first response.")
+    args = parser.parse_args()
+
+    env = child_env()
+    imports = [import_time(env) for _ in range(args.runs)]
+    first_requests = [first_request_time(env, args.timeout) for _ in range(args.runs)]
+
+    print(f"{args.runs} runs, median (min-max)\n")
+    print(f"import main           {statistics.median(imports):>8.1f} ms  ({min(imports):.1f}-{max(imports):.1f})")
+    print(f"first /api/health     {statistics.median(first_requests):>8.1f} ms  "
+          f"({min(first_requests):.1f}-{max(first_requests):.1f})")
+    print("\nslowest imports (cumulative)")
+    for name, microseconds in slowest_imports(env, args.top):
+        print(f"  {name:<24} {microseconds / 1000:>8.1f} ms")
+
+if __name__ == "__main__":
+    main()
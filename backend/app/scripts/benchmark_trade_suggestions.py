@@ -0,0 +1,78 @@
+"""
+Latency of the trade suggestion search for two synthetic rosters, checked
+against a brute-force enumeration of every 1-for-1, 2-for-1, 1-for-2 and
+2-for-2 package.
+
+Usage: python -m app.scripts.benchmark_trade_suggestions --roster-size 16 --runs 200
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from itertools import combinations
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+for _key in ("SECRET_KEY", "YAHOO_CLIENT_ID", "YAHOO_CLIENT_SECRET", "YAHOO_REDIRECT_URI"):
+    os.environ.setdefault(_key, "benchmark")
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.schemas.trade import PlayerTradeInfo
+from app.services.trade_analyzer_service import BALANCED_BAND, percentage_difference
+from app.services.trade_suggestion_service import SHAPES, find_balanced_trades
+
+def make_roster(size: int, first_id: int, rng: random.Random):
+    # Roughly the long-tailed shape of real trade values.
+    return [
+        PlayerTradeInfo(player_id=first_id + i, name=f"Player {first_id + i}", position="WR",
+                        value=int(rng.paretovariate(1.2) * 400))
+        for i in range(size)
+    ]
+
+def brute_force(my_players, their_players, limit: int):
+    candidates = []
+    for my_size, their_size in SHAPES:
+        for mine in combinations(my_players, my_size):
+            for theirs in combinations(their_players, their_size):
+                my_total = sum(p.value for p in mine)
+                their_total = sum(p.value for p in theirs)
+                imbalance = abs(percentage_difference(my_total, their_total))
+                if imbalance <= BALANCED_BAND:
+                    candidates.append((-imbalance, my_total + their_total))
+    return sorted(candidates, reverse=True)[:limit]
+
+def main():
+    parser = argparse.ArgumentParser(description="Trade suggestion search benchmark.")
+    parser.add_argument("--roster-size", type=int, default=16)
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    latencies = []
+    mismatches = truncated = 0
+    for run in range(args.runs):
+        mine = make_roster(args.roster_size, 1, rng)
+        theirs = make_roster(args.roster_size, 1000, rng)
+        started = time.perf_counter()
+        result = find_balanced_trades(mine, theirs, limit=args.limit, time_budget=1.0)
+        latencies.append(time.perf_counter() - started)
+        truncated += not result.complete
+
+        found = [(-abs(percentage_difference(s.my_total_value, s.their_total_value)), s.my_total_value + s.their_total_value)
+                 for s in result.suggestions]
+        mismatches += found != brute_force(mine, theirs, args.limit)
+
+    latencies.sort()
+    print(f"{args.roster_size} vs {args.roster_size} players, top {args.limit}, {args.runs} runs")
+    print(f"  median {statistics.median(latencies) * 1000:.2f} ms  "
+          f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:.2f} ms  "
+          f"max {latencies[-1] * 1000:.2f} ms")
+    print(f"  {mismatches} runs differ from brute force, {truncated} hit the time budget")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Compares a fresh httpx.AsyncClient per request (the old behaviour) with the
+shared pooled client from app.core.http, against the local Yahoo stub over TLS.
+
+Usage: python -m app.scripts.benchmark_yahoo_client --requests 1000 --concurrency 20
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+# Settings are required at import time; benchmarks never talk to the real services.
+for _key in ("SECRET_KEY", "DATABASE_URL", "YAHOO_CLIENT_ID", "YAHOO_CLIENT_SECRET", "YAHOO_REDIRECT_URI"):
+    os.environ.setdefault(_key, "benchmark")
+
+import httpx
+
+from app.core.http import build_client
+from app.scripts.yahoo_stub_server import StubServer
+
+LEAGUES_PATH = "/fantasy/v2/users;use_login=1/games;game_keys=nfl/leagues"
+
+async def run_load(fetch, total: int, concurrency: int):
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            response = await fetch()
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "rps": total / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+def report(label: str, result: dict):
+    print(f"{label:<34} {result['rps']:>9.1f} req/s   p50 {result['p50_ms']:>7.2f} ms   p99 {result['p99_ms']:>7.2f} ms")
+
+async def main(total: int, concurrency: int, latency: float):
+    with StubServer(latency=latency) as stub:
+        url = stub.base_url + LEAGUES_PATH
+        print(f"Stub at {stub.base_url}; {total} requests, concurrency {concurrency}\n")
+
+        async def per_request_client():
+            async with httpx.AsyncClient(verify=False) as client:
+                return await client.get(url)
+        report("new client per request", await run_load(per_request_client, total, concurrency))
+
+        for http2 in (False, True):
+            async with build_client(verify=False, http2=http2) as client:
+                result = await run_load(lambda: client.get(url), total, concurrency)
+            report(f"shared pool ({'HTTP/2' if http2 else 'HTTP/1.1 keep-alive'})", result)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated upstream latency (s).")
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency, args.latency))
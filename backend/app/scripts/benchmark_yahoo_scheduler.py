@@ -0,0 +1,140 @@
+"""
+Benchmarks the Yahoo request scheduler against a throttling local stub.
+
+A background sync fetches many leagues' settings for a spread of users while a
+few users load pages (their leagues list) at a steady pace. The stub answers
+999 to anything beyond --yahoo-rps requests a second, as Yahoo does. Runs:
+
+- concurrency cap only: no rate limits, lanes or retries, so throttled calls
+  fail (the old behaviour),
+- scheduler: the configured limits, lanes and backoff,
+- scheduler over the limit: an app rate above Yahoo's, so throttling and
+  backoff kick in,
+
+and reports page load latency, sync time, failures and throttled responses.
+
+Usage: python -m app.scripts.benchmark_yahoo_scheduler --syncs 120 --yahoo-rps 30
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+from collections import Counter
+from contextlib import nullcontext
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+for _key in ("SECRET_KEY", "DATABASE_URL", "YAHOO_CLIENT_ID", "YAHOO_CLIENT_SECRET", "YAHOO_REDIRECT_URI"):
+    os.environ.setdefault(_key, "benchmark")
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.core.http import close_http_clients
+from app.core.request_scheduler import RequestScheduler, background_lane
+from app.scripts.yahoo_stub_server import StubServer
+from app.services import yahoo_api
+
+SYNC_USERS = 20
+UNLIMITED = 1e9
+
+async def page_loads(user: int, loads: int, interval: float, latencies: list, failures: list) -> None:
+    for _ in range(loads):
+        started = time.perf_counter()
+        try:
+            await yahoo_api.get_user_leagues(f"page-user-{user}")
+            latencies.append(time.perf_counter() - started)
+        except HTTPException as e:
+            failures.append(e.status_code)
+        await asyncio.sleep(interval)
+
+async def sync(syncs: int, lanes: bool, failures: list) -> float:
+    async def one(i: int):
+        try:
+            await yahoo_api.get_league_settings(f"sync-user-{i % SYNC_USERS}", f"449.l.{i}")
+        except HTTPException as e:
+            failures.append(e.status_code)
+
+    started = time.perf_counter()
+    with background_lane() if lanes else nullcontext():
+        await asyncio.gather(*(one(i) for i in range(syncs)))
+    return time.perf_counter() - started
+
+def failed(statuses: list) -> str:
+    return " ".join(f"{count}x{status}" for status, count in Counter(statuses).items()) or "0"
+
+async def run(label: str, stub: StubServer, args, lanes: bool) -> None:
+    stub.app.requests_throttled = 0
+    latencies, page_failures, sync_failures = [], [], []
+    sync_task = asyncio.ensure_future(sync(args.syncs, lanes, sync_failures))
+    await asyncio.sleep(0.1)  # Let the sync fill the queue first.
+    await asyncio.gather(*(
+        page_loads(user, args.loads, args.interval, latencies, page_failures) for user in range(args.users)
+    ))
+    sync_elapsed = await sync_task
+    await close_http_clients()
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0.0
+    print(f"{label}")
+    print(
+        f"  page loads  p50 {statistics.median(latencies) * 1000 if latencies else 0:>8.1f} ms"
+        f"   p95 {p95 * 1000:>8.1f} ms   failed {failed(page_failures)}"
+    )
+    print(f"  sync        {sync_elapsed:>8.2f} s   failed {failed(sync_failures)} of {args.syncs}")
+    stats = yahoo_api.scheduler.stats()
+    print(
+        f"  throttled by Yahoo {stub.app.requests_throttled}   "
+        f"backoffs app {stats['throttled_app']} / user {stats['throttled_user']}"
+    )
+    for lane, lane_stats in stats["lanes"].items():
+        print(f"  {lane:<12} avg wait {lane_stats['avg_wait_ms']:>8.1f} ms   max {lane_stats['max_wait_ms']:>8.1f} ms")
+    print()
+
+def main():
+    logging.getLogger("app.services.yahoo_api").setLevel(logging.CRITICAL)
+    parser = argparse.ArgumentParser(description="Yahoo request scheduler benchmark.")
+    parser.add_argument("--syncs", type=int, default=120, help="Leagues fetched by the background sync.")
+    parser.add_argument("--users", type=int, default=5, help="Users loading pages during the sync.")
+    parser.add_argument("--loads", type=int, default=10, help="Page loads per user.")
+    parser.add_argument("--interval", type=float, default=0.2, help="Seconds between a user's page loads.")
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated Yahoo latency (seconds).")
+    parser.add_argument("--yahoo-rps", type=int, default=30, help="Requests/second the stub allows.")
+    args = parser.parse_args()
+
+    limits = dict(
+        max_concurrent=settings.YAHOO_MAX_CONCURRENT_REQUESTS,
+        user_rate=settings.YAHOO_RATE_LIMIT_USER_RPS,
+        user_burst=settings.YAHOO_RATE_LIMIT_USER_BURST,
+    )
+    variants = [
+        ("concurrency cap only", False, 0, RequestScheduler(
+            "benchmark", max_concurrent=settings.YAHOO_MAX_CONCURRENT_REQUESTS,
+            app_rate=UNLIMITED, app_burst=UNLIMITED, user_rate=UNLIMITED, user_burst=UNLIMITED,
+        )),
+        (f"scheduler ({settings.YAHOO_RATE_LIMIT_APP_RPS:g} req/s)", True, settings.YAHOO_THROTTLE_RETRIES,
+         RequestScheduler(
+            "benchmark", app_rate=settings.YAHOO_RATE_LIMIT_APP_RPS,
+            app_burst=settings.YAHOO_RATE_LIMIT_APP_BURST, **limits,
+        )),
+        (f"scheduler over the limit ({args.yahoo_rps * 2} req/s)", True, settings.YAHOO_THROTTLE_RETRIES,
+         RequestScheduler("benchmark", app_rate=args.yahoo_rps * 2, app_burst=args.yahoo_rps * 2, **limits)),
+    ]
+    with StubServer(latency=args.latency, tls=False, throttle_rps=args.yahoo_rps) as stub:
+        yahoo_api.YAHOO_API_BASE_URL = stub.base_url + "/fantasy/v2"
+        print(
+            f"{args.syncs} league fetches for {SYNC_USERS} users alongside {args.users} users x {args.loads} "
+            f"page loads; Yahoo allows {args.yahoo_rps} req/s at {args.latency * 1000:.0f} ms\n"
+        )
+        for label, lanes, retries, scheduler in variants:
+            yahoo_api.scheduler = scheduler
+            settings.YAHOO_THROTTLE_RETRIES = retries
+            asyncio.run(run(label, stub, args, lanes))
+            time.sleep(1)  # Let the stub's window clear between runs.
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Micro-benchmark: full ElementTree + namespaced find() lookups (the previous
+parsing code) versus the incremental parser in app.services.yahoo_xml.
+
+By default it generates Yahoo-shaped players/leagues documents with the stub
+server's builders; pass --fixture FILE (repeatable) to run against recorded
+responses instead. Reports parse time and peak traced memory.
+
+Usage: python -m app.scripts.benchmark_yahoo_xml --players 25 1000 --repeat 20
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+for _key in ("SECRET_KEY", "DATABASE_URL", "YAHOO_CLIENT_ID", "YAHOO_CLIENT_SECRET", "YAHOO_REDIRECT_URI"):
+    os.environ.setdefault(_key, "benchmark")
+
+from app.schemas.waiver import WaiverPlayer
+from app.scripts.yahoo_stub_server import leagues_xml, players_xml
+from app.services import yahoo_xml
+
+NS = {'y': 'http://fantasysports.yahooapis.com/fantasy/v2/base.rng'}
+CHUNK_SIZE = 16 * 1024  # roughly what httpx hands over per read
+
+def tree_parse_players(content: bytes):
+    """The previous approach: build the whole tree, then find() every field."""
+    players = []
+    for element in ET.fromstring(content).findall('.//y:player', NS):
+        def find_text(tag):
+            found = element.find(f'y:{tag}', NS)
+            return found.text if found is not None else ''
+
+        def find_nested_text(parent_tag, child_tag):
+            parent = element.find(f'y:{parent_tag}', NS)
+            if parent is not None:
+                child = parent.find(f'y:{child_tag}', NS)
+                return child.text if child is not None else ''
+            return ''
+
+        percent_owned = find_nested_text('percent_owned', 'value')
+        players.append(WaiverPlayer(
+            player_key=find_text('player_key'),
+            player_id=find_text('player_id'),
+            full_name=find_nested_text('name', 'full'),
+            editorial_team_abbr=find_text('editorial_team_abbr'),
+            display_position=find_text('display_position'),
+            eligible_positions=[p.text for p in element.findall('.//y:eligible_positions/y:position', NS) if p.text],
+            image_url=find_nested_text('headshot', 'url'),
+            percent_owned=int(percent_owned) if percent_owned else 0,
+        ))
+    return players
+
+def stream_parse_players(content: bytes):
+    chunks = (content[i:i + CHUNK_SIZE] for i in range(0, len(content), CHUNK_SIZE))
+    return yahoo_xml.parse_all(chunks, "player", yahoo_xml.waiver_player_from_element)
+
+def measure(parse, content: bytes, repeat: int):
+    expected = len(parse(content))
+    started = time.perf_counter()
+    for _ in range(repeat):
+        parse(content)
+    per_call = (time.perf_counter() - started) / repeat
+
+    tracemalloc.start()
+    parse(content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return expected, per_call, peak
+
+def run(label: str, content: bytes, repeat: int):
+    print(f"\n{label} ({len(content) / 1024:.0f} KiB)")
+    for name, parse in (("tree + find", tree_parse_players), ("streaming", stream_parse_players)):
+        count, per_call, peak = measure(parse, content, repeat)
+        print(f"  {name:<12} {count:>5} players  {per_call * 1000:>8.2f} ms/parse  "
+              f"{count / per_call:>10.0f} players/s  peak {peak / 1024:>8.0f} KiB")
+
+def main():
+    parser = argparse.ArgumentParser(description="Yahoo XML parsing micro-benchmark.")
+    parser.add_argument("--players", type=int, nargs="+", default=[25, 1000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--fixture", action="append", default=[], help="Recorded players XML response.")
+    args = parser.parse_args()
+
+    documents = [(Path(p).name, Path(p).read_bytes()) for p in args.fixture]
+    if not documents:
+        documents = [(f"{n} generated players", players_xml("461.l.1", 0, n, n).encode()) for n in args.players]
+    for label, content in documents:
+        run(label, content, args.repeat)
+
+    leagues = leagues_xml(20).encode()
+    started = time.perf_counter()
+    for _ in range(args.repeat):
+        yahoo_xml.parse_all(leagues, "league", yahoo_xml.league_from_element)
+    print(f"\n20 leagues: {(time.perf_counter() - started) / args.repeat * 1000:.3f} ms/parse (streaming)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+EXPLAIN-based regression checks for the player value queries.
+
+Runs each query under EXPLAIN (ANALYZE, FORMAT JSON) against DATABASE_URL
+(PostgreSQL, migrated to head, ideally with synced values) and checks that it
+is served by the expected index, index-only where the index covers it. On a
+partitioned table the scans run on the partitions, using the partitions'
+copies of the index. Exits non-zero if any plan regresses.
+
+Sequential and bitmap scans are disabled for the checks: on a small dev
+database the planner would rightly prefer a seq scan, and what is being
+verified is that the index can answer the query on its own.
+
+Usage: python -m app.scripts.check_query_plans [--no-vacuum]
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from sqlalchemy import create_engine, text
+
+from app.core.config import settings
+
+CHECKS = [
+    (
+        "latest value from history",
+        """
+        SELECT value FROM player_values
+        WHERE player_id = :player_id AND format = :format
+        ORDER BY date_updated DESC LIMIT 1
+        """,
+        {"Index Only Scan"}, "player_values", "ix_player_values_player_format_date",
+    ),
+    (
+        "latest values for a trade side from history",
+        """
+        SELECT DISTINCT ON (player_id) player_id, value FROM player_values
+        WHERE player_id = ANY(:player_ids) AND format = :format
+        ORDER BY player_id, date_updated DESC
+        """,
+        {"Index Only Scan"}, "player_values", "ix_player_values_player_format_date",
+    ),
+    (
+        "trade analyzer lookup",
+        """
+        SELECT players.id, players.name, players.position, player_values_latest.value
+        FROM players JOIN player_values_latest ON players.id = player_values_latest.player_id
+        WHERE player_values_latest.player_id = ANY(:player_ids) AND player_values_latest.format = :format
+        """,
+        {"Index Scan", "Index Only Scan"}, "player_values_latest", "player_values_latest_pkey",
+    ),
+    (
+        "value history",
+        """
+        SELECT week_start, value, low, high FROM player_value_weekly
+        WHERE player_id = :player_id AND format = :format AND week_start >= current_date - 364
+        ORDER BY week_start
+        """,
+        {"Index Scan", "Index Only Scan"}, "player_value_weekly", "player_value_weekly_pkey",
+    ),
+]
+
+PARTITIONS = """
+    SELECT child.relname FROM pg_inherits
+    JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+    WHERE pg_inherits.inhparent = to_regclass(:name)
+"""
+
+def with_partitions(connection, name: str) -> set:
+    """A table or index name plus the names of its partitions' counterparts."""
+    return {name, *connection.execute(text(PARTITIONS), {"name": name}).scalars()}
+
+def walk(plan):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from walk(child)
+
+def main():
+    parser = argparse.ArgumentParser(description="Check player value query plans.")
+    parser.add_argument("--no-vacuum", action="store_true",
+                        help="Skip VACUUM ANALYZE (index-only scans then report heap fetches).")
+    args = parser.parse_args()
+
+    engine = create_engine(settings.DATABASE_URL.replace("+asyncpg", ""))
+    if not args.no_vacuum:
+        # Index-only scans rely on the visibility map, which VACUUM maintains.
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            # On a partitioned table this vacuums every partition.
+            connection.execute(text("VACUUM ANALYZE player_values"))
+            connection.execute(text("VACUUM ANALYZE player_values_latest"))
+
+    failures = 0
+    with engine.connect() as connection:
+        sample = connection.execute(text(
+            "SELECT player_id, format FROM player_values_latest ORDER BY player_id LIMIT 3"
+        )).all()
+        if not sample:
+            print("player_values_latest is empty; sync some values first.")
+            return 1
+        params = {
+            "player_id": sample[0].player_id,
+            "player_ids": [row.player_id for row in sample],
+            "format": sample[0].format,
+        }
+        connection.execute(text("SET enable_seqscan = off"))
+        connection.execute(text("SET enable_bitmapscan = off"))
+
+        for name, sql, node_types, relation, index in CHECKS:
+            explained = connection.execute(text(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}"), params).scalar()
+            plan = (explained if isinstance(explained, list) else json.loads(explained))[0]["Plan"]
+            relations = with_partitions(connection, relation)
+            indexes = with_partitions(connection, index)
+            scans = [node for node in walk(plan) if node.get("Relation Name") in relations]
+            ok = bool(scans) and all(
+                node["Node Type"] in node_types and node.get("Index Name") in indexes for node in scans
+            )
+            failures += not ok
+            for node in scans or [{"Node Type": "no scan", "Relation Name": relation}]:
+                heap_fetches = node.get("Heap Fetches")
+                print(f"{'ok  ' if ok else 'FAIL'} {name}: {node['Node Type']} on {node['Relation Name']}"
+                      f" using {node.get('Index Name')}"
+                      + (f", {heap_fetches} heap fetches" if heap_fetches is not None else ""))
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""
+Load test mixing a login burst with authenticated read traffic on a single
+uvicorn worker.
+
+Fires N concurrent logins while a set of clients keeps calling /users/me,
+first against the real login route (bcrypt on the bounded password hashing
+pool) and then against a sync `def` route shaped like the old implementation
+(bcrypt on AnyIO's shared threadpool, as many at once as it has threads).
+Reports login throughput and rejections (503) alongside read latency, which
+is what a kickoff login burst used to ruin. Always uses a throwaway SQLite
+database.
+
+Usage: python -m app.scripts.loadtest_login --logins 100 --readers 20 --workers 2
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+for _key in ("SECRET_KEY", "YAHOO_CLIENT_ID", "YAHOO_CLIENT_SECRET", "YAHOO_REDIRECT_URI"):
+    os.environ.setdefault(_key, "loadtest")
+# Tables are dropped and recreated, so never point this at a real database.
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.gettempdir()}/loadtest_login.db"
+# A cheaper cost than production keeps the run short; the ratios are what matter.
+os.environ.setdefault("PASSWORD_BCRYPT_ROUNDS", "10")
+
+import httpx
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.security import OAuth2PasswordRequestForm
+
+from app.api.v1.endpoints import auth
+from app.core import security
+from app.core.db import Base, dispose_engine, get_engine
+from app.core.password_hasher import password_hasher
+from app.scripts.loadtest_waiver_wire import AppServer
+from main import PasswordHasherBusy, password_hasher_busy_handler
+
+EMAIL = "loadtest@example.com"
+PASSWORD = "correct horse battery staple"
+
+def build_app(stored_hash: dict) -> FastAPI:
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        async with get_engine().begin() as connection:
+            await connection.run_sync(Base.metadata.drop_all)
+            await connection.run_sync(Base.metadata.create_all)
+        yield
+        password_hasher.shutdown()
+        await dispose_engine()
+
+    app = FastAPI(lifespan=lifespan)
+    app.include_router(auth.router, prefix="/api/v1/auth")
+    app.add_exception_handler(PasswordHasherBusy, password_hasher_busy_handler)
+
+    @app.post("/legacy/login")
+    def legacy_login(form_data: OAuth2PasswordRequestForm = Depends()):
+        # Mirrors the previous implementation: bcrypt inside a sync route.
+        if not security.verify_password(form_data.password, stored_hash["value"]):
+            raise HTTPException(status_code=401)
+        return {"ok": True}
+
+    return app
+
+def percentile(values, fraction):
+    return values[max(int(len(values) * fraction) - 1, 0)] if values else 0.0
+
+async def fire(client: httpx.AsyncClient, login_url: str, logins: int, readers: int, cookies):
+    login_latencies, read_latencies = [], []
+    statuses = {}
+    done = asyncio.Event()
+
+    async def login():
+        started = time.perf_counter()
+        response = await client.post(login_url, data={"username": EMAIL, "password": PASSWORD})
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        if response.status_code == 200:
+            login_latencies.append(time.perf_counter() - started)
+
+    async def reader():
+        while not done.is_set():
+            started = time.perf_counter()
+            response = await client.get("/api/v1/auth/users/me", cookies=cookies)
+            response.raise_for_status()
+            read_latencies.append(time.perf_counter() - started)
+
+    reader_tasks = [asyncio.create_task(reader()) for _ in range(readers)]
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await asyncio.gather(*reader_tasks)
+    login_latencies.sort()
+    read_latencies.sort()
+    return {
+        "elapsed": elapsed,
+        "logins_ok": statuses.get(200, 0),
+        "rejected": statuses.get(503, 0),
+        "login_p50_ms": statistics.median(login_latencies) * 1000 if login_latencies else 0.0,
+        "reads_per_s": len(read_latencies) / elapsed,
+        "read_p50_ms": statistics.median(read_latencies) * 1000 if read_latencies else 0.0,
+        "read_p99_ms": percentile(read_latencies, 0.99) * 1000,
+    }
+
+def report(label: str, r: dict):
+    print(f"{label:<7} {r['elapsed']:>6.2f}s  logins ok {r['logins_ok']:>4}  503 {r['rejected']:>4}  "
+          f"login p50 {r['login_p50_ms']:>8.1f} ms  |  reads {r['reads_per_s']:>7.1f}/s  "
+          f"p50 {r['read_p50_ms']:>7.1f} ms  p99 {r['read_p99_ms']:>8.1f} ms")
+
+async def run(args, stored_hash: dict):
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=300) as client:
+        await client.post("/api/v1/auth/register", json={"email": EMAIL, "password": PASSWORD})
+        response = await client.post("/api/v1/auth/login", data={"username": EMAIL, "password": PASSWORD})
+        response.raise_for_status()
+        cookies = dict(response.cookies)
+        client.cookies.clear()
+        stored_hash["value"] = security.get_password_hash(PASSWORD)
+
+        print(f"{args.logins} concurrent logins, {args.readers} readers, bcrypt cost "
+              f"{os.environ['PASSWORD_BCRYPT_ROUNDS']}, hashing pool {args.workers} workers / "
+              f"{args.max_pending} pending, single worker\n")
+        report("pooled", await fire(client, "/api/v1/auth/login", args.logins, args.readers, cookies))
+        print(f"        {password_hasher.stats()}")
+        report("legacy", await fire(client, "/legacy/login", args.logins, args.readers, cookies))
+
+def main():
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    parser = argparse.ArgumentParser(description="Login burst vs read traffic load test.")
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--readers", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=password_hasher.workers)
+    parser.add_argument("--max-pending", type=int, default=password_hasher.max_pending)
+    args = parser.parse_args()
+
+    # The pool is created on first use, so it picks these up.
+    password_hasher.workers, password_hasher.max_pending = args.workers, args.max_pending
+    stored_hash: dict = {}
+    with AppServer(build_app(stored_hash)) as server:
+        args.base_url = server.base_url
+        asyncio.run(run(args, stored_hash))
+
+if __name__ == "__main__":
+    main()
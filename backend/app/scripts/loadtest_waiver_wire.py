@@ -0,0 +1,158 @@
+"""
+Load test for the waiver-wire route on a single uvicorn worker.
+
+Fires N concurrent waiver-wire requests at the real router (auth and token
+lookup overridden) backed by the local Yahoo stub with simulated latency, and
+compares it with a blocking `def` route shaped like the old implementation.
+The AnyIO threadpool is deliberately shrunk so exhausting it is visible, and
+/api/health is probed during the run to show the event loop stays responsive.
+
+Usage: python -m app.scripts.loadtest_waiver_wire --requests 200 --latency 0.25 --threads 4
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+import xml.etree.ElementTree as ET
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+for _key in ("SECRET_KEY", "YAHOO_CLIENT_ID", "YAHOO_CLIENT_SECRET", "YAHOO_REDIRECT_URI"):
+    os.environ.setdefault(_key, "loadtest")
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import anyio
+import httpx
+import uvicorn
+from fastapi import FastAPI
+
+from app.api import deps
+from app.api.routers import waiver_router
+from app.core.http import open_http_clients, close_http_clients
+from app.schemas.user import UserPrincipal
+from app.scripts.yahoo_stub_server import StubServer
+from app.services import yahoo_api
+
+YAHOO_NAMESPACE = {"y": "http://fantasysports.yahooapis.com/fantasy/v2/base.rng"}
+
+def build_app(threads: int) -> FastAPI:
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        anyio.to_thread.current_default_thread_limiter().total_tokens = threads
+        await open_http_clients()
+        yield
+        await close_http_clients()
+
+    app = FastAPI(lifespan=lifespan)
+    app.include_router(waiver_router.router, prefix="/api/v1/leagues/{league_key}")
+    app.dependency_overrides[deps.get_league_access_token] = lambda: "loadtest-token"
+    app.dependency_overrides[deps.get_current_active_user] = lambda: UserPrincipal(
+        id=1, email="loadtest@example.com", is_active=True
+    )
+
+    @app.get("/legacy/leagues/{league_key}/waiver-wire")
+    def legacy_waiver_wire(league_key: str):
+        # Mirrors the previous implementation: a blocking GET inside a sync route.
+        url = f"{yahoo_api.YAHOO_API_BASE_URL}/league/{league_key}/players;status=W/stats"
+        response = httpx.get(url, headers={"Authorization": "Bearer loadtest-token"})
+        root = ET.fromstring(response.content)
+        return [p.findtext("y:player_key", namespaces=YAHOO_NAMESPACE)
+                for p in root.findall(".//y:player", YAHOO_NAMESPACE)]
+
+    @app.get("/api/health")
+    async def health():
+        return {"status": "ok"}
+
+    return app
+
+class AppServer:
+    def __init__(self, app: FastAPI):
+        self.server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning", workers=1))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.servers[0].sockets[0].getsockname()[1]}"
+
+    def __enter__(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join(timeout=5)
+
+async def fire(client: httpx.AsyncClient, url: str, total: int, health_url: str):
+    latencies, health_latencies, errors = [], [], 0
+    done = asyncio.Event()
+
+    async def one():
+        nonlocal errors
+        started = time.perf_counter()
+        try:
+            response = await client.get(url)
+            response.raise_for_status()
+        except httpx.HTTPError:
+            errors += 1
+            return
+        latencies.append(time.perf_counter() - started)
+
+    async def probe_health():
+        while not done.is_set():
+            started = time.perf_counter()
+            await client.get(health_url)
+            health_latencies.append(time.perf_counter() - started)
+            await asyncio.sleep(0.05)
+
+    prober = asyncio.create_task(probe_health())
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await prober
+    latencies.sort()
+    return {
+        "elapsed": elapsed,
+        "rps": total / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "health_max_ms": max(health_latencies) * 1000 if health_latencies else 0.0,
+        "errors": errors,
+    }
+
+def report(label: str, r: dict):
+    print(f"{label:<10} {r['elapsed']:>6.2f}s  {r['rps']:>7.1f} req/s  p50 {r['p50_ms']:>8.1f} ms  "
+          f"p99 {r['p99_ms']:>8.1f} ms  worst /api/health {r['health_max_ms']:>7.1f} ms  errors {r['errors']}")
+
+async def run(args):
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=120) as client:
+        print(f"{args.requests} concurrent requests, upstream latency {args.latency}s, "
+              f"threadpool {args.threads} threads, single worker\n")
+        report("async", await fire(client, "/api/v1/leagues/461.l.1/waiver-wire", args.requests, "/api/health"))
+        report("legacy", await fire(client, "/legacy/leagues/461.l.1/waiver-wire", args.requests, "/api/health"))
+
+def main():
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    parser = argparse.ArgumentParser(description="Waiver-wire concurrency load test.")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.25)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    with StubServer(latency=args.latency, tls=False) as stub:
+        yahoo_api.YAHOO_API_BASE_URL = stub.base_url + "/fantasy/v2"
+        with AppServer(build_app(args.threads)) as server:
+            args.base_url = server.base_url
+            asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
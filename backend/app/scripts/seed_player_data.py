@@ -4,8 +4,9 @@ from pathlib import Path
 
 sys.path.append(str(Path(__file__).resolve().parents[2]))
 
-from app.db.session import SessionLocal
+from app.core.db import SessionLocal
 from app.services.player_data_service import sync_nflverse_players, sync_fantasy_calc_values
+from app.services.player_value_history_service import downsample_value_history
 
 async def main():
     print("Seeding player data...")
@@ -14,6 +15,8 @@ async def main():
     try:
         await sync_nflverse_players(db)
         await sync_fantasy_calc_values(db)
+        removed = await downsample_value_history(db)
+        print(f"Downsampled value history, removed {removed} rows.")
     except Exception as e:
         print(f"An error occurred during data seeding: {e}")
         await db.rollback()
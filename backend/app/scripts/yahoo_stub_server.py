@@ -0,0 +1,263 @@
+"""
+A tiny local stand-in for the Yahoo Fantasy and OAuth endpoints, used by the
+benchmark and load-test scripts. It serves Yahoo-shaped XML/JSON so the real
+service code can run end to end without leaving the machine.
+
+Run standalone with: python -m app.scripts.yahoo_stub_server --port 8443
+"""
+import argparse
+import asyncio
+import json
+import re
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, Optional
+
+import uvicorn
+from uvicorn.protocols.http import h11_impl
+
+# Uvicorn only knows reason phrases for 1xx-5xx; Yahoo throttles with a 999.
+h11_impl.STATUS_PHRASES.setdefault(999, b"Request Denied")
+
+CERTS_DIR = Path(__file__).resolve().parents[3] / "certs"
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+FANTASY_CONTENT_OPEN = (
+    '<fantasy_content xml:lang="en-US" '
+    'xmlns="http://fantasysports.yahooapis.com/fantasy/v2/base.rng">'
+)
+POSITIONS = ["QB", "RB", "WR", "TE", "K", "DEF"]
+TEAMS = ["KC", "BUF", "SF", "PHI", "DAL", "MIA", "DET", "BAL", "CIN", "GB"]
+
+# Number of players the stub reports for each availability status.
+DEFAULT_PLAYER_COUNTS = {"W": 60, "FA": 240, "A": 300}
+LEAGUE_TEAMS = 12
+ROSTER_SIZE = 16
+
+def leagues_xml(league_count: int = 3) -> str:
+    """Builds a users/games/leagues document like Yahoo's leagues endpoint."""
+    leagues = "".join(
+        f"<league><league_key>461.l.{1000 + i}</league_key><league_id>{1000 + i}</league_id>"
+        f"<name>Stub League {i}</name>"
+        f"<url>https://football.fantasysports.yahoo.com/f1/{1000 + i}</url>"
+        f"<draft_status>postdraft</draft_status><num_teams>12</num_teams>"
+        f"<scoring_type>head</scoring_type><season>2025</season></league>"
+        for i in range(league_count)
+    )
+    return (
+        f"{XML_HEADER}{FANTASY_CONTENT_OPEN}<users count=\"1\"><user><guid>STUBGUID</guid>"
+        f"<games count=\"1\"><game><game_key>461</game_key><code>nfl</code>"
+        f"<leagues count=\"{league_count}\">{leagues}</leagues></game></games>"
+        f"</user></users></fantasy_content>"
+    )
+
+def player_xml(n: int) -> str:
+    position = POSITIONS[n % len(POSITIONS)]
+    stats = "".join(
+        f"<stat><stat_id>{stat_id}</stat_id><value>{(n * stat_id) % 400}</value></stat>"
+        for stat_id in range(1, 16)
+    )
+    return (
+        f"<player><player_key>461.p.{30000 + n}</player_key><player_id>{30000 + n}</player_id>"
+        f"<name><full>Stub Player {n}</full><first>Stub</first><last>Player {n}</last>"
+        f"<ascii_first>Stub</ascii_first><ascii_last>Player {n}</ascii_last></name>"
+        f"<editorial_player_key>461.p.{30000 + n}</editorial_player_key>"
+        f"<editorial_team_abbr>{TEAMS[n % len(TEAMS)]}</editorial_team_abbr>"
+        f"<display_position>{position}</display_position>"
+        f"<headshot><url>https://s.yimg.com/iu/api/res/{n}.png</url><size>small</size></headshot>"
+        f"<position_type>O</position_type>"
+        f"<eligible_positions><position>{position}</position></eligible_positions>"
+        f"<player_stats><coverage_type>season</coverage_type><season>2025</season>"
+        f"<stats>{stats}</stats></player_stats>"
+        f"<percent_owned><coverage_type>week</coverage_type><week>1</week>"
+        f"<value>{n % 100}</value><delta>0</delta></percent_owned></player>"
+    )
+
+def players_xml(league_key: str, start: int, count: int, total: int) -> str:
+    """Builds one page of a league players collection."""
+    numbers = range(start, min(start + count, total))
+    players = "".join(player_xml(n) for n in numbers)
+    return (
+        f"{XML_HEADER}{FANTASY_CONTENT_OPEN}<league><league_key>{league_key}</league_key>"
+        f"<name>Stub League</name><players count=\"{len(numbers)}\">{players}</players>"
+        f"</league></fantasy_content>"
+    )
+
+def league_settings_xml(league_key: str) -> str:
+    """Builds a league settings document with a full-PPR reception modifier."""
+    return (
+        f"{XML_HEADER}{FANTASY_CONTENT_OPEN}<league><league_key>{league_key}</league_key>"
+        f"<league_id>{league_key.rsplit('.', 1)[-1]}</league_id><name>Stub League</name>"
+        f"<num_teams>{LEAGUE_TEAMS}</num_teams><season>2025</season><settings>"
+        f"<stat_modifiers><stats><stat><stat_id>4</stat_id><value>0.04</value></stat>"
+        f"<stat><stat_id>11</stat_id><value>1</value></stat></stats></stat_modifiers>"
+        f"</settings></league></fantasy_content>"
+    )
+
+def roster_numbers(team: int, roster_moves: int) -> list:
+    """Player numbers on a team's roster after `roster_moves` single-player swaps across the league."""
+    numbers = [team * ROSTER_SIZE + i for i in range(ROSTER_SIZE)]
+    for move in range(roster_moves):
+        if move % LEAGUE_TEAMS == team:
+            numbers[(move // LEAGUE_TEAMS) % ROSTER_SIZE] = LEAGUE_TEAMS * ROSTER_SIZE + move
+    return numbers
+
+def league_rosters_xml(league_key: str, roster_moves: int = 0) -> str:
+    """Builds a league teams/roster document."""
+    teams = "".join(
+        f"<team><team_key>{league_key}.t.{team + 1}</team_key><team_id>{team + 1}</team_id>"
+        f"<name>Stub Team {team + 1}</name><roster><coverage_type>week</coverage_type><week>1</week>"
+        f"<players count=\"{ROSTER_SIZE}\">{''.join(player_xml(n) for n in roster_numbers(team, roster_moves))}"
+        f"</players></roster></team>"
+        for team in range(LEAGUE_TEAMS)
+    )
+    return (
+        f"{XML_HEADER}{FANTASY_CONTENT_OPEN}<league><league_key>{league_key}</league_key>"
+        f"<name>Stub League</name><teams count=\"{LEAGUE_TEAMS}\">{teams}</teams></league></fantasy_content>"
+    )
+
+def token_json() -> str:
+    return json.dumps({
+        "access_token": "stub-access-token",
+        "refresh_token": "stub-refresh-token",
+        "token_type": "bearer",
+        "expires_in": 3600,
+    })
+
+class StubYahooApp:
+    """Raw ASGI app; kept framework-free so it costs as little as possible per request."""
+
+    def __init__(
+        self, latency: float = 0.0, player_counts: Optional[Dict[str, int]] = None,
+        throttle_rps: Optional[int] = None,
+    ):
+        self.latency = latency
+        self.player_counts = player_counts or dict(DEFAULT_PLAYER_COUNTS)
+        # Bump to simulate trades and waiver claims between league syncs.
+        self.roster_moves = 0
+        self.requests_served = 0
+        # Like Yahoo, answer 999 to requests beyond this many in the last second.
+        self.throttle_rps = throttle_rps
+        self.requests_throttled = 0
+        self._recent: Deque[float] = deque()
+
+    def throttled(self) -> bool:
+        if self.throttle_rps is None:
+            return False
+        now = time.monotonic()
+        while self._recent and now - self._recent[0] >= 1.0:
+            self._recent.popleft()
+        if len(self._recent) >= self.throttle_rps:
+            self.requests_throttled += 1
+            return True
+        self._recent.append(now)
+        return False
+
+    def route(self, path: str):
+        if path.endswith("/oauth2/get_token"):
+            return "application/json", token_json()
+        match = re.search(r"/league/([^/;]+)/settings$", path)
+        if match:
+            return "application/xml", league_settings_xml(match.group(1))
+        match = re.search(r"/league/([^/;]+)/teams/roster$", path)
+        if match:
+            return "application/xml", league_rosters_xml(match.group(1), self.roster_moves)
+        match = re.search(r"/league/([^/;]+)/players", path)
+        if match:
+            status = re.search(r"status=(\w+)", path)
+            start = re.search(r"start=(\d+)", path)
+            count = re.search(r"count=(\d+)", path)
+            total = self.player_counts.get(status.group(1) if status else "A", 0)
+            return "application/xml", players_xml(
+                match.group(1),
+                int(start.group(1)) if start else 0,
+                int(count.group(1)) if count else 25,
+                total,
+            )
+        if "/leagues" in path:
+            return "application/xml", leagues_xml()
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+        # Drain the request body (token exchanges POST a form).
+        more_body = True
+        while more_body:
+            message = await receive()
+            more_body = message.get("more_body", False)
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.requests_served += 1
+
+        routed = self.route(scope["path"])
+        if self.throttled():
+            status_code, content_type, body = 999, "text/plain", "Request denied"
+        elif routed is None:
+            status_code, content_type, body = 404, "text/plain", "not found"
+        else:
+            status_code, (content_type, body) = 200, routed
+        payload = body.encode()
+        await send({
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [
+                (b"content-type", content_type.encode()),
+                (b"content-length", str(len(payload)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": payload})
+
+class StubServer:
+    """Runs the stub in a background thread; use as a context manager."""
+
+    def __init__(self, port: int = 0, latency: float = 0.0, tls: bool = True, throttle_rps: Optional[int] = None):
+        self.app = StubYahooApp(latency=latency, throttle_rps=throttle_rps)
+        self.tls = tls and (CERTS_DIR / "cert.pem").exists()
+        config = uvicorn.Config(
+            self.app,
+            host="127.0.0.1",
+            port=port,
+            log_level="warning",
+            lifespan="off",
+            ssl_certfile=str(CERTS_DIR / "cert.pem") if self.tls else None,
+            ssl_keyfile=str(CERTS_DIR / "key.pem") if self.tls else None,
+        )
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        port = self.server.servers[0].sockets[0].getsockname()[1]
+        return f"{'https' if self.tls else 'http'}://127.0.0.1:{port}"
+
+    def __enter__(self) -> "StubServer":
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.should_exit = True
+        self.thread.join(timeout=5)
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Yahoo API stub.")
+    parser.add_argument("--port", type=int, default=8443)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds of simulated upstream latency.")
+    parser.add_argument("--no-tls", action="store_true")
+    parser.add_argument("--throttle-rps", type=int, default=None, help="Answer 999 beyond this many requests/second.")
+    args = parser.parse_args()
+
+    with StubServer(port=args.port, latency=args.latency, tls=not args.no_tls, throttle_rps=args.throttle_rps) as stub:
+        print(f"Yahoo stub listening on {stub.base_url} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+"""
+Local copy of a user's Yahoo leagues, teams and rosters.
+
+A sync pulls each league's settings and every team's roster (one Yahoo call
+each, fetched for all leagues concurrently) and writes only what changed. Each
+team stores a digest of the roster last written, so an unchanged roster costs
+one string comparison. A changed one is diffed against roster_association, and
+only the players who moved are deleted or inserted. League and roster pages
+are then served from the database.
+
+A league is stored once however many of its managers sync it. Each sync also
+records the user in league_members, and reads only show leagues the user is a
+member of. Managers of one league may sync it at the same time, so each league
+is written in a savepoint and redone if a concurrent sync inserted the same
+rows first.
+"""
+import asyncio
+import hashlib
+import logging
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.request_scheduler import background_lane
+from ..models.league import League, ScoringType, league_members
+from ..models.player import Player, Position
+from ..models.team import Team, roster_association
+from ..schemas.league import (
+    LeagueDetail, LeagueSummary, LeagueSyncResult, RosterPlayer, TeamRoster, YahooLeagueSettings, YahooTeam,
+)
+from ..schemas.waiver import WaiverPlayer
+from . import yahoo_api, yahoo_service
+
+logger = logging.getLogger(__name__)
+
+# Yahoo display positions we keep players for (IDP positions are skipped).
+TRACKED_POSITIONS = {position.value: position for position in Position}
+# Times a league is written before a conflict with concurrent syncs is raised.
+APPLY_ATTEMPTS = 3
+
+def scoring_type(settings: YahooLeagueSettings) -> ScoringType:
+    if settings.reception_points >= 1:
+        return ScoringType.PPR
+    if settings.reception_points > 0:
+        return ScoringType.HALF_PPR
+    return ScoringType.STANDARD
+
+def roster_digest(team: YahooTeam) -> str:
+    """Order-independent digest of the players on a roster."""
+    return hashlib.sha1(",".join(sorted(p.player_id for p in team.players)).encode()).hexdigest()
+
+async def _resolve_players(db: AsyncSession, yahoo_players: Iterable[WaiverPlayer], result: LeagueSyncResult) -> Dict[str, int]:
+    """
+    Maps Yahoo player ids to player ids. Players not seen from Yahoo before are
+    matched to an existing player by exact name and position when that is
+    unambiguous (recording their Yahoo id), and created otherwise. Players at
+    positions we do not track (e.g. IDP) are left out.
+    """
+    wanted = {p.player_id: p for p in yahoo_players}
+    resolved: Dict[str, int] = dict((await db.execute(
+        select(Player.yahoo_player_id, Player.id).where(Player.yahoo_player_id.in_(wanted))
+    )).all())
+    missing = {
+        yahoo_id: p for yahoo_id, p in wanted.items()
+        if yahoo_id not in resolved and p.display_position.split(",")[0] in TRACKED_POSITIONS
+    }
+    if not missing:
+        return resolved
+
+    candidates: Dict[Tuple[str, str], List[int]] = defaultdict(list)
+    rows = await db.execute(
+        select(Player.id, Player.name, Player.position)
+        .where(Player.yahoo_player_id.is_(None), Player.name.in_({p.full_name for p in missing.values()}))
+    )
+    for player_id, name, position in rows:
+        candidates[(name, position.value)].append(player_id)
+
+    claimed = []
+    for yahoo_id, p in list(missing.items()):
+        matches = candidates.get((p.full_name, p.display_position.split(",")[0]), [])
+        if len(matches) == 1:
+            claimed.append({"id": matches[0], "yahoo_player_id": yahoo_id})
+            resolved[yahoo_id] = matches[0]
+            del missing[yahoo_id]
+    if claimed:
+        await db.execute(update(Player), claimed)
+
+    if missing:
+        new_rows = await db.execute(
+            insert(Player).returning(Player.yahoo_player_id, Player.id, sort_by_parameter_order=True),
+            [
+                {
+                    "yahoo_player_id": yahoo_id,
+                    "name": p.full_name,
+                    "position": TRACKED_POSITIONS[p.display_position.split(",")[0]],
+                    "nfl_team_abbr": p.editorial_team_abbr or None,
+                }
+                for yahoo_id, p in missing.items()
+            ],
+        )
+        resolved.update(new_rows.tuples().all())
+        result.players_created += len(missing)
+    return resolved
+
+async def _write_rosters(db: AsyncSession, changed: List[Tuple[Team, YahooTeam]], result: LeagueSyncResult) -> None:
+    """Applies the difference between each changed team's stored and Yahoo roster."""
+    player_ids = await _resolve_players(db, (p for _, team in changed for p in team.players), result)
+    stored: Dict[int, Set[int]] = defaultdict(set)
+    rows = await db.execute(
+        select(roster_association.c.team_id, roster_association.c.player_id)
+        .where(roster_association.c.team_id.in_([row.id for row, _ in changed]))
+    )
+    for team_id, player_id in rows:
+        stored[team_id].add(player_id)
+
+    to_insert = []
+    for row, team in changed:
+        current = {player_ids[p.player_id] for p in team.players if p.player_id in player_ids}
+        removed = stored[row.id] - current
+        added = current - stored[row.id]
+        if removed:
+            await db.execute(delete(roster_association).where(
+                roster_association.c.team_id == row.id, roster_association.c.player_id.in_(removed)
+            ))
+        to_insert.extend({"team_id": row.id, "player_id": player_id} for player_id in added)
+        result.roster_players_added += len(added)
+        result.roster_players_removed += len(removed)
+    if to_insert:
+        await db.execute(insert(roster_association), to_insert)
+
+async def _apply_league(
+    db: AsyncSession, user_id: int, settings: YahooLeagueSettings, teams: List[YahooTeam], result: LeagueSyncResult
+) -> int:
+    """Writes one league's changes and records the user as a member. Returns the league id."""
+    league = await db.scalar(select(League).where(League.yahoo_league_id == settings.league_key))
+    if league is None:
+        league = League(yahoo_league_id=settings.league_key, owner_id=user_id)
+        db.add(league)
+        result.leagues_created += 1
+    # Plain attribute sets; the ORM only writes columns whose value changed.
+    league.name = settings.name
+    league.season = settings.season
+    league.scoring_type = scoring_type(settings)
+    league.synced_at = datetime.now(timezone.utc)
+    await db.flush()
+    member = await db.scalar(select(league_members.c.user_id).where(
+        league_members.c.league_id == league.id, league_members.c.user_id == user_id
+    ))
+    if member is None:
+        await db.execute(insert(league_members).values(league_id=league.id, user_id=user_id))
+
+    existing = {
+        team.yahoo_team_id: team
+        for team in await db.scalars(select(Team).where(Team.league_id == league.id))
+    }
+    changed: List[Tuple[Team, YahooTeam]] = []
+    for team in teams:
+        row = existing.pop(team.team_id, None)
+        if row is None:
+            row = Team(yahoo_team_id=team.team_id, league_id=league.id)
+            db.add(row)
+            result.teams_created += 1
+        row.name = team.name
+        digest = roster_digest(team)
+        if row.roster_hash == digest:
+            result.rosters_unchanged += 1
+            continue
+        row.roster_hash = digest
+        changed.append((row, team))
+
+    if existing:
+        # Core deletes: an ORM delete would lazy-load each team's players first.
+        gone = [team.id for team in existing.values()]
+        await db.execute(delete(roster_association).where(roster_association.c.team_id.in_(gone)))
+        await db.execute(delete(Team).where(Team.id.in_(gone)).execution_options(synchronize_session=False))
+        for team in existing.values():
+            db.expunge(team)
+        result.teams_removed += len(gone)
+    await db.flush()
+
+    if changed:
+        await _write_rosters(db, changed, result)
+        result.rosters_changed += len(changed)
+    return league.id
+
+async def _apply_league_with_retry(
+    db: AsyncSession, user_id: int, settings: YahooLeagueSettings, teams: List[YahooTeam], result: LeagueSyncResult
+) -> int:
+    """
+    Runs _apply_league in a savepoint. If another sync inserted one of the same
+    leagues, teams, memberships, players or roster rows first, the unique
+    constraint fails; the savepoint is rolled back and the league reapplied,
+    now finding the committed rows.
+    """
+    for attempt in range(1, APPLY_ATTEMPTS + 1):
+        counts = LeagueSyncResult()
+        try:
+            async with db.begin_nested():
+                league_id = await _apply_league(db, user_id, settings, teams, counts)
+        except IntegrityError:
+            if attempt == APPLY_ATTEMPTS:
+                raise
+            logger.info(f"League {settings.league_key} was written by a concurrent sync; reapplying.")
+            continue
+        for name, value in counts:
+            setattr(result, name, getattr(result, name) + value)
+        return league_id
+
+async def _fetch_league(access_token: str, league_key: str) -> Tuple[YahooLeagueSettings, List[YahooTeam]]:
+    return await asyncio.gather(
+        yahoo_api.get_league_settings(access_token, league_key),
+        yahoo_api.get_league_rosters(access_token, league_key),
+    )
+
+async def sync_user_leagues(db: AsyncSession, user_id: int) -> LeagueSyncResult:
+    """Pulls the user's leagues, teams and rosters from Yahoo, writing only what changed."""
+    leagues = await yahoo_service.get_user_leagues(db, user_id=user_id)
+    access_token = await yahoo_service.get_refreshed_token(db, user_id=user_id)
+    # A sync is a bulk pull of every league; page loads go ahead of it.
+    with background_lane():
+        fetched = await asyncio.gather(*(_fetch_league(access_token, league.league_key) for league in leagues))
+
+    result = LeagueSyncResult(leagues=len(leagues))
+    synced = []
+    for settings, teams in fetched:
+        synced.append(await _apply_league_with_retry(db, user_id, settings, teams, result))
+        await db.commit()
+    # Leagues Yahoo no longer lists for the user (e.g. they left) stop showing.
+    await db.execute(delete(league_members).where(
+        league_members.c.user_id == user_id, league_members.c.league_id.not_in(synced)
+    ))
+    await db.commit()
+    logger.info(f"League sync for user {user_id}: {result}")
+    return result
+
+def _summary(league: League) -> dict:
+    return {
+        "id": league.id,
+        "yahoo_league_id": league.yahoo_league_id,
+        "name": league.name,
+        "season": league.season,
+        "scoring_type": league.scoring_type.value,
+        "synced_at": league.synced_at,
+    }
+
+async def get_user_leagues(db: AsyncSession, user_id: int) -> List[LeagueSummary]:
+    leagues = await db.scalars(
+        select(League)
+        .join(league_members, league_members.c.league_id == League.id)
+        .where(league_members.c.user_id == user_id)
+        .order_by(League.season.desc(), League.name)
+    )
+    return [LeagueSummary(**_summary(league)) for league in leagues]
+
+async def get_league(db: AsyncSession, league_id: int, user_id: int) -> Optional[LeagueDetail]:
+    """A synced league with every team's roster, or None if the user is not in it."""
+    league = await db.scalar(
+        select(League)
+        .join(league_members, league_members.c.league_id == League.id)
+        .where(League.id == league_id, league_members.c.user_id == user_id)
+    )
+    if league is None:
+        return None
+    teams = (await db.scalars(
+        select(Team).where(Team.league_id == league_id).order_by(Team.id)
+    )).all()
+    rosters: Dict[int, List[RosterPlayer]] = defaultdict(list)
+    rows = await db.execute(
+        select(roster_association.c.team_id, Player.id, Player.name, Player.position, Player.nfl_team_abbr)
+        .join(Player, Player.id == roster_association.c.player_id)
+        .where(roster_association.c.team_id.in_([team.id for team in teams]))
+        .order_by(Player.position, Player.name)
+    )
+    for team_id, player_id, name, position, nfl_team_abbr in rows:
+        rosters[team_id].append(
+            RosterPlayer(id=player_id, name=name, position=position.value, nfl_team_abbr=nfl_team_abbr)
+        )
+    return LeagueDetail(
+        **_summary(league),
+        teams=[
+            TeamRoster(id=team.id, yahoo_team_id=team.yahoo_team_id, name=team.name, players=rosters[team.id])
+            for team in teams
+        ],
+    )
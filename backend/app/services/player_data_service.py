@@ -2,10 +2,17 @@ import asyncio
 import httpx
 import pandas as pd
 import io
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import func, insert, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
-from ..models.player import Player, PlayerSourceMapping, PlayerValue, Position, ScoringFormat
+from ..models.player import Player, PlayerSourceMapping, PlayerValue, PlayerValueLatest, Position, ScoringFormat
+from .player_value_history_service import ensure_value_partitions, record_weekly_values
+from .player_value_index import player_value_index
 
 POSITION_MAP = {
     "QB": Position.QB,
@@ -16,115 +23,314 @@ POSITION_MAP = {
     "DEF": Position.DEF,
 }
 
-NFLVERSE_ROSTERS_URL = "https://github.com/nflverse/nflverse-data/blob/master/rosters/rosters_2023.csv?raw=true"
-FANTASYCALC_VALUES_URL = "https://fantasycalc.com/api/v1/values/superflex"
+NFLVERSE_ROSTERS_URL = "https://github.com/nflverse/nflverse-data/blob/master/rosters/rosters_{season}.csv?raw=true"
+NFLVERSE_SEASONS = (2023,)
+# Only these columns are parsed out of the roster CSV.
+ROSTER_COLUMNS = ['player_id', 'player_name', 'position', 'team', 'fantasypros_id']
+ROSTER_DTYPES = {
+    'player_id': 'string',
+    'player_name': 'string',
+    'position': 'string',
+    'team': 'string',
+    'fantasypros_id': 'float64',  # integer ids, but the column has gaps
+}
+FANTASYCALC_VALUES_URL = "https://fantasycalc.com/api/v1/values/{format_slug}"
+FANTASYCALC_FORMAT_SLUGS = {
+    ScoringFormat.ONE_QB: "1qb",
+    ScoringFormat.SUPERFLEX: "superflex",
+}
 
-async def sync_nflverse_players(db: AsyncSession):
-    print("Starting nflverse player sync...")
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(NFLVERSE_ROSTERS_URL, timeout=30.0)
-            response.raise_for_status()
-    except httpx.RequestError as e:
-        print(f"Error fetching nflverse data: {e}")
-        return
+# Rows written per multi-row statement; keeps bind parameters well under
+# PostgreSQL's 32767 limit.
+BULK_BATCH_SIZE = 1000
+ROSTER_SOURCES = ('nflverse', 'fantasypros')
+PLAYER_VALUE_COPY_COLUMNS = ('player_id', 'value', 'format', 'source')
+
+@dataclass
+class _RosterSyncState:
+    """Everything the roster sync needs to know about the DB, loaded once per run."""
+    # (source, source_player_id) -> player_id
+    mappings: Dict[Tuple[str, str], int]
+    # player_id -> (name, nfl_team_abbr)
+    players: Dict[int, Tuple[str, Optional[str]]]
+    new_players: int = 0
+    updated_players: int = 0
+    upserted_mappings: int = 0
+
+async def _load_roster_sync_state(db: AsyncSession) -> _RosterSyncState:
+    mapping_rows = await db.execute(
+        select(PlayerSourceMapping.source, PlayerSourceMapping.source_player_id, PlayerSourceMapping.player_id)
+        .where(PlayerSourceMapping.source.in_(ROSTER_SOURCES))
+    )
+    player_rows = await db.execute(select(Player.id, Player.name, Player.nfl_team_abbr))
+    return _RosterSyncState(
+        mappings={(source, ext_id): player_id for source, ext_id, player_id in mapping_rows},
+        players={player_id: (name, team) for player_id, name, team in player_rows},
+    )
 
-    roster_data = pd.read_csv(io.StringIO(response.text))
-    roster_data = roster_data.where(pd.notnull(roster_data), None)
+def _present(value) -> bool:
+    """False for None, empty strings and the NaN/NA pandas uses for missing cells."""
+    return value is not None and not pd.isna(value) and value != ''
 
-    relevant_cols = ['player_id', 'player_name', 'position', 'team', 'fantasypros_id']
-    players_to_process = roster_data[relevant_cols].to_dict('records')
-    
-    new_players = 0
-    new_mappings = 0
+def _clean_roster_row(player_data: dict) -> Optional[dict]:
+    if not all(_present(player_data.get(k)) for k in ['player_id', 'player_name', 'position']):
+        return None
+    fantasypros_id_raw = player_data.get('fantasypros_id')
+    team = player_data.get('team')
+    return {
+        "nflverse_id": str(player_data['player_id']),
+        "fantasypros_id": str(int(fantasypros_id_raw)) if _present(fantasypros_id_raw) else None,
+        "name": player_data['player_name'],
+        "position": player_data['position'],
+        "team": team if _present(team) else None,
+    }
 
-    for player_data in players_to_process:
-        if not all(player_data.get(k) for k in ['player_id', 'player_name', 'position']):
+async def _sync_roster_batch(db: AsyncSession, batch: List[dict], state: _RosterSyncState) -> None:
+    """
+    Writes one batch of roster rows with set-based statements: one multi-row
+    INSERT for new players, one bulk UPDATE for changed players and one
+    INSERT ... ON CONFLICT upsert for new or re-pointed source mappings.
+    """
+    rows = {}
+    for raw in batch:
+        row = _clean_roster_row(raw)
+        if row:
+            rows[row["nflverse_id"]] = row  # later rows for the same player win
+
+    to_create: List[dict] = []
+    player_updates: Dict[int, dict] = {}
+    for row in rows.values():
+        player_id = state.mappings.get(("nflverse", row["nflverse_id"]))
+        if player_id is None and row["fantasypros_id"]:
+            player_id = state.mappings.get(("fantasypros", row["fantasypros_id"]))
+        if player_id is None:
+            if row["position"] in POSITION_MAP:
+                to_create.append(row)
             continue
+        row["player_id"] = player_id
+        if state.players.get(player_id) != (row["name"], row["team"]):
+            player_updates[player_id] = {"id": player_id, "name": row["name"], "nfl_team_abbr": row["team"]}
 
-        fantasypros_id_raw = player_data.get('fantasypros_id')
-        fantasypros_id = str(int(fantasypros_id_raw)) if fantasypros_id_raw else None
-        
-        nflverse_id = player_data['player_id']
-        
-        player = None
-        if fantasypros_id:
-            stmt = select(PlayerSourceMapping).where(
-                PlayerSourceMapping.source == 'fantasypros',
-                PlayerSourceMapping.external_id == fantasypros_id
-            )
-            result = await db.execute(stmt)
-            mapping = result.scalars().first()
-            if mapping:
-                player = await db.get(Player, mapping.player_id)
-
-        if not player:
-            pos = player_data.get('position')
-            if pos not in POSITION_MAP:
-                continue
+    if to_create:
+        new_ids = await db.scalars(
+            insert(Player).returning(Player.id, sort_by_parameter_order=True),
+            [
+                {"name": row["name"], "position": POSITION_MAP[row["position"]], "nfl_team_abbr": row["team"]}
+                for row in to_create
+            ],
+        )
+        for row, player_id in zip(to_create, new_ids):
+            row["player_id"] = player_id
+        state.new_players += len(to_create)
 
-            player = Player(
-                name=player_data['player_name'],
-                position=POSITION_MAP[pos],
-                nfl_team_abbr=player_data.get('team')
-            )
-            db.add(player)
-            await db.flush()
-            new_players += 1
-        
-        if fantasypros_id:
-            stmt_fp = select(PlayerSourceMapping).where(PlayerSourceMapping.player_id == player.id, PlayerSourceMapping.source == 'fantasypros')
-            if not (await db.execute(stmt_fp)).scalars().first():
-                db.add(PlayerSourceMapping(player_id=player.id, source='fantasypros', external_id=fantasypros_id))
-                new_mappings += 1
-
-        stmt_nv = select(PlayerSourceMapping).where(PlayerSourceMapping.player_id == player.id, PlayerSourceMapping.source == 'nflverse')
-        if not (await db.execute(stmt_nv)).scalars().first():
-            db.add(PlayerSourceMapping(player_id=player.id, source='nflverse', external_id=nflverse_id))
-            new_mappings += 1
+    if player_updates:
+        await db.execute(update(Player), list(player_updates.values()))
+        state.updated_players += len(player_updates)
 
-    await db.commit()
-    print(f"nflverse player sync finished. Created {new_players} new players and {new_mappings} new mappings.")
+    for row in list(rows.values()):
+        if "player_id" in row:
+            state.players[row["player_id"]] = (row["name"], row["team"])
 
+    mapping_rows: Dict[Tuple[str, str], dict] = {}
+    for row in rows.values():
+        if "player_id" not in row:
+            continue
+        for source, ext_id in (("nflverse", row["nflverse_id"]), ("fantasypros", row["fantasypros_id"])):
+            if ext_id and state.mappings.get((source, ext_id)) != row["player_id"]:
+                state.mappings[(source, ext_id)] = row["player_id"]
+                mapping_rows[(source, ext_id)] = {
+                    "player_id": row["player_id"],
+                    "source": source,
+                    "source_player_id": ext_id,
+                    "source_player_name": row["name"],
+                }
+
+    if mapping_rows:
+        stmt = pg_insert(PlayerSourceMapping).values(list(mapping_rows.values()))
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_player_source_mappings_source_id",
+            set_={"player_id": stmt.excluded.player_id, "source_player_name": stmt.excluded.source_player_name},
+        )
+        await db.execute(stmt)
+        state.upserted_mappings += len(mapping_rows)
+
+def _parse_roster_lines(header: str, lines: List[str]) -> List[dict]:
+    """Parses one batch of CSV lines, keeping only ROSTER_COLUMNS with fixed dtypes."""
+    frame = pd.read_csv(
+        io.StringIO("\n".join([header, *lines])),
+        usecols=ROSTER_COLUMNS,
+        dtype=ROSTER_DTYPES,
+    )
+    return frame.to_dict('records')
+
+async def _iter_roster_batches(response: httpx.Response) -> AsyncIterator[List[dict]]:
+    """
+    Streams a roster CSV off the wire in batches of BULK_BATCH_SIZE records, so
+    neither the body nor a full DataFrame is ever held in memory. A batch is
+    only cut between records, never inside a quoted field spanning lines.
+    """
+    header: Optional[str] = None
+    pending: List[str] = []
+    records = 0
+    in_quotes = False
+    async for line in response.aiter_lines():
+        if header is None:
+            header = line
+            continue
+        pending.append(line)
+        in_quotes ^= line.count('"') % 2 == 1
+        if in_quotes:
+            continue
+        records += 1
+        if records >= BULK_BATCH_SIZE:
+            yield _parse_roster_lines(header, pending)
+            pending, records = [], 0
+    if header is not None and pending:
+        yield _parse_roster_lines(header, pending)
+
+async def sync_nflverse_players(db: AsyncSession, seasons: Iterable[int] = NFLVERSE_SEASONS):
+    print("Starting nflverse player sync...")
+    started = time.perf_counter()
+    state = await _load_roster_sync_state(db)
+    total_rows = 0
 
-async def sync_fantasy_calc_values(db: AsyncSession):
-    print("Starting fantasycalc value sync...")
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(FANTASYCALC_VALUES_URL, timeout=30.0)
-            response.raise_for_status()
-    except httpx.RequestError as e:
-        print(f"Error fetching fantasycalc data: {e}")
+        async with httpx.AsyncClient(follow_redirects=True) as client:
+            for season in seasons:
+                url = NFLVERSE_ROSTERS_URL.format(season=season)
+                async with client.stream("GET", url, timeout=30.0) as response:
+                    response.raise_for_status()
+                    async for batch in _iter_roster_batches(response):
+                        await _sync_roster_batch(db, batch, state)
+                        total_rows += len(batch)
+    except httpx.HTTPError as e:
+        print(f"Error fetching nflverse data: {e}")
+        await db.rollback()
         return
 
-    values_data = response.json()
-    new_values = 0
+    await db.commit()
+    elapsed = time.perf_counter() - started
+    print(
+        f"nflverse player sync finished. Created {state.new_players} new players, updated "
+        f"{state.updated_players} and upserted {state.upserted_mappings} mappings from "
+        f"{total_rows} rows in {elapsed:.2f}s ({total_rows / elapsed:.0f} rows/s)."
+    )
 
-    for item in values_data:
-        fantasypros_id = item.get('player_id')
-        value = item.get('value')
+async def _fetch_fantasy_calc_values(client: httpx.AsyncClient, league_format: ScoringFormat) -> List[dict]:
+    url = FANTASYCALC_VALUES_URL.format(format_slug=FANTASYCALC_FORMAT_SLUGS[league_format])
+    try:
+        response = await client.get(url, timeout=30.0)
+        response.raise_for_status()
+    except httpx.HTTPError as e:
+        print(f"Error fetching fantasycalc {league_format.value} data: {e}")
+        return []
+    return response.json()
 
-        if not fantasypros_id or not value:
-            continue
-            
-        fantasypros_id = str(fantasypros_id)
+async def _load_latest_values(db: AsyncSession, formats: List[str]) -> Dict[Tuple[int, str], int]:
+    """Latest fantasycalc value per (player_id, format), from player_values_latest."""
+    result = await db.execute(
+        select(PlayerValueLatest.player_id, PlayerValueLatest.format, PlayerValueLatest.value)
+        .where(PlayerValueLatest.source == 'fantasycalc', PlayerValueLatest.format.in_(formats))
+    )
+    return {(player_id, league_format): value for player_id, league_format, value in result}
+
+async def _write_player_values(db: AsyncSession, rows: List[Tuple[int, int, str, str]]) -> None:
+    """
+    Appends (player_id, value, format, source) rows to player_values. Uses
+    PostgreSQL COPY when running on asyncpg, batched multi-row INSERTs otherwise.
+    """
+    connection = await db.connection()
+    if connection.dialect.driver == "asyncpg":
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            PlayerValue.__tablename__, records=rows, columns=list(PLAYER_VALUE_COPY_COLUMNS)
+        )
+        return
+    for offset in range(0, len(rows), BULK_BATCH_SIZE):
+        await db.execute(
+            insert(PlayerValue),
+            [dict(zip(PLAYER_VALUE_COPY_COLUMNS, row)) for row in rows[offset:offset + BULK_BATCH_SIZE]],
+        )
+
+async def _upsert_latest_values(db: AsyncSession, rows: List[Tuple[int, int, str, str]]) -> None:
+    """Moves player_values_latest forward to a batch of (player_id, value, format, source) rows just appended."""
+    stmt = pg_insert(PlayerValueLatest).values([dict(zip(PLAYER_VALUE_COPY_COLUMNS, row)) for row in rows])
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[PlayerValueLatest.player_id, PlayerValueLatest.format],
+        set_={
+            'value': stmt.excluded.value,
+            'source': stmt.excluded.source,
+            'date_updated': func.now(),
+        },
+    ))
+
+async def sync_fantasy_calc_values(db: AsyncSession, formats: Iterable[ScoringFormat] = tuple(ScoringFormat)):
+    """
+    Ingests FantasyCalc values for several scoring formats in one run. Formats
+    are fetched concurrently, every fantasypros id is resolved in one query, and
+    only values that differ from the latest stored snapshot are written.
+    """
+    formats = list(formats)
+    print(f"Starting fantasycalc value sync for {', '.join(f.value for f in formats)}...")
+    started = time.perf_counter()
+    async with httpx.AsyncClient() as client:
+        payloads = await asyncio.gather(*(_fetch_fantasy_calc_values(client, f) for f in formats))
+
+    # (format, fantasypros_id) -> value; later duplicates in a payload win.
+    incoming: Dict[Tuple[str, str], int] = {}
+    for league_format, values_data in zip(formats, payloads):
+        for item in values_data:
+            fantasypros_id = item.get('player_id')
+            value = item.get('value')
+            if not fantasypros_id or not value:
+                continue
+            incoming[(league_format.value, str(fantasypros_id))] = value
 
-        stmt = select(PlayerSourceMapping).where(
+    if not incoming:
+        print("fantasycalc value sync finished. No values fetched.")
+        return
+
+    fantasypros_ids = {fantasypros_id for _, fantasypros_id in incoming}
+    mapping_rows = await db.execute(
+        select(PlayerSourceMapping.source_player_id, PlayerSourceMapping.player_id).where(
             PlayerSourceMapping.source == 'fantasypros',
-            PlayerSourceMapping.external_id == fantasypros_id
+            PlayerSourceMapping.source_player_id.in_(fantasypros_ids),
         )
-        result = await db.execute(stmt)
-        mapping = result.scalars().first()
-
-        if mapping:
-            new_value = PlayerValue(
-                player_id=mapping.player_id,
-                source='fantasycalc',
-                value=value,
-                format=ScoringFormat.SUPERFLEX
-            )
-            db.add(new_value)
-            new_values += 1
+    )
+    player_ids = dict(mapping_rows.all())
+    latest = await _load_latest_values(db, [f.value for f in formats])
+
+    # (player_id, format) -> value. Colliding mappings can send several
+    # fantasypros ids to one player; the last value wins, since one upsert
+    # statement cannot touch the same row twice.
+    values: Dict[Tuple[int, str], int] = {}
+    unmapped = 0
+    for (league_format, fantasypros_id), value in incoming.items():
+        player_id = player_ids.get(fantasypros_id)
+        if player_id is None:
+            unmapped += 1
+        else:
+            values[(player_id, league_format)] = value
+
+    rows = []
+    unchanged = 0
+    for (player_id, league_format), value in values.items():
+        if latest.get((player_id, league_format)) == value:
+            unchanged += 1
+        else:
+            rows.append((player_id, value, league_format, 'fantasycalc'))
 
+    if rows:
+        await ensure_value_partitions(db)
+        await _write_player_values(db, rows)
+        for offset in range(0, len(rows), BULK_BATCH_SIZE):
+            batch = rows[offset:offset + BULK_BATCH_SIZE]
+            await _upsert_latest_values(db, batch)
+            await record_weekly_values(db, batch)
     await db.commit()
-    print(f"fantasycalc value sync finished. Added {new_values} new player values.")
+    await player_value_index.patch_players(db, ((player_id, league_format, value) for player_id, value, league_format, _ in rows))
+    elapsed = time.perf_counter() - started
+    print(
+        f"fantasycalc value sync finished. Added {len(rows)} new player values, skipped {unchanged} "
+        f"unchanged and {unmapped} unmapped in {elapsed:.2f}s ({len(incoming) / elapsed:.0f} values/s)."
+    )
@@ -0,0 +1,148 @@
+"""
+Player value history upkeep and reads.
+
+player_values is range-partitioned by month. The sync job creates partitions
+ahead of time, records each sync's values in the player_value_weekly rollup,
+and downsamples partitions older than PLAYER_VALUE_RAW_RETENTION_DAYS to one
+row per player, format and week. The history API reads only the rollup.
+"""
+from datetime import date, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func, select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import settings
+from ..models.player import PlayerValuePartition, PlayerValueWeekly
+from ..schemas.player import PlayerValueHistory, ValuePoint
+
+def week_start(day: date) -> date:
+    """Monday of the day's week, matching PostgreSQL's date_trunc('week', ...)."""
+    return day - timedelta(days=day.weekday())
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def partition_name(month: date) -> str:
+    return f"player_values_y{month.year}m{month.month:02d}"
+
+async def ensure_value_partitions(db: AsyncSession, months_ahead: Optional[int] = None) -> int:
+    """
+    Creates the monthly player_values partitions from the current month through
+    `months_ahead` (default PLAYER_VALUE_PARTITIONS_AHEAD) months ahead. Returns
+    how many were created.
+    """
+    if months_ahead is None:
+        months_ahead = settings.PLAYER_VALUE_PARTITIONS_AHEAD
+    existing = set(await db.scalars(select(PlayerValuePartition.name)))
+    this_month = date.today().replace(day=1)
+    created = 0
+    for offset in range(months_ahead + 1):
+        start = _add_months(this_month, offset)
+        name = partition_name(start)
+        if name in existing:
+            continue
+        end = _add_months(start, 1)
+        await db.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF player_values "
+            f"FOR VALUES FROM ('{start}') TO ('{end}')"
+        ))
+        db.add(PlayerValuePartition(name=name, range_start=start, range_end=end))
+        created += 1
+    if created:
+        await db.flush()
+    return created
+
+async def record_weekly_values(db: AsyncSession, rows: List[Tuple[int, int, str, str]]) -> None:
+    """Folds a batch of (player_id, value, format, source) rows written this sync into the current week's rollup."""
+    current_week = week_start(date.today())
+    stmt = pg_insert(PlayerValueWeekly).values([
+        {'player_id': player_id, 'format': league_format, 'week_start': current_week,
+         'value': value, 'low': value, 'high': value}
+        for player_id, value, league_format, _ in rows
+    ])
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[PlayerValueWeekly.player_id, PlayerValueWeekly.format, PlayerValueWeekly.week_start],
+        set_={
+            'value': stmt.excluded.value,
+            'low': func.least(PlayerValueWeekly.low, stmt.excluded.value),
+            'high': func.greatest(PlayerValueWeekly.high, stmt.excluded.value),
+        },
+    ))
+
+async def downsample_value_history(db: AsyncSession, retention_days: Optional[int] = None) -> int:
+    """
+    Keeps only the last row per (player, format, week) in partitions that end
+    more than `retention_days` (default PLAYER_VALUE_RAW_RETENTION_DAYS) ago.
+    Each partition is processed once. Returns the number of rows removed.
+    """
+    if retention_days is None:
+        retention_days = settings.PLAYER_VALUE_RAW_RETENTION_DAYS
+    cutoff = date.today() - timedelta(days=retention_days)
+    partitions = (await db.scalars(
+        select(PlayerValuePartition.name)
+        .where(PlayerValuePartition.range_end <= cutoff, PlayerValuePartition.downsampled_at.is_(None))
+        .order_by(PlayerValuePartition.range_start)
+    )).all()
+
+    removed = 0
+    for name in partitions:
+        result = await db.execute(text(f"""
+            DELETE FROM {name} v
+            USING (
+                SELECT id, row_number() OVER (
+                    PARTITION BY player_id, format, date_trunc('week', date_updated)
+                    ORDER BY date_updated DESC, id DESC
+                ) AS position
+                FROM {name}
+            ) ranked
+            WHERE v.id = ranked.id AND ranked.position > 1
+        """))
+        await db.execute(
+            update(PlayerValuePartition)
+            .where(PlayerValuePartition.name == name)
+            .values(downsampled_at=func.now())
+        )
+        removed += result.rowcount
+        # One transaction per partition keeps locks and WAL bursts short.
+        await db.commit()
+    return removed
+
+async def get_value_history(db: AsyncSession, player_id: int, league_format: str, weeks: int = 52) -> PlayerValueHistory:
+    """
+    A player's weekly value trend for the last `weeks` weeks, from the rollup.
+    Weeks without a recorded change repeat the previous value, so the series
+    has one point per week from the first known value onwards.
+    """
+    current_week = week_start(date.today())
+    since = current_week - timedelta(weeks=weeks - 1)
+    rows = (await db.scalars(
+        select(PlayerValueWeekly).where(
+            PlayerValueWeekly.player_id == player_id,
+            PlayerValueWeekly.format == league_format,
+            PlayerValueWeekly.week_start >= since,
+        ).order_by(PlayerValueWeekly.week_start)
+    )).all()
+    previous = await db.scalar(
+        select(PlayerValueWeekly.value).where(
+            PlayerValueWeekly.player_id == player_id,
+            PlayerValueWeekly.format == league_format,
+            PlayerValueWeekly.week_start < since,
+        ).order_by(PlayerValueWeekly.week_start.desc()).limit(1)
+    )
+
+    by_week = {row.week_start: row for row in rows}
+    points = []
+    carried = previous
+    week = since
+    while week <= current_week:
+        row = by_week.get(week)
+        if row is not None:
+            points.append(ValuePoint(week_start=week, value=row.value, low=row.low, high=row.high))
+            carried = row.value
+        elif carried is not None:
+            points.append(ValuePoint(week_start=week, value=carried, low=carried, high=carried))
+        week += timedelta(weeks=1)
+    return PlayerValueHistory(player_id=player_id, format=league_format, points=points)
@@ -0,0 +1,151 @@
+"""
+Process-local index of each player's latest value per scoring format.
+
+The trade analyzer reads from here instead of running the "latest value per
+player" GROUP BY for every trade. Each format keeps compact parallel arrays
+(values and position codes) plus a player_id -> slot dict; names are kept in a
+plain list. The index is versioned: a full rebuild swaps in new arrays in one
+assignment, and a value sync patches changed entries in place.
+
+Freshness across processes (e.g. the seeding script syncing values while the
+API runs) is tracked with a cheap marker, max(player_values.id), which the
+API's refresh loop compares before deciding to rebuild.
+"""
+import asyncio
+import logging
+from array import array
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.player import Player, PlayerValue, PlayerValueLatest, Position
+from app.schemas.trade import PlayerTradeInfo
+
+logger = logging.getLogger(__name__)
+
+POSITIONS: Tuple[Position, ...] = tuple(Position)
+_POSITION_CODES = {position: code for code, position in enumerate(POSITIONS)}
+
+# (player_id, format, value, name, position)
+ValueRow = Tuple[int, str, int, str, Position]
+
+@dataclass
+class _FormatIndex:
+    slots: Dict[int, int] = field(default_factory=dict)
+    values: array = field(default_factory=lambda: array("q"))
+    positions: array = field(default_factory=lambda: array("b"))
+    names: List[str] = field(default_factory=list)
+
+    def put(self, player_id: int, value: int, name: str, position: Position) -> None:
+        slot = self.slots.get(player_id)
+        if slot is None:
+            self.slots[player_id] = len(self.values)
+            self.values.append(value)
+            self.positions.append(_POSITION_CODES[position])
+            self.names.append(name)
+        else:
+            self.values[slot] = value
+            self.positions[slot] = _POSITION_CODES[position]
+            self.names[slot] = name
+
+def _latest_values_query():
+    """Latest value per (player, format) joined with the player's name and position."""
+    return (
+        select(PlayerValueLatest.player_id, PlayerValueLatest.format, PlayerValueLatest.value, Player.name, Player.position)
+        .join(Player, Player.id == PlayerValueLatest.player_id)
+    )
+
+def _marker_query():
+    return select(func.max(PlayerValue.id))
+
+class PlayerValueIndex:
+    def __init__(self):
+        self._formats: Dict[str, _FormatIndex] = {}
+        self.version = 0
+        self.marker: Optional[int] = None
+        self.loaded = False
+
+    def replace(self, rows: Iterable[ValueRow], marker: Optional[int] = None) -> None:
+        """Rebuilds the whole index from rows and swaps it in atomically."""
+        formats: Dict[str, _FormatIndex] = {}
+        for player_id, league_format, value, name, position in rows:
+            formats.setdefault(league_format, _FormatIndex()).put(player_id, value, name, position)
+        self._formats = formats
+        self.marker = marker
+        self.version += 1
+        self.loaded = True
+
+    def patch(self, rows: Iterable[ValueRow], marker: Optional[int] = None) -> None:
+        """Applies newer values (e.g. from a finished value sync) in place."""
+        for player_id, league_format, value, name, position in rows:
+            self._formats.setdefault(league_format, _FormatIndex()).put(player_id, value, name, position)
+        if marker is not None:
+            self.marker = marker
+        self.version += 1
+
+    def lookup(self, player_ids: Sequence[int], league_format: str) -> List[PlayerTradeInfo]:
+        """Returns the players that have a value in this format, in request order."""
+        index = self._formats.get(league_format)
+        if index is None:
+            return []
+        players = []
+        for player_id in dict.fromkeys(player_ids):
+            slot = index.slots.get(player_id)
+            if slot is not None:
+                players.append(PlayerTradeInfo(
+                    player_id=player_id,
+                    name=index.names[slot],
+                    position=POSITIONS[index.positions[slot]].value,
+                    value=index.values[slot],
+                ))
+        return players
+
+    async def refresh(self, db: AsyncSession) -> bool:
+        """Rebuilds from the database if player_values changed since the last load."""
+        marker = (await db.execute(_marker_query())).scalar()
+        if self.loaded and marker == self.marker:
+            return False
+        self.replace((await db.execute(_latest_values_query())).all(), marker)
+        return True
+
+    async def patch_players(self, db: AsyncSession, values: Iterable[Tuple[int, str, int]]) -> None:
+        """Patches (player_id, format, value) entries, loading names/positions in one query."""
+        values = list(values)
+        if not self.loaded or not values:
+            # Nothing to patch until the index has been built in this process.
+            return
+        player_ids = {player_id for player_id, _, _ in values}
+        players = {
+            player_id: (name, position)
+            for player_id, name, position in await db.execute(
+                select(Player.id, Player.name, Player.position).where(Player.id.in_(player_ids))
+            )
+        }
+        marker = (await db.execute(_marker_query())).scalar()
+        self.patch(
+            ((player_id, league_format, value, *players[player_id])
+             for player_id, league_format, value in values if player_id in players),
+            marker,
+        )
+
+player_value_index = PlayerValueIndex()
+
+async def run_index_refresh(session_factory) -> None:
+    """
+    Background loop (started by the app lifespan): every
+    PLAYER_VALUE_INDEX_REFRESH_SECONDS, loads the index or rebuilds it if the
+    freshness marker moved. The first load waits one interval so startup stays
+    cheap; until then trades are valued with SQL.
+    """
+    while True:
+        await asyncio.sleep(settings.PLAYER_VALUE_INDEX_REFRESH_SECONDS)
+        try:
+            async with session_factory() as db:
+                rebuilt = await player_value_index.refresh(db)
+            if rebuilt:
+                logger.info(f"Player value index rebuilt (version {player_value_index.version}).")
+        except Exception as e:
+            logger.error(f"Player value index refresh failed: {e!r}")
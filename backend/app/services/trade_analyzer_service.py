@@ -1,71 +1,109 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List
 
-from ..models.player import Player, PlayerValue
+import numpy as np
+
+from ..models.player import Player, PlayerValueLatest
 from ..schemas.trade import TradeRequest, TradeAnalysis, TradeSideAnalysis, PlayerTradeInfo
+from .player_value_index import player_value_index
+
+# Percentage-difference bands, relative to the average value of the two sides.
+BALANCED_BAND = 3
+CLEAR_BAND = 10
+
+# Recommendation codes, indexes into RECOMMENDATIONS.
+NO_VALUE, FREE_VALUE, GIVEAWAY, CLEAR_ACCEPT, ACCEPT, CLEAR_DECLINE, DECLINE, BALANCED = range(8)
+RECOMMENDATIONS = (
+    "Cannot analyze a trade with players of zero value.",
+    "You are receiving value for nothing. Accept this trade.",
+    "You are giving away value for nothing. Decline this trade.",
+    "This trade is heavily in your favor. It's a clear accept.",
+    "This trade looks favorable for you. Recommended to accept.",
+    "This trade is heavily against you. It's a clear decline.",
+    "This trade is not in your favor. Recommended to decline or renegotiate.",
+    "This trade appears to be fairly balanced.",
+)
 
-def get_player_values(db: Session, player_ids: List[int], league_format: str) -> List[PlayerTradeInfo]:
+async def get_player_values(db: AsyncSession, player_ids: List[int], league_format: str) -> List[PlayerTradeInfo]:
+    """Latest values for the given players, from the in-memory index once it has been loaded."""
     if not player_ids:
         return []
-    
-    subquery = db.query(
-        PlayerValue.player_id,
-        func.max(PlayerValue.date_updated).label('max_date')
-    ).filter(
-        PlayerValue.player_id.in_(player_ids),
-        PlayerValue.format == league_format
-    ).group_by(PlayerValue.player_id).subquery()
-
-    results = db.query(
-        Player.id,
-        Player.name,
-        Player.position,
-        PlayerValue.value
-    ).join(
-        PlayerValue, Player.id == PlayerValue.player_id
-    ).join(
-        subquery,
-        (PlayerValue.player_id == subquery.c.player_id) &
-        (PlayerValue.date_updated == subquery.c.max_date)
-    ).filter(
-        PlayerValue.format == league_format
-    ).all()
-    
+    if player_value_index.loaded:
+        return player_value_index.lookup(player_ids, league_format)
+    return await _query_player_values(db, player_ids, league_format)
+
+async def _query_player_values(db: AsyncSession, player_ids: List[int], league_format: str) -> List[PlayerTradeInfo]:
+    results = (await db.execute(
+        select(
+            Player.id,
+            Player.name,
+            Player.position,
+            PlayerValueLatest.value
+        ).join(
+            PlayerValueLatest, Player.id == PlayerValueLatest.player_id
+        ).where(
+            PlayerValueLatest.player_id.in_(player_ids),
+            PlayerValueLatest.format == league_format
+        )
+    )).all()
+
     return [
         PlayerTradeInfo(player_id=r.id, name=r.name, position=r.position.value, value=r.value)
         for r in results
     ]
 
-def analyze_trade(db: Session, trade_request: TradeRequest) -> TradeAnalysis:
-    my_players_info = get_player_values(db, trade_request.my_player_ids, trade_request.league_format)
-    their_players_info = get_player_values(db, trade_request.their_player_ids, trade_request.league_format)
+def percentage_difference(my_total_value, their_total_value):
+    """Value difference as a percentage of the average side value (scalars or arrays)."""
+    average_trade_value = (my_total_value + their_total_value) / 2
+    return ((my_total_value - their_total_value) / average_trade_value) * 100
+
+def _recommendation_code(my_total_value: int, their_total_value: int) -> int:
+    if my_total_value == 0 and their_total_value == 0:
+        return NO_VALUE
+    if my_total_value == 0 and their_total_value > 0:
+        return FREE_VALUE
+    if their_total_value == 0 and my_total_value > 0:
+        return GIVEAWAY
+
+    percentage_diff = percentage_difference(my_total_value, their_total_value)
+    if percentage_diff > CLEAR_BAND:
+        return CLEAR_ACCEPT
+    if percentage_diff > BALANCED_BAND:
+        return ACCEPT
+    if percentage_diff < -CLEAR_BAND:
+        return CLEAR_DECLINE
+    if percentage_diff < -BALANCED_BAND:
+        return DECLINE
+    return BALANCED
+
+def _recommendation_codes(my_totals: np.ndarray, their_totals: np.ndarray) -> np.ndarray:
+    """Vectorised _recommendation_code over arrays of side totals."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        percentage_diff = percentage_difference(my_totals, their_totals)
+    return np.select(
+        [
+            (my_totals == 0) & (their_totals == 0),
+            my_totals == 0,
+            their_totals == 0,
+            percentage_diff > CLEAR_BAND,
+            percentage_diff > BALANCED_BAND,
+            percentage_diff < -CLEAR_BAND,
+            percentage_diff < -BALANCED_BAND,
+        ],
+        [NO_VALUE, FREE_VALUE, GIVEAWAY, CLEAR_ACCEPT, ACCEPT, CLEAR_DECLINE, DECLINE],
+        default=BALANCED,
+    )
+
+async def analyze_trade(db: AsyncSession, trade_request: TradeRequest) -> TradeAnalysis:
+    my_players_info = await get_player_values(db, trade_request.my_player_ids, trade_request.league_format)
+    their_players_info = await get_player_values(db, trade_request.their_player_ids, trade_request.league_format)
 
     my_total_value = sum(p.value for p in my_players_info)
     their_total_value = sum(p.value for p in their_players_info)
 
     value_difference = my_total_value - their_total_value
-    
-    if my_total_value == 0 and their_total_value == 0:
-        recommendation = "Cannot analyze a trade with players of zero value."
-    elif my_total_value == 0 and their_total_value > 0:
-        recommendation = "You are receiving value for nothing. Accept this trade."
-    elif their_total_value == 0 and my_total_value > 0:
-        recommendation = "You are giving away value for nothing. Decline this trade."
-    else:
-        average_trade_value = (my_total_value + their_total_value) / 2
-        percentage_diff = (value_difference / average_trade_value) * 100
-
-        if percentage_diff > 10:
-            recommendation = "This trade is heavily in your favor. It's a clear accept."
-        elif percentage_diff > 3:
-            recommendation = "This trade looks favorable for you. Recommended to accept."
-        elif percentage_diff < -10:
-            recommendation = "This trade is heavily against you. It's a clear decline."
-        elif percentage_diff < -3:
-            recommendation = "This trade is not in your favor. Recommended to decline or renegotiate."
-        else:
-            recommendation = "This trade appears to be fairly balanced."
+    recommendation = RECOMMENDATIONS[_recommendation_code(my_total_value, their_total_value)]
 
     my_side = TradeSideAnalysis(players=my_players_info, total_value=my_total_value)
     their_side = TradeSideAnalysis(players=their_players_info, total_value=their_total_value)
@@ -76,3 +114,58 @@ def analyze_trade(db: Session, trade_request: TradeRequest) -> TradeAnalysis:
         recommendation=recommendation,
         value_difference=value_difference
     )
+
+async def analyze_trades(db: AsyncSession, trade_requests: List[TradeRequest]) -> List[TradeAnalysis]:
+    """
+    Scores many trades at once, returning analyses in input order. Values are
+    loaded once per format for every distinct player, side totals are summed
+    with np.bincount over flattened (side, player) slots, and recommendations
+    are bucketed in one vectorised pass. Results match analyze_trade.
+
+    Over SQL this is ~30x faster than looping analyze_trade; with the value
+    index loaded it is only ~2x, since building the result models per trade
+    then costs as much as the rest (see benchmark_trade_analyzer).
+    """
+    if not trade_requests:
+        return []
+
+    players_by_format: Dict[str, Dict[int, PlayerTradeInfo]] = {}
+    for trade in trade_requests:
+        player_ids = players_by_format.setdefault(trade.league_format, {})
+        player_ids.update(dict.fromkeys(trade.my_player_ids))
+        player_ids.update(dict.fromkeys(trade.their_player_ids))
+    for league_format, players in players_by_format.items():
+        players.update((p.player_id, p) for p in await get_player_values(db, list(players), league_format))
+
+    # Side 2*i is trade i's "my" side, 2*i + 1 its "their" side; duplicate ids
+    # within a side count once, as they do in analyze_trade.
+    sides: List[List[PlayerTradeInfo]] = []
+    side_slots: List[int] = []
+    slot_values: List[int] = []
+    for trade in trade_requests:
+        players = players_by_format[trade.league_format]
+        for player_ids in (trade.my_player_ids, trade.their_player_ids):
+            side = [players[i] for i in dict.fromkeys(player_ids) if players[i] is not None]
+            side_slots.extend([len(sides)] * len(side))
+            slot_values.extend(p.value for p in side)
+            sides.append(side)
+
+    totals = np.bincount(
+        np.asarray(side_slots, dtype=np.intp),
+        weights=np.asarray(slot_values, dtype=np.float64),
+        minlength=len(sides),
+    ).astype(np.int64)
+    my_totals, their_totals = totals[0::2], totals[1::2]
+    codes = _recommendation_codes(my_totals, their_totals)
+    differences = my_totals - their_totals
+
+    # Inputs were validated on the way in, so skip re-validating every result.
+    return [
+        TradeAnalysis.model_construct(
+            my_side=TradeSideAnalysis.model_construct(players=sides[2 * i], total_value=int(my_totals[i])),
+            their_side=TradeSideAnalysis.model_construct(players=sides[2 * i + 1], total_value=int(their_totals[i])),
+            recommendation=RECOMMENDATIONS[codes[i]],
+            value_difference=int(differences[i]),
+        )
+        for i in range(len(trade_requests))
+    ]
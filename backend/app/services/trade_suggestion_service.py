@@ -0,0 +1,118 @@
+import heapq
+import time
+from bisect import bisect_left, bisect_right
+from itertools import combinations, count
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import settings
+from ..models.team import roster_association
+from ..schemas.trade import PlayerTradeInfo, TradeSuggestion, TradeSuggestions
+from .trade_analyzer_service import BALANCED_BAND, get_player_values, percentage_difference
+
+# (players given, players received) package shapes that are searched.
+SHAPES = ((1, 1), (2, 1), (1, 2), (2, 2))
+
+Package = Tuple[int, Tuple[PlayerTradeInfo, ...]]
+
+def _packages(players: Sequence[PlayerTradeInfo], size: int) -> List[Package]:
+    """Every `size`-player package with its total value, sorted by total."""
+    packages = [(sum(p.value for p in combo), combo) for combo in combinations(players, size)]
+    packages.sort(key=lambda package: package[0])
+    return packages
+
+def _balanced_window(my_total: int, band: float) -> Tuple[float, float]:
+    """
+    Range of their totals r for which |percentage_difference(my_total, r)| <= band.
+    With k = band / 200 that is my_total * (1 - k) / (1 + k) <= r <= my_total * (1 + k) / (1 - k).
+    """
+    k = band / 200
+    return my_total * (1 - k) / (1 + k), my_total * (1 + k) / (1 - k)
+
+def find_balanced_trades(
+    my_players: Sequence[PlayerTradeInfo],
+    their_players: Sequence[PlayerTradeInfo],
+    limit: int = 20,
+    time_budget: Optional[float] = None,
+) -> TradeSuggestions:
+    """
+    Finds up to `limit` packages that analyze_trade would call fairly balanced,
+    most balanced first (larger trades win ties).
+
+    Packages on each side are sorted by total value, so for a given package of
+    mine the acceptable packages of theirs form one contiguous slice, found by
+    bisecting. My packages are visited in increasing total, so the slice's
+    lower edge only moves forward. Once `limit` suggestions are held in a
+    min-heap, the band narrows to the worst one kept, shrinking later slices.
+    """
+    deadline = time.perf_counter() + (settings.TRADE_SUGGESTION_TIME_BUDGET if time_budget is None else time_budget)
+    my_players = [p for p in my_players if p.value > 0]
+    their_players = [p for p in their_players if p.value > 0]
+    my_packages = {size: _packages(my_players, size) for size in (1, 2)}
+    their_packages = {size: _packages(their_players, size) for size in (1, 2)}
+    their_totals = {size: [total for total, _ in packages] for size, packages in their_packages.items()}
+
+    # Heap items: (-|percentage difference|, combined value, tie-breaker, mine, theirs);
+    # best[0] is the worst suggestion kept.
+    best: list = []
+    tie_breaker = count()
+    complete = True
+    for my_size, their_size in SHAPES:
+        totals, packages = their_totals[their_size], their_packages[their_size]
+        start = 0
+        for my_total, my_combo in my_packages[my_size]:
+            if time.perf_counter() > deadline:
+                complete = False
+                break
+            band = BALANCED_BAND if len(best) < limit else -best[0][0]
+            low, high = _balanced_window(my_total, band)
+            # Widen by one to absorb float rounding; the exact check is below.
+            start = bisect_left(totals, low - 1, start)
+            end = bisect_right(totals, high + 1, start)
+            for their_total, their_combo in packages[start:end]:
+                imbalance = abs(percentage_difference(my_total, their_total))
+                if imbalance > band:
+                    continue
+                item = (-imbalance, my_total + their_total, next(tie_breaker), my_combo, their_combo)
+                if len(best) < limit:
+                    heapq.heappush(best, item)
+                elif item[:2] > best[0][:2]:
+                    heapq.heapreplace(best, item)
+        if not complete:
+            break
+
+    suggestions = []
+    for _, _, _, my_combo, their_combo in sorted(best, key=lambda item: item[:2], reverse=True):
+        my_total = sum(p.value for p in my_combo)
+        their_total = sum(p.value for p in their_combo)
+        suggestions.append(TradeSuggestion(
+            my_players=list(my_combo),
+            their_players=list(their_combo),
+            my_total_value=my_total,
+            their_total_value=their_total,
+            value_difference=my_total - their_total,
+            percentage_difference=round(percentage_difference(my_total, their_total), 2),
+        ))
+    return TradeSuggestions(suggestions=suggestions, complete=complete)
+
+async def get_roster_player_ids(db: AsyncSession, team_ids: Sequence[int]) -> Dict[int, List[int]]:
+    rows = (await db.execute(
+        select(roster_association.c.team_id, roster_association.c.player_id)
+        .where(roster_association.c.team_id.in_(team_ids))
+    )).all()
+    rosters: Dict[int, List[int]] = {team_id: [] for team_id in team_ids}
+    for team_id, player_id in rows:
+        rosters[team_id].append(player_id)
+    return rosters
+
+async def suggest_trades(
+    db: AsyncSession, my_team_id: int, their_team_id: int, league_format: str, limit: int = 20
+) -> TradeSuggestions:
+    rosters = await get_roster_player_ids(db, [my_team_id, their_team_id])
+    return find_balanced_trades(
+        await get_player_values(db, rosters[my_team_id], league_format),
+        await get_player_values(db, rosters[their_team_id], league_format),
+        limit=limit,
+    )
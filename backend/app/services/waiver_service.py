@@ -1,62 +1,62 @@
-from typing import List
-import xml.etree.ElementTree as ET
-from backend.app.services import yahoo_api
-from backend.app.schemas.waiver import WaiverPlayer
+from typing import AsyncIterator, List
+from app.core.cache import Loader, create_cache
+from app.core.config import settings
+from app.core.db import SessionLocal
+from app.services import yahoo_api, yahoo_service
+from app.schemas.waiver import WaiverPlayer
 
-# The namespace is required to parse Yahoo's XML response correctly.
-YAHOO_NAMESPACE = {'y': 'http://fantasysports.yahooapis.com/fantasy/v2/base.rng'}
+# Waiver/free-agent lists move every few minutes and are the same for every
+# manager in a league, so entries are keyed by league and status only. Callers
+# must check that the user is in the league first (deps.get_league_access_token).
+waiver_cache = create_cache("waivers", settings.WAIVER_CACHE_TTL, settings.WAIVER_CACHE_STALE_TTL)
 
-def _parse_player_element(player_element: ET.Element) -> WaiverPlayer:
-    """
-    Parses a single player XML element and returns a WaiverPlayer schema object.
-    """
-    def find_text(tag: str) -> str:
-        element = player_element.find(f'y:{tag}', YAHOO_NAMESPACE)
-        return element.text if element is not None else ''
+async def _fetch_waiver_players(access_token: str, league_key: str, status: str) -> List[WaiverPlayer]:
+    players: List[WaiverPlayer] = []
+    async for page in yahoo_api.iter_league_players(access_token, league_key, status=status):
+        players.extend(page)
+    return players
 
-    def find_nested_text(parent_tag: str, child_tag: str) -> str:
-        parent = player_element.find(f'y:{parent_tag}', YAHOO_NAMESPACE)
-        if parent is not None:
-            child = parent.find(f'y:{child_tag}', YAHOO_NAMESPACE)
-            return child.text if child is not None else ''
-        return ''
+def _refresher(user_id: int, league_key: str, status: str) -> Loader:
+    async def refresh() -> List[WaiverPlayer]:
+        # Background refreshes outlive the request, so they look up a current
+        # token for the user who triggered them with their own session.
+        async with SessionLocal() as session:
+            access_token = await yahoo_service.get_refreshed_token(session, user_id=user_id)
+        return await _fetch_waiver_players(access_token, league_key, status)
+    return refresh
 
-    eligible_positions = [
-        pos.text for pos in player_element.findall('.//y:eligible_positions/y:position', YAHOO_NAMESPACE)
-        if pos.text is not None
-    ]
-    
-    percent_owned_text = find_nested_text('percent_owned', 'value')
+async def iter_waiver_players(
+    access_token: str, user_id: int, league_key: str, status: str = "W"
+) -> AsyncIterator[WaiverPlayer]:
+    """
+    Streams available players for a league as WaiverPlayer objects. Cached
+    lists are replayed directly; otherwise players from the first Yahoo page
+    are yielded while later pages are still in flight, and the complete list
+    is cached once the last page arrives.
+    """
+    cache_key = f"{league_key}:{status}"
+    cached = await waiver_cache.get(cache_key, refresh=_refresher(user_id, league_key, status))
+    if cached is not None:
+        for player in cached:
+            yield player
+        return
 
-    return WaiverPlayer(
-        player_key=find_text('player_key'),
-        player_id=find_text('player_id'),
-        full_name=find_nested_text('name', 'full'),
-        editorial_team_abbr=find_text('editorial_team_abbr'),
-        display_position=find_text('display_position'),
-        eligible_positions=eligible_positions,
-        image_url=find_nested_text('headshot', 'url'),
-        percent_owned=int(percent_owned_text) if percent_owned_text else 0
-    )
+    players: List[WaiverPlayer] = []
+    async for page in yahoo_api.iter_league_players(access_token, league_key, status=status):
+        players.extend(page)
+        for player in page:
+            yield player
+    await waiver_cache.set(cache_key, players)
 
-def process_waiver_data(access_token: str, league_key: str) -> List[WaiverPlayer]:
+async def process_waiver_data(
+    access_token: str, user_id: int, league_key: str, status: str = "W"
+) -> List[WaiverPlayer]:
     """
-    Fetches waiver wire players from the Yahoo API and transforms the data
-    into a list of WaiverPlayer objects.
+    Fetches every page of available players from the Yahoo API (or the cache)
+    and transforms the data into a list of WaiverPlayer objects.
     """
-    # 1. Call the yahoo_api service to get raw player data
-    raw_player_elements = yahoo_api.get_waiver_wire_players(access_token, league_key)
-    
-    # 2. Transform the raw XML elements into a list of Pydantic objects
-    waiver_players = []
-    for player_element in raw_player_elements:
-        try:
-            player_data = _parse_player_element(player_element)
-            waiver_players.append(player_data)
-        except (ValueError, TypeError) as e:
-            # Log the error for the specific player and continue
-            # In a real app, you'd use a proper logger.
-            print(f"Skipping player due to parsing error: {e}")
-            continue
-            
-    return waiver_players
+    return await waiver_cache.get_or_load(
+        f"{league_key}:{status}",
+        lambda: _fetch_waiver_players(access_token, league_key, status),
+        refresh=_refresher(user_id, league_key, status),
+    )
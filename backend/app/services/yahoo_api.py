@@ -1,52 +1,232 @@
-import requests
+import asyncio
+import hashlib
+import logging
+import math
+import time
 import xml.etree.ElementTree as ET
-from typing import List, Optional
+from collections import deque
+from typing import AsyncIterator, Deque, Dict, List, Optional, TypeVar
+
+import httpx
 from fastapi import HTTPException
 
+from app.core.config import settings
+from app.core.http import get_yahoo_api_client
+from app.core.metrics import yahoo_request_duration, yahoo_request_errors
+from app.core.request_scheduler import backoff_delay, create_scheduler
+from app.core.singleflight import create_group
+from app.core.tracing import add_span, span
+from app.schemas.league import YahooLeagueSettings, YahooTeam
+from app.schemas.waiver import WaiverPlayer
+from app.schemas.yahoo_token import YahooLeague
+from app.services.yahoo_xml import (
+    YahooXmlStream, league_settings_stream, league_stream, team_roster_stream, waiver_player_stream,
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
 YAHOO_API_BASE_URL = "https://fantasysports.yahooapis.com/fantasy/v2"
 
-def _make_api_request(url: str, access_token: str) -> ET.Element:
+# Player availability filters: W = on waivers, FA = free agents, A = all available.
+PLAYER_STATUSES = ("W", "FA", "A")
+# Yahoo never returns more than 25 players per page of a players collection.
+PLAYERS_PAGE_SIZE = 25
+
+# Every Fantasy API call from this worker goes through one scheduler: a cap on
+# calls in flight, token buckets for the app and for each user, and priority
+# lanes so page loads go ahead of background refreshes and syncs.
+scheduler = create_scheduler(
+    "yahoo_api",
+    max_concurrent=settings.YAHOO_MAX_CONCURRENT_REQUESTS,
+    app_rate=settings.YAHOO_RATE_LIMIT_APP_RPS,
+    app_burst=settings.YAHOO_RATE_LIMIT_APP_BURST,
+    user_rate=settings.YAHOO_RATE_LIMIT_USER_RPS,
+    user_burst=settings.YAHOO_RATE_LIMIT_USER_BURST,
+)
+_in_flight = create_group("yahoo_api")
+
+# Yahoo's throttling responses: 999 when the app is over its limit, 429 when a
+# user is.
+APP_THROTTLED = 999
+USER_THROTTLED = 429
+
+class YahooThrottled(Exception):
+    def __init__(self, status_code: int, retry_after: Optional[float]):
+        super().__init__(f"Yahoo throttled the request ({status_code})")
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+def _token_key(access_token: str) -> str:
+    return hashlib.sha256(access_token.encode()).hexdigest()[:16]
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return None
+
+async def _make_api_request(endpoint: str, url: str, access_token: str, stream: YahooXmlStream[T]) -> List[T]:
+    """
+    Makes a request to the Yahoo Fantasy API, coalescing identical in-flight calls.
+
+    Calls are keyed on the URL and the access token, never the URL alone: Yahoo
+    decides whether a token may read a league, so a caller must not join a call
+    made with someone else's token. Coalesced callers share one upstream
+    request and one parsed (read-only) result. `endpoint` names the resource in
+    metrics (the URL carries user and league keys).
+    """
+    return await _in_flight.do(
+        (url, _token_key(access_token)), lambda: _fetch_and_parse(endpoint, url, access_token, stream)
+    )
+
+async def _fetch_and_parse(endpoint: str, url: str, access_token: str, stream: YahooXmlStream[T]) -> List[T]:
     """
-    Makes a request to the Yahoo Fantasy API.
+    Makes a request to the Yahoo Fantasy API and parses the body as it streams in.
+
+    Throttled responses are retried up to YAHOO_THROTTLE_RETRIES times after
+    a jittered exponential backoff. The backoff is applied to the scheduler's
+    app or user bucket, so other queued calls wait it out too. The whole call,
+    including queueing and retries, is bounded by YAHOO_REQUEST_DEADLINE;
+    cancelling the caller aborts the upstream request.
     """
     headers = {"Authorization": f"Bearer {access_token}"}
+    user_key = _token_key(access_token)
     try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        
-        # Yahoo's API returns XML, so we parse it.
-        return ET.fromstring(response.content)
-    except requests.exceptions.RequestException as e:
+        async with asyncio.timeout(settings.YAHOO_REQUEST_DEADLINE):
+            for attempt in range(settings.YAHOO_THROTTLE_RETRIES + 1):
+                try:
+                    return await _fetch_once(endpoint, url, headers, user_key, stream)
+                except YahooThrottled as e:
+                    delay = backoff_delay(
+                        attempt, settings.YAHOO_BACKOFF_BASE, settings.YAHOO_BACKOFF_MAX, e.retry_after
+                    )
+                    scheduler.throttled(user_key, delay, app_wide=e.status_code == APP_THROTTLED)
+            yahoo_request_errors.inc(endpoint, "rate_limited")
+            raise HTTPException(
+                status_code=503,
+                detail="Yahoo is rate limiting requests, please retry shortly.",
+                headers={"Retry-After": str(math.ceil(delay))},
+            )
+    except (TimeoutError, httpx.TimeoutException):
+        yahoo_request_errors.inc(endpoint, "timeout")
+        raise HTTPException(status_code=504, detail="Timed out contacting Yahoo API.")
+    except httpx.HTTPError as e:
         # In a real app, you'd have more robust error handling and logging
+        yahoo_request_errors.inc(endpoint, "transport")
         raise HTTPException(status_code=400, detail=f"Error contacting Yahoo API: {e}")
     except ET.ParseError as e:
+        yahoo_request_errors.inc(endpoint, "parse")
         raise HTTPException(status_code=500, detail=f"Error parsing Yahoo API response: {e}")
 
-def get_user_leagues(access_token: str) -> ET.Element:
+async def _fetch_once(
+    endpoint: str, url: str, headers: Dict[str, str], user_key: str, stream: YahooXmlStream[T]
+) -> List[T]:
     """
-    Fetches all fantasy football leagues for the authenticated user.
-    This is a placeholder for existing functionality.
+    One attempt: waits for the scheduler, then streams and parses the response.
+    Latency is recorded from when the scheduler admits the call until the body
+    is parsed. Traces get the wait (yahoo.queue), the exchange (yahoo.get,
+    including the parsing interleaved with the download) and the parsing
+    share of it (yahoo.parse).
     """
+    results: List[T] = []
+    queued = time.perf_counter()
+    async with scheduler.slot(user_key):
+        started = time.perf_counter()
+        add_span("yahoo.queue", started - queued, endpoint=endpoint)
+        parsing = 0.0
+        try:
+            with span("yahoo.get", endpoint=endpoint) as attributes:
+                async with get_yahoo_api_client().stream("GET", url, headers=headers) as response:
+                    attributes["status"] = response.status_code
+                    # httpx does not count 999 as an error status.
+                    if response.is_error or response.status_code == APP_THROTTLED:
+                        await response.aread()
+                        yahoo_request_errors.inc(endpoint, str(response.status_code))
+                        if response.status_code in (APP_THROTTLED, USER_THROTTLED):
+                            logger.warning(f"Yahoo API throttled {url} ({response.status_code})")
+                            raise YahooThrottled(response.status_code, _retry_after(response))
+                        logger.error(f"Yahoo API returned {response.status_code} for {url}: {response.text}")
+                        raise HTTPException(status_code=response.status_code, detail="Error fetching data from Yahoo.")
+                    # Yahoo's API returns XML; objects are built as each element closes.
+                    async for chunk in response.aiter_bytes():
+                        parse_started = time.perf_counter()
+                        results.extend(stream.feed(chunk))
+                        parsing += time.perf_counter() - parse_started
+            parse_started = time.perf_counter()
+            results.extend(stream.close())
+            parsing += time.perf_counter() - parse_started
+            return results
+        finally:
+            yahoo_request_duration.observe(time.perf_counter() - started, endpoint)
+            add_span("yahoo.parse", parsing, endpoint=endpoint)
+
+async def get_user_leagues(access_token: str) -> List[YahooLeague]:
+    """Fetches all fantasy football leagues for the authenticated user."""
     url = f"{YAHOO_API_BASE_URL}/users;use_login=1/games;game_keys=nfl/leagues"
-    return _make_api_request(url, access_token)
-
-def get_waiver_wire_players(access_token: str, league_key: str) -> List[ET.Element]:
-    """
-    Fetches players available on the waiver wire for a specific league.
-    
-    The 'status=W' filter gets players currently on waivers.
-    You could also use 'status=FA' for free agents or 'status=A' for all available.
-    """
-    # We can fetch sub-resources like editorial_player_key, and percent_owned
-    # to avoid making individual requests for each player later.
-    url = f"{YAHOO_API_BASE_URL}/league/{league_key}/players;status=W/stats"
-    
-    root = _make_api_request(url, access_token)
-    
-    # XML from Yahoo API has namespaces, which we need to handle.
-    namespace = {'y': 'http://fantasysports.yahooapis.com/fantasy/v2/base.rng'}
-    
-    # Find all 'player' elements within the XML structure.
-    players = root.findall('.//y:player', namespace)
-    
-    return players
+    return await _make_api_request("user_leagues", url, access_token, league_stream())
+
+async def get_league_settings(access_token: str, league_key: str) -> YahooLeagueSettings:
+    """Fetches a league's metadata and scoring settings."""
+    url = f"{YAHOO_API_BASE_URL}/league/{league_key}/settings"
+    leagues = await _make_api_request("league_settings", url, access_token, league_settings_stream())
+    if not leagues:
+        raise HTTPException(status_code=502, detail="Yahoo returned no league settings.")
+    return leagues[0]
+
+async def get_league_rosters(access_token: str, league_key: str) -> List[YahooTeam]:
+    """Fetches every team in a league with its current roster, in one call."""
+    url = f"{YAHOO_API_BASE_URL}/league/{league_key}/teams/roster"
+    return await _make_api_request("league_rosters", url, access_token, team_roster_stream())
+
+async def _get_players_page(access_token: str, league_key: str, status: str, start: int) -> List[WaiverPlayer]:
+    """Fetches one page of a league's players collection, with stats."""
+    url = (
+        f"{YAHOO_API_BASE_URL}/league/{league_key}/players;status={status};"
+        f"start={start};count={PLAYERS_PAGE_SIZE}/stats"
+    )
+    return await _make_api_request("league_players", url, access_token, waiver_player_stream())
+
+async def iter_league_players(
+    access_token: str,
+    league_key: str,
+    status: str = "A",
+    max_concurrent_pages: Optional[int] = None,
+) -> AsyncIterator[List[WaiverPlayer]]:
+    """
+    Yields every page of a league's players with the given status, in order.
+
+    Yahoo does not report the collection size up front, so up to
+    `max_concurrent_pages` pages are kept in flight and a new one is requested
+    each time the oldest completes; the first short page ends the collection
+    and any requests already issued past it are cancelled.
+    """
+    if status not in PLAYER_STATUSES:
+        raise ValueError(f"Unsupported player status {status!r}; expected one of {PLAYER_STATUSES}.")
+    window = max(1, max_concurrent_pages or settings.YAHOO_MAX_CONCURRENT_PAGES)
+
+    in_flight: Deque[asyncio.Task] = deque()
+    next_start = 0
+
+    def request_next_page():
+        nonlocal next_start
+        in_flight.append(asyncio.ensure_future(
+            _get_players_page(access_token, league_key, status, next_start)
+        ))
+        next_start += PLAYERS_PAGE_SIZE
+
+    try:
+        for _ in range(window):
+            request_next_page()
+        while in_flight:
+            page = await in_flight.popleft()
+            if page:
+                yield page
+            if len(page) < PLAYERS_PAGE_SIZE:
+                break
+            request_next_page()
+    finally:
+        for task in in_flight:
+            task.cancel()
+        await asyncio.gather(*in_flight, return_exceptions=True)
@@ -1,27 +1,41 @@
+import asyncio
 import time
 import logging
-import xml.etree.ElementTree as ET
-from typing import Dict, Any, List
+import weakref
+from typing import Dict, Any, List, Optional
 from urllib.parse import urlencode
 
 import httpx
 from fastapi import HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import crud
+from app.core.cache import create_cache
 from app.core.config import settings
+from app.core.db import SessionLocal
+from app.core.http import get_yahoo_login_client
+from app.core.metrics import yahoo_request_duration, yahoo_request_errors
 from app.core.security import create_state_token
+from app.core.tracing import span
+from app.models.yahoo_token import YahooToken
 from app.schemas.yahoo_token import YahooTokenCreate, YahooLeague
+from app.services import yahoo_api
 
-# Setup logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # --- Constants ---
-YAHOO_BASE_URL = "https://fantasysports.yahooapis.com/fantasy/v2"
 AUTHORIZATION_URL = "https://api.login.yahoo.com/oauth2/request_auth"
 TOKEN_URL = "https://api.login.yahoo.com/oauth2/get_token"
-YAHOO_XML_NAMESPACE = {'y': 'http://fantasysports.yahooapis.com/fantasy/v2/base.rng'}
+
+# Per-process token state: the latest known token per user, one refresh lock
+# per user, and when each user last needed a token (drives proactive renewal).
+# A lock only lives while some caller holds or awaits it.
+_token_cache: Dict[int, YahooTokenCreate] = {}
+_refresh_locks: "weakref.WeakValueDictionary[int, asyncio.Lock]" = weakref.WeakValueDictionary()
+_last_used: Dict[int, float] = {}
+
+# League lists only change a few times a season; keyed by user id.
+leagues_cache = create_cache("leagues", settings.LEAGUES_CACHE_TTL, settings.LEAGUES_CACHE_STALE_TTL)
 
 def get_authorization_url(user_id: int) -> str:
     """Constructs the Yahoo authorization URL with a secure state token."""
@@ -34,9 +48,30 @@ def get_authorization_url(user_id: int) -> str:
     }
     return f"{AUTHORIZATION_URL}?{urlencode(params)}"
 
+async def _post_token_request(endpoint: str, data: Dict[str, str]) -> Dict[str, Any]:
+    """POSTs to Yahoo's OAuth token endpoint, recording latency and failures under `endpoint`."""
+    headers = {"Content-Type": "application/x-www-form-urlencoded"}
+    started = time.perf_counter()
+    try:
+        with span("yahoo.oauth", endpoint=endpoint) as attributes:
+            response = await get_yahoo_login_client().post(TOKEN_URL, headers=headers, data=data)
+            attributes["status"] = response.status_code
+        response.raise_for_status()
+        return response.json()
+    except httpx.HTTPStatusError as e:
+        yahoo_request_errors.inc(endpoint, str(e.response.status_code))
+        raise
+    except httpx.TimeoutException:
+        yahoo_request_errors.inc(endpoint, "timeout")
+        raise
+    except httpx.HTTPError:
+        yahoo_request_errors.inc(endpoint, "transport")
+        raise
+    finally:
+        yahoo_request_duration.observe(time.perf_counter() - started, endpoint)
+
 async def exchange_code_for_token(code: str) -> Dict[str, Any]:
     """Exchanges an authorization code for an access and refresh token."""
-    headers = {"Content-Type": "application/x-www-form-urlencoded"}
     data = {
         "client_id": settings.YAHOO_CLIENT_ID,
         "client_secret": settings.YAHOO_CLIENT_SECRET,
@@ -44,10 +79,7 @@ async def exchange_code_for_token(code: str) -> Dict[str, Any]:
         "code": code,
         "grant_type": "authorization_code",
     }
-    async with httpx.AsyncClient() as client:
-        response = await client.post(TOKEN_URL, headers=headers, data=data)
-        response.raise_for_status()
-        return response.json()
+    return await _post_token_request("oauth_token_exchange", data)
 
 async def refresh_token(refresh_token: str) -> Dict[str, Any]:
     """Refreshes an expired access token."""
@@ -58,61 +90,146 @@ async def refresh_token(refresh_token: str) -> Dict[str, Any]:
         "refresh_token": refresh_token,
         "grant_type": "refresh_token",
     }
-    async with httpx.AsyncClient() as client:
-        response = await client.post(TOKEN_URL, data=data)
-        response.raise_for_status()
-        return response.json()
+    return await _post_token_request("oauth_token_refresh", data)
+
+def _needs_refresh(expires_at: int, margin: Optional[int] = None) -> bool:
+    """True once a token is within `margin` (default YAHOO_TOKEN_REFRESH_MARGIN) seconds of expiring."""
+    if margin is None:
+        margin = settings.YAHOO_TOKEN_REFRESH_MARGIN
+    return expires_at - margin <= time.time()
+
+def remember_token(user_id: int, token: YahooTokenCreate) -> None:
+    """Stores a freshly issued or refreshed token in the in-memory token cache."""
+    _token_cache[user_id] = token
 
-async def get_refreshed_token(db: Session, user_id: int) -> str:
+def _token_from_row(token_data: YahooToken) -> YahooTokenCreate:
+    return YahooTokenCreate(
+        access_token=token_data.access_token,
+        refresh_token=token_data.refresh_token,
+        token_type=token_data.token_type,
+        expires_at=token_data.expires_at,
+    )
+
+async def _refresh_user_token(db: AsyncSession, user_id: int, margin: Optional[int] = None) -> YahooTokenCreate:
     """
-    Retrieves a user's token, refreshing it if necessary, and returns a valid access token.
+    Refreshes a user's token (if it is within `margin` of expiring) with at most
+    one refresh in flight per user.
+
+    Callers queue on a per-user lock and re-check once they hold it, so only the
+    first one talks to Yahoo. The token row is re-read with SELECT ... FOR UPDATE,
+    which serialises refreshes across worker processes too and guarantees the
+    refresh token we send is the latest one stored.
     """
-    token_data = crud.crud_yahoo_token.get_by_user_id(db, user_id=user_id)
-    if not token_data:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Yahoo account not linked.")
+    lock = _refresh_locks.get(user_id)
+    if lock is None:
+        lock = _refresh_locks[user_id] = asyncio.Lock()
+    with span("yahoo.token_refresh", user_id=user_id):
+        async with lock:
+            cached = _token_cache.get(user_id)
+            if cached and not _needs_refresh(cached.expires_at, margin):
+                return cached
+
+            token_data = await crud.crud_yahoo_token.get_by_user_id_for_update(db, user_id=user_id)
+            if not token_data:
+                await db.rollback()
+                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Yahoo account not linked.")
+            if not _needs_refresh(token_data.expires_at, margin):
+                # Another worker refreshed it while we waited for the row lock.
+                token = _token_from_row(token_data)
+                await db.rollback()
+                remember_token(user_id, token)
+                return token
+
+            try:
+                new_token_info = await refresh_token(token_data.refresh_token)
+            except httpx.HTTPError as e:
+                await db.rollback()
+                logger.error(f"Failed to refresh Yahoo token for user {user_id}: {e}")
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Failed to refresh Yahoo token.")
 
-    if token_data.expires_at < time.time() - 60:
-        try:
-            new_token_info = await refresh_token(token_data.refresh_token)
             token_in = YahooTokenCreate(
                 access_token=new_token_info["access_token"],
                 refresh_token=new_token_info.get("refresh_token", token_data.refresh_token),
                 token_type=new_token_info["token_type"],
                 expires_at=int(time.time()) + new_token_info["expires_in"],
             )
-            crud.crud_yahoo_token.create_or_update(db, obj_in=token_in, user_id=user_id)
-            return token_in.access_token
-        except httpx.HTTPStatusError as e:
-            logger.error(f"Failed to refresh Yahoo token for user {user_id}: {e}")
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Failed to refresh Yahoo token.")
-    
-    return token_data.access_token
-
-async def get_user_leagues(db: Session, user_id: int) -> List[YahooLeague]:
-    """Fetches a user's fantasy football leagues from the Yahoo API."""
-    access_token = await get_refreshed_token(db, user_id=user_id)
-    url = f"{YAHOO_BASE_URL}/users;use_login=1/games;game_keys=nfl/leagues"
-    headers = {"Authorization": f"Bearer {access_token}"}
+            await crud.crud_yahoo_token.create_or_update(db, obj_in=token_in, user_id=user_id)
+            remember_token(user_id, token_in)
+            return token_in
+
+async def get_refreshed_token(db: AsyncSession, user_id: int) -> str:
+    """
+    Returns a valid access token for the user, from memory when possible,
+    refreshing it first if it is about to expire.
+    """
+    _last_used[user_id] = time.time()
+    cached = _token_cache.get(user_id)
+    if cached and not _needs_refresh(cached.expires_at):
+        return cached.access_token
+
+    with span("yahoo.token_lookup", user_id=user_id):
+        token_data = await crud.crud_yahoo_token.get_by_user_id(db, user_id=user_id)
+    if not token_data:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Yahoo account not linked.")
+
+    if not _needs_refresh(token_data.expires_at):
+        token = _token_from_row(token_data)
+        remember_token(user_id, token)
+        return token.access_token
 
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, headers=headers)
+    return (await _refresh_user_token(db, user_id=user_id)).access_token
 
-    if response.status_code != 200:
-        logger.error(f"Error fetching leagues from Yahoo for user {user_id}: {response.text}")
-        raise HTTPException(status_code=response.status_code, detail="Error fetching leagues from Yahoo.")
+async def renew_expiring_tokens() -> int:
+    """
+    Refreshes the tokens of recently active users that expire within
+    YAHOO_TOKEN_RENEW_AHEAD seconds. Returns how many were renewed.
+    """
+    now = time.time()
+    active_users = [
+        user_id for user_id, last_used in _last_used.items()
+        if now - last_used <= settings.YAHOO_TOKEN_RENEWAL_ACTIVE_WINDOW
+    ]
+    for user_id in set(_last_used) - set(active_users):
+        del _last_used[user_id]
+    if not active_users:
+        return 0
+
+    renewed = 0
+    async with SessionLocal() as db:
+        expiring = await crud.crud_yahoo_token.get_expiring(
+            db, before=int(now) + settings.YAHOO_TOKEN_RENEW_AHEAD, user_ids=active_users
+        )
+        for user_id in [token.user_id for token in expiring]:
+            try:
+                await _refresh_user_token(db, user_id=user_id, margin=settings.YAHOO_TOKEN_RENEW_AHEAD)
+                renewed += 1
+            except HTTPException:
+                continue
+    return renewed
 
-    root = ET.fromstring(response.content)
-    leagues = []
-    for league_elem in root.findall('.//y:league', YAHOO_XML_NAMESPACE):
+async def run_token_renewal() -> None:
+    """Background loop (started by the app lifespan) that renews tokens before they expire."""
+    while True:
+        await asyncio.sleep(settings.YAHOO_TOKEN_RENEWAL_INTERVAL)
         try:
-            league = YahooLeague(
-                league_key=league_elem.find('y:league_key', YAHOO_XML_NAMESPACE).text,
-                name=league_elem.find('y:name', YAHOO_XML_NAMESPACE).text,
-                url=league_elem.find('y:url', YAHOO_XML_NAMESPACE).text,
-                season=int(league_elem.find('y:season', YAHOO_XML_NAMESPACE).text),
-            )
-            leagues.append(league)
-        except (AttributeError, ValueError) as e:
-            logger.warning(f"Skipping malformed league element during XML parsing: {e}")
-            continue
-    return leagues
\ No newline at end of file
+            renewed = await renew_expiring_tokens()
+            if renewed:
+                logger.info(f"Proactively renewed {renewed} Yahoo token(s).")
+        except Exception as e:
+            logger.error(f"Yahoo token renewal pass failed: {e!r}")
+
+async def _fetch_user_leagues(db: AsyncSession, user_id: int) -> List[YahooLeague]:
+    access_token = await get_refreshed_token(db, user_id=user_id)
+    return await yahoo_api.get_user_leagues(access_token)
+
+async def get_user_leagues(db: AsyncSession, user_id: int) -> List[YahooLeague]:
+    """Fetches a user's fantasy football leagues, served from cache when possible."""
+    async def load():
+        return await _fetch_user_leagues(db, user_id)
+
+    async def refresh():
+        # Background refreshes outlive the request, so they use their own session.
+        async with SessionLocal() as session:
+            return await _fetch_user_leagues(session, user_id)
+
+    return await leagues_cache.get_or_load(str(user_id), load, refresh=refresh)
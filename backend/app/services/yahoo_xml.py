@@ -0,0 +1,152 @@
+"""
+Incremental parsing of Yahoo Fantasy API XML.
+
+Yahoo responses are fed to an XMLPullParser chunk by chunk as they come off the
+socket. Each target element (a <league>, a <player>, ...) is converted to its
+schema object as soon as its end tag is seen and is then detached from the
+tree, so memory stays flat no matter how large the collection or its stats are.
+Fields are read in a single pass over the element's children using Clark
+notation tags instead of repeated namespaced find() calls.
+"""
+import logging
+import xml.etree.ElementTree as ET
+from typing import Callable, Generic, Iterable, Iterator, List, TypeVar
+
+from app.schemas.league import YahooLeagueSettings, YahooTeam
+from app.schemas.waiver import WaiverPlayer
+from app.schemas.yahoo_token import YahooLeague
+
+logger = logging.getLogger(__name__)
+
+YAHOO_NS = "{http://fantasysports.yahooapis.com/fantasy/v2/base.rng}"
+# Yahoo NFL stat id for receptions; its modifier is the league's points per reception.
+RECEPTIONS_STAT_ID = "11"
+
+T = TypeVar("T")
+
+def _children_text(element: ET.Element) -> dict:
+    """Maps each direct child's local tag name to its text, in one pass."""
+    prefix = len(YAHOO_NS)
+    return {child.tag[prefix:]: child.text for child in element}
+
+def league_from_element(element: ET.Element) -> YahooLeague:
+    fields = _children_text(element)
+    return YahooLeague(
+        league_key=fields["league_key"],
+        name=fields["name"],
+        url=fields["url"],
+        season=int(fields["season"]),
+    )
+
+def waiver_player_from_element(element: ET.Element) -> WaiverPlayer:
+    fields = {}
+    full_name = image_url = ""
+    percent_owned = None
+    eligible_positions: List[str] = []
+    prefix = len(YAHOO_NS)
+    for child in element:
+        tag = child.tag[prefix:]
+        if tag == "name":
+            full_name = child.findtext(YAHOO_NS + "full") or ""
+        elif tag == "headshot":
+            image_url = child.findtext(YAHOO_NS + "url") or ""
+        elif tag == "eligible_positions":
+            eligible_positions = [pos.text for pos in child if pos.text is not None]
+        elif tag == "percent_owned":
+            percent_owned = child.findtext(YAHOO_NS + "value")
+        else:
+            fields[tag] = child.text
+
+    return WaiverPlayer(
+        player_key=fields.get("player_key") or "",
+        player_id=fields.get("player_id") or "",
+        full_name=full_name,
+        editorial_team_abbr=fields.get("editorial_team_abbr") or "",
+        display_position=fields.get("display_position") or "",
+        eligible_positions=eligible_positions,
+        image_url=image_url,
+        percent_owned=int(percent_owned) if percent_owned else 0,
+    )
+
+def league_settings_from_element(element: ET.Element) -> YahooLeagueSettings:
+    fields = _children_text(element)
+    reception_points = 0.0
+    modifiers = f"{YAHOO_NS}settings/{YAHOO_NS}stat_modifiers/{YAHOO_NS}stats/{YAHOO_NS}stat"
+    for stat in element.iterfind(modifiers):
+        if stat.findtext(YAHOO_NS + "stat_id") == RECEPTIONS_STAT_ID:
+            reception_points = float(stat.findtext(YAHOO_NS + "value") or 0)
+    return YahooLeagueSettings(
+        league_key=fields["league_key"],
+        name=fields["name"],
+        season=int(fields["season"]),
+        reception_points=reception_points,
+    )
+
+def team_from_element(element: ET.Element) -> YahooTeam:
+    fields = _children_text(element)
+    players = element.iterfind(f"{YAHOO_NS}roster/{YAHOO_NS}players/{YAHOO_NS}player")
+    return YahooTeam(
+        team_key=fields["team_key"],
+        team_id=fields["team_id"],
+        name=fields["name"],
+        players=[waiver_player_from_element(player) for player in players],
+    )
+
+class YahooXmlStream(Generic[T]):
+    """
+    Push-parser that turns every closed `tag` element into `convert(element)`.
+
+    feed() may be called with arbitrary byte chunks; it returns the objects
+    completed by that chunk. Malformed elements are logged and skipped.
+    """
+
+    def __init__(self, tag: str, convert: Callable[[ET.Element], T]):
+        self._tag = YAHOO_NS + tag
+        self._convert = convert
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._open: List[ET.Element] = []
+
+    def feed(self, data: bytes) -> List[T]:
+        self._parser.feed(data)
+        return list(self._drain())
+
+    def close(self) -> List[T]:
+        self._parser.close()
+        return list(self._drain())
+
+    def _drain(self) -> Iterator[T]:
+        for event, element in self._parser.read_events():
+            if event == "start":
+                self._open.append(element)
+                continue
+            self._open.pop()
+            if element.tag != self._tag:
+                continue
+            try:
+                yield self._convert(element)
+            except (KeyError, ValueError, TypeError) as e:
+                logger.warning(f"Skipping malformed <{self._tag[len(YAHOO_NS):]}> element during XML parsing: {e}")
+            # Detach the handled element so the tree never holds more than one.
+            if self._open:
+                self._open[-1].remove(element)
+
+def parse_all(content: Iterable[bytes], tag: str, convert: Callable[[ET.Element], T]) -> List[T]:
+    """Parses a complete response body (or an iterable of chunks) in one call."""
+    stream = YahooXmlStream(tag, convert)
+    results: List[T] = []
+    for chunk in ([content] if isinstance(content, bytes) else content):
+        results.extend(stream.feed(chunk))
+    results.extend(stream.close())
+    return results
+
+def league_stream() -> YahooXmlStream[YahooLeague]:
+    return YahooXmlStream("league", league_from_element)
+
+def waiver_player_stream() -> YahooXmlStream[WaiverPlayer]:
+    return YahooXmlStream("player", waiver_player_from_element)
+
+def league_settings_stream() -> YahooXmlStream[YahooLeagueSettings]:
+    return YahooXmlStream("league", league_settings_from_element)
+
+def team_roster_stream() -> YahooXmlStream[YahooTeam]:
+    return YahooXmlStream("team", team_from_element)
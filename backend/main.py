@@ -1,14 +1,52 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+import threading
+from contextlib import asynccontextmanager, suppress
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.api.v1.endpoints import auth, yahoo
+from app.api.routers import waiver_router
+from app.api.v1.endpoints import auth, internal, leagues, players, trade, yahoo
 from app.core.config import settings
-from app.core.db import Base, engine
+from app.core.db import SessionLocal, dispose_engine
+from app.core.http import open_http_clients, close_http_clients
+from app.core.metrics import MetricsMiddleware
+from app.core import tracing
+from app.core.tracing import TracingMiddleware
+from app.core.password_hasher import PasswordHasherBusy, password_hasher
+from app.core.profiler import ProfilingMiddleware, continuous_profiler
+from app.services import yahoo_service
+from app.services.player_value_index import run_index_refresh
 
-# Create DB tables if they don't exist
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup stays cheap: the schema is managed by Alembic (`alembic upgrade
+    # head` before deploying), and the DB engine and pool are created by the
+    # first request or background task that needs a session.
+    logging.basicConfig(level=settings.LOG_LEVEL)
+    await open_http_clients()
+    if settings.PROFILER_ENABLED:
+        continuous_profiler.start(threading.get_ident())
+    background = [
+        asyncio.create_task(yahoo_service.run_token_renewal()),
+        asyncio.create_task(run_index_refresh(SessionLocal)),
+    ]
+    yield
+    for task in background:
+        task.cancel()
+    for task in background:
+        with suppress(asyncio.CancelledError):
+            await task
+    await close_http_clients()
+    continuous_profiler.stop()
+    if tracing.exporter is not None:
+        tracing.exporter.close()
+    password_hasher.shutdown()
+    await dispose_engine()
 
-app = FastAPI(title="Fantasy Sports API")
+app = FastAPI(title="Fantasy Sports API", lifespan=lifespan)
 
 # CORS Middleware Configuration
 app.add_middleware(
@@ -18,10 +56,29 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+if settings.TRACING_ENABLED:
+    app.add_middleware(TracingMiddleware)
+# Outermost, so metrics and traces still see the profiled request's real response.
+app.add_middleware(ProfilingMiddleware)
+
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many sign-in attempts in progress, please retry shortly."},
+        headers={"Retry-After": "1"},
+    )
 
 # Include API Routers
 app.include_router(auth.router, prefix=settings.API_V1_STR + "/auth", tags=["Authentication"])
 app.include_router(yahoo.router, prefix=settings.API_V1_STR, tags=["Yahoo Integration"])
+app.include_router(players.router, prefix=settings.API_V1_STR + "/players", tags=["Players"])
+app.include_router(trade.router, prefix=settings.API_V1_STR + "/trades", tags=["Trade Analyzer"])
+app.include_router(leagues.router, prefix=settings.API_V1_STR + "/leagues", tags=["Leagues"])
+app.include_router(waiver_router.router, prefix=settings.API_V1_STR + "/leagues/{league_key}", tags=["Waiver Wire"])
+app.include_router(internal.router, prefix=settings.API_V1_STR + "/internal", tags=["Internal"], include_in_schema=False)
 
 @app.get("/api/health")
 def health_check():
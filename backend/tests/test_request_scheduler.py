@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from app.core.request_scheduler import RequestScheduler
+
+def make_scheduler() -> RequestScheduler:
+    return RequestScheduler("test", max_concurrent=1, app_rate=1000, app_burst=1000, user_rate=1000, user_burst=1000)
+
+def test_waiter_cancelled_while_queued_is_skipped():
+    async def run():
+        scheduler = make_scheduler()
+        release = asyncio.Event()
+        entered = []
+
+        async def request(name: str, hold: bool = False):
+            async with scheduler.slot("user"):
+                entered.append(name)
+                if hold:
+                    await release.wait()
+
+        holder = asyncio.create_task(request("holder", hold=True))
+        await asyncio.sleep(0)
+        cancelled = asyncio.create_task(request("cancelled"))
+        waiting = asyncio.create_task(request("waiting"))
+        await asyncio.sleep(0)
+
+        # The holder releases before the cancelled task runs its except block,
+        # so _dispatch meets a queued waiter that is already done.
+        release.set()
+        cancelled.cancel()
+        await holder
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        await waiting
+
+        stats = scheduler.stats()
+        assert entered == ["holder", "waiting"]
+        assert stats["in_flight"] == 0
+        assert stats["lanes"]["interactive"]["queued"] == 0
+
+    asyncio.run(run())
+
+def test_waiter_cancelled_after_grant_releases_its_slot():
+    async def run():
+        scheduler = make_scheduler()
+        entered = []
+
+        async def request(name: str):
+            async with scheduler.slot("user"):
+                entered.append(name)
+
+        release = asyncio.Event()
+
+        async def holder():
+            async with scheduler.slot("user"):
+                await release.wait()
+            # The release granted the slot to the queued task; cancel it
+            # before it wakes up.
+            granted.cancel()
+
+        holding = asyncio.create_task(holder())
+        await asyncio.sleep(0)
+        granted = asyncio.create_task(request("granted"))
+        await asyncio.sleep(0)
+        release.set()
+        await holding
+        with pytest.raises(asyncio.CancelledError):
+            await granted
+        await asyncio.wait_for(request("next"), timeout=1)  # Hangs if the slot leaked.
+
+        assert entered == ["next"]
+        assert scheduler.stats()["in_flight"] == 0
+
+    asyncio.run(run())